@@ -1,6 +1,7 @@
 import streamlit as st
 from src.auth import login_user, logout_user, get_current_user
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun
 
 # Page Config - Trigger Redeploy
 st.set_page_config(
@@ -12,6 +13,7 @@ st.set_page_config(
 
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("home")
 
 # Auth Check
 user = get_current_user()
@@ -0,0 +1,130 @@
+import io
+import random
+from typing import Dict, List
+
+from docx import Document
+
+# Synthetic resume / JD corpus for benchmarks.
+# Deterministic (seeded) so runs are comparable against the stored baseline.
+
+SIZES = {
+    "small": 300,     # ~1 page
+    "medium": 1500,   # ~4 pages
+    "large": 6000     # ~15 pages
+}
+
+FIRST_NAMES = ["Alex", "Jordan", "Sam", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+LAST_NAMES = ["Kim", "Garcia", "Okafor", "Nguyen", "Schmidt", "Haile", "Rossi", "Patel"]
+SKILLS = [
+    "Python", "SQL", "Postgres", "AWS", "Docker", "Kubernetes", "React", "TypeScript",
+    "Go", "Terraform", "Airflow", "Spark", "Pandas", "FastAPI", "GraphQL", "Redis"
+]
+WORDS = (
+    "led designed built shipped migrated scaled improved reduced latency cost pipeline service "
+    "platform team customers revenue reliability on-call architecture roadmap mentoring hiring "
+    "stakeholders metrics dashboards experiments launch quarterly objectives ownership delivery"
+).split()
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+    words.insert(rng.randint(0, len(words)), rng.choice(SKILLS))
+    return " ".join(words).capitalize() + "."
+
+def _contact_line(rng: random.Random) -> str:
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return (
+        f"{first.lower()}.{last.lower()}@example.com | "
+        f"({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)} | "
+        f"linkedin.com/in/{first.lower()}{last.lower()}"
+    )
+
+def make_resume_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", _contact_line(rng), "", "EXPERIENCE"]
+    count = 0
+    while count < words:
+        if rng.random() < 0.1:
+            # Sprinkle contact details / references through the text for redaction
+            lines.append(f"Reference: {_contact_line(rng)}")
+        sentence = _sentence(rng)
+        lines.append(f"- {sentence}")
+        count += len(sentence.split())
+    lines += ["", "SKILLS", ", ".join(rng.sample(SKILLS, 8)), "", "EDUCATION", "B.Sc. Computer Science, State University"]
+    return "\n".join(lines)
+
+def make_jd_text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed + 1000)
+    lines = ["Senior Software Engineer", "Team: Platform | Location: Remote | Full-time", "", "Responsibilities"]
+    count = 0
+    while count < words:
+        sentence = _sentence(rng)
+        lines.append(f"- {sentence}")
+        count += len(sentence.split())
+    lines += ["", "Requirements", ", ".join(rng.sample(SKILLS, 6)), "", "Nice to have", ", ".join(rng.sample(SKILLS, 4))]
+    return "\n".join(lines)
+
+# --- File encoders ---
+
+def to_txt(text: str) -> bytes:
+    return text.encode("utf-8")
+
+def to_docx(text: str) -> bytes:
+    doc = Document()
+    for line in text.split("\n"):
+        doc.add_paragraph(line)
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def to_pdf(text: str, lines_per_page: int = 50) -> bytes:
+    """Minimal text PDF writer (Helvetica, one text object per page)."""
+    all_lines = text.split("\n")
+    pages = [all_lines[i:i + lines_per_page] for i in range(0, len(all_lines), lines_per_page)] or [[""]]
+
+    objects: List[bytes] = []
+    # 1: catalog, 2: pages, 3: font, then (page, content) pairs
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, page_lines in enumerate(pages):
+        content_id = page_ids[i] + 1
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        ops = ["BT", "/F1 9 Tf", "11 TL", "40 760 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line.encode('latin-1', 'replace').decode('latin-1'))}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{num} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+ENCODERS = {"txt": to_txt, "docx": to_docx, "pdf": to_pdf}
+
+def build_corpus() -> Dict[str, Dict[str, Dict[str, bytes]]]:
+    """{kind: {size: {fmt: bytes}}} for kind in (resume, jd)."""
+    corpus = {"resume": {}, "jd": {}}
+    for size, words in SIZES.items():
+        texts = {"resume": make_resume_text(words), "jd": make_jd_text(words)}
+        for kind, text in texts.items():
+            corpus[kind][size] = {fmt: enc(text) for fmt, enc in ENCODERS.items()}
+            corpus[kind][size]["text"] = text.encode("utf-8")
+    return corpus
@@ -0,0 +1,117 @@
+import json
+import time
+import random
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+
+# Fake Gemini REST server for end-to-end benchmarks of call_llm_json.
+# Serves POST /v1beta/models/<model>:generateContent with canned, schema-valid
+# JSON after a configurable delay. Point the app at it with GEMINI_API_ENDPOINT.
+
+CANNED = {
+    "JobParsingSchema": {
+        "title": "Senior Software Engineer", "team": "Platform", "location": "Remote",
+        "employment_type": "Full-time", "comp_range_min": 150000, "comp_range_max": 190000,
+        "must_have_skills": ["Python", "SQL", "AWS"], "nice_to_have_skills": ["Go"],
+        "responsibilities": ["Build services", "Mentor engineers"],
+        "interview_stages": [{"name": "Screening", "type": "video"}]
+    },
+    "CandidateParsingSchema": {
+        "full_name": "Riley Rossi", "email": "riley@example.com", "phone": "555-123-4567",
+        "location": "Remote", "links": {"linkedin": "https://linkedin.com/in/riley"},
+        "experience_years": 7, "skills": ["Python", "SQL", "Docker"], "education": ["B.Sc. Computer Science"]
+    },
+    "EvaluationResult": {
+        "overall_score": 78,
+        "score_breakdown": {"skills_match": 80, "experience_relevance": 75, "impact": 70,
+                            "communication": 85, "seniority_fit": 80},
+        "ai_summary": "Strong backend profile.", "strengths": ["Python"], "concerns": ["No Go"],
+        "missing_must_haves": [], "risk_flags": [], "suggested_interview_questions": ["Describe a migration."]
+    },
+    "OutreachMessage": {"subject": "An opportunity at Acme", "body": "Hi Riley, ..."},
+    "ScreeningResult": {"summary": "Good call.", "recommended_stage": "interview", "updated_rubric_notes": "Solid."}
+}
+
+class FakeGeminiServer:
+    """Threaded fake server. latency_ms +/- jitter_ms per request; invalid_rate of
+    responses are malformed JSON to exercise the retry path."""
+
+    def __init__(self, latency_ms: float = 50, jitter_ms: float = 0, invalid_rate: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.invalid_rate = invalid_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _next_delay_and_validity(self):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms))
+            valid = self._rng.random() >= self.invalid_rate
+        return delay / 1000, valid
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                prompt = "".join(
+                    part.get("text", "")
+                    for content in body.get("contents", [])
+                    for part in content.get("parts", [])
+                )
+                delay, valid = server._next_delay_and_validity()
+                time.sleep(delay)
+
+                payload = next((v for k, v in CANNED.items() if f'"title": "{k}"' in prompt), {})
+                text = json.dumps(payload) if valid else "{not json"
+                response = {
+                    "candidates": [{
+                        "content": {"parts": [{"text": text}], "role": "model"},
+                        "finishReason": "STOP",
+                        "index": 0
+                    }],
+                    "usageMetadata": {
+                        "promptTokenCount": len(prompt) // 4,
+                        "candidatesTokenCount": len(text) // 4,
+                        "totalTokenCount": (len(prompt) + len(text)) // 4
+                    }
+                }
+                data = json.dumps(response).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def start(self) -> "FakeGeminiServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,136 @@
+"""
+Import-time profile of each Streamlit entry point, based on `python -X importtime`.
+
+    python -m benchmarks.import_profile              # report per page + heaviest modules
+    python -m benchmarks.import_profile --check      # exit 1 if the login page misses its targets
+
+For each page the top-level imports are collected with `ast` and imported in a fresh
+interpreter under -X importtime, so the numbers match what a cold script run pays.
+Login time-to-first-render is measured separately by running app.py through
+Streamlit's AppTest harness in a fresh process (no Supabase / Gemini needed for the
+login view).
+"""
+import ast
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINTS = ["app.py"] + sorted(str(p.relative_to(ROOT)) for p in (ROOT / "pages").glob("*.py"))
+
+# Targets for the login page (app.py, logged out), on a warm disk cache.
+# Imports beyond streamlit itself should stay well under the SDK costs that are
+# now loaded lazily (supabase ~0.4s, google.generativeai ~0.7s, pandas ~0.4s).
+# Before lazy loading the login page's first run took ~750 ms; after, ~450 ms.
+LOGIN_IMPORT_TARGET_MS = 150
+LOGIN_TTFR_TARGET_MS = 600
+
+HEAVY_PACKAGES = ["pandas", "plotly", "google.generativeai", "supabase", "PyPDF2", "docx", "pyarrow"]
+
+def top_level_imports(path: Path) -> List[str]:
+    """Module names imported at module level (not inside functions or branches)."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """{module: (self_us, cumulative_us)} from -X importtime output."""
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, rest = line.split(":", 1)
+        self_us, cumulative_us, name = [part.strip() for part in rest.split("|")]
+        result[name] = (int(self_us), int(cumulative_us))
+    return result
+
+def profile_imports(modules: List[str], baseline: List[str] = None) -> Dict[str, Tuple[int, int]]:
+    """Import `baseline` first (excluded from attribution), then `modules`, under -X importtime."""
+    baseline = baseline or []
+    code = "".join(f"import {m}\n" for m in baseline)
+    code += "import sys\nsys.stderr.write('--- profile start ---\\n')\n"
+    code += "".join(f"import {m}\n" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed for {modules}:\n{proc.stderr[-2000:]}")
+    stderr = proc.stderr.split("--- profile start ---", 1)[-1]
+    return parse_importtime(stderr)
+
+def measure_login_ttfr() -> float:
+    """
+    Milliseconds for the first run of the logged-out login page in a fresh process.
+    Streamlit's own import is excluded (the server has it loaded before any session),
+    so this is what the app's own imports and rendering cost a cold page load.
+    """
+    code = (
+        "import time, json, sys\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({str(ROOT / 'app.py')!r})\n"
+        "start = time.perf_counter()\n"
+        "at.run(timeout=60)\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        "assert not at.exception, at.exception\n"
+        "sys.stdout.write(json.dumps(elapsed))\n"
+    )
+    proc = subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Login page failed to render:\n{proc.stderr[-2000:]}")
+    return float(proc.stdout.strip().splitlines()[-1])
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the Streamlit pages")
+    parser.add_argument("--top", type=int, default=10, help="Heaviest modules to list per page")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if the login page misses its targets")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    report = {"pages": {}, "targets": {
+        "login_import_ms": LOGIN_IMPORT_TARGET_MS, "login_ttfr_ms": LOGIN_TTFR_TARGET_MS
+    }}
+
+    for entry in ENTRY_POINTS:
+        modules = top_level_imports(ROOT / entry)
+        # streamlit is unavoidable for every page; attribute only what the page adds
+        timings = profile_imports([m for m in modules if m != "streamlit"], baseline=["streamlit"])
+        # Top-level entries (cumulative) are the ones imported directly by the code string
+        direct = {m: t for m, t in timings.items() if m in modules}
+        total_ms = sum(t[1] for t in direct.values()) / 1000
+        heavy = [p for p in HEAVY_PACKAGES if p in timings]
+        heaviest = sorted(timings.items(), key=lambda kv: kv[1][0], reverse=True)[:args.top]
+        report["pages"][entry] = {
+            "import_ms": round(total_ms, 1),
+            "heavy_packages_loaded": heavy,
+            "heaviest_modules_self_ms": {name: round(t[0] / 1000, 1) for name, t in heaviest}
+        }
+        print(f"{entry:<32} {total_ms:8.1f} ms  heavy: {', '.join(heavy) or '-'}")
+
+    ttfr = measure_login_ttfr()
+    report["login_ttfr_ms"] = round(ttfr, 1)
+    login_import = report["pages"]["app.py"]["import_ms"]
+    print(f"\nLogin page: imports {login_import:.1f} ms (target {LOGIN_IMPORT_TARGET_MS}), "
+          f"time-to-first-render {ttfr:.0f} ms (target {LOGIN_TTFR_TARGET_MS})")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+    if args.check:
+        failed = login_import > LOGIN_IMPORT_TARGET_MS or ttfr > LOGIN_TTFR_TARGET_MS
+        if report["pages"]["app.py"]["heavy_packages_loaded"]:
+            print(f"Login page loads heavy packages: {report['pages']['app.py']['heavy_packages_loaded']}")
+            failed = True
+        return 1 if failed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+-- Seed data for the RLS benchmark. Sizes are psql variables, e.g.
+--   psql -v n_profiles=2000 -v n_jobs=500 -v n_candidates=50000 -v n_applications=200000 ...
+-- Profiles 1..3 are fixed personas: admin, recruiter, candidate.
+
+insert into auth.users (id, email)
+select ('00000000-0000-0000-0000-' || lpad(g::text, 12, '0'))::uuid, 'user' || g || '@example.com'
+from generate_series(1, :n_profiles) g;
+
+insert into profiles (id, full_name, role)
+select ('00000000-0000-0000-0000-' || lpad(g::text, 12, '0'))::uuid,
+       'User ' || g,
+       (case when g = 1 then 'admin' when g = 3 then 'candidate' when g % 10 = 0 then 'manager' else 'recruiter' end)::user_role
+from generate_series(1, :n_profiles) g;
+
+insert into jobs (title, status, created_by, must_have_skills)
+select 'Job ' || g,
+       (case when g % 3 = 0 then 'closed' when g % 7 = 0 then 'draft' else 'open' end)::job_status,
+       '00000000-0000-0000-0000-000000000002'::uuid,
+       array['Python', 'SQL']
+from generate_series(1, :n_jobs) g;
+
+-- Candidate persona owns the first 5 candidate rows
+insert into candidates (full_name, email, resume_text, user_id)
+select 'Candidate ' || g, 'cand' || g || '@example.com', repeat('experience ', 50),
+       case when g <= 5 then '00000000-0000-0000-0000-000000000003'::uuid end
+from generate_series(1, :n_candidates) g;
+
+with j as (select array_agg(id order by title) ids from jobs),
+     c as (select array_agg(id order by email) ids from candidates)
+insert into applications (job_id, candidate_id, stage, overall_score)
+select j.ids[1 + (g % array_length(j.ids, 1))],
+       c.ids[1 + (g / array_length(j.ids, 1)) % array_length(c.ids, 1)],
+       (array['new','screened','interview','offer','hired','rejected'])[1 + g % 6]::application_stage,
+       g % 100
+from generate_series(0, :n_applications - 1) g, j, c
+on conflict do nothing;
+
+insert into notes (application_id, author_id, note)
+select a.id, '00000000-0000-0000-0000-000000000002'::uuid, 'Note on ' || a.id
+from applications a
+order by a.id
+limit :n_notes;
+
+insert into audit_log (actor_id, action, entity_type, entity_id)
+select '00000000-0000-0000-0000-000000000002'::uuid, 'APPLICATION_STAGE_CHANGED', 'application', gen_random_uuid()
+from generate_series(1, :n_audit) g;
+
+analyze;
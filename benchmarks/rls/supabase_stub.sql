@@ -0,0 +1,30 @@
+-- Minimal stand-in for the Supabase-managed pieces the app's SQL depends on,
+-- so the schema and policies can be loaded into a plain local Postgres.
+create schema if not exists auth;
+
+create table if not exists auth.users (
+  id uuid primary key,
+  email text
+);
+
+-- Same contract as Supabase's auth.uid(): the JWT "sub" claim of the current request
+create or replace function auth.uid()
+returns uuid
+language sql
+stable
+as $$
+  select coalesce(
+    nullif(current_setting('request.jwt.claim.sub', true), ''),
+    nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'sub'
+  )::uuid
+$$;
+
+do $$
+begin
+  if not exists (select 1 from pg_roles where rolname = 'authenticated') then
+    create role authenticated nologin;
+  end if;
+end$$;
+
+grant usage on schema public, auth to authenticated;
+alter default privileges in schema public grant all on tables to authenticated;
@@ -0,0 +1,154 @@
+"""
+Before/after benchmark of RLS policy-filtered scans on a seeded local Postgres.
+
+    python -m benchmarks.rls_benchmark --dsn postgresql://postgres@localhost:5432/postgres
+
+Creates a scratch database, loads a Supabase stand-in (benchmarks/rls/supabase_stub.sql),
+sql/schema.sql, sql/rls_policies.sql and sql/candidate_portal_migration.sql, seeds it,
+then times a set of queries as each persona (admin, recruiter, candidate) under RLS.
+It then applies sql/rls_performance_migration.sql and times the same queries again.
+
+Timings are the "Execution Time" of EXPLAIN (ANALYZE), median of --repeat runs.
+Only needs the `psql` client on PATH (or --psql).
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+SQL_DIR = ROOT / "sql"
+STUB_DIR = ROOT / "benchmarks" / "rls"
+
+BASE_FILES = [
+    STUB_DIR / "supabase_stub.sql",
+    SQL_DIR / "schema.sql",
+    SQL_DIR / "rls_policies.sql",
+    SQL_DIR / "candidate_portal_migration.sql"
+]
+MIGRATION = SQL_DIR / "rls_performance_migration.sql"
+
+PERSONAS = {
+    "admin": "00000000-0000-0000-0000-000000000001",
+    "recruiter": "00000000-0000-0000-0000-000000000002",
+    "candidate": "00000000-0000-0000-0000-000000000003"
+}
+
+# (persona, name, sql). Writes run inside a rolled-back transaction.
+QUERIES = [
+    ("admin", "profiles: list all", "select * from profiles"),
+    ("admin", "audit_log: count", "select count(*) from audit_log"),
+    ("admin", "audit_log: latest 50", "select * from audit_log order by created_at desc limit 50"),
+    ("recruiter", "applications: count", "select count(*) from applications"),
+    ("recruiter", "applications: update stage for a job",
+     "update applications set stage = stage where job_id = (select id from jobs order by title limit 1)"),
+    ("recruiter", "jobs: update open", "update jobs set updated_at = updated_at where status = 'open'"),
+    ("candidate", "applications: own", "select * from applications"),
+    ("candidate", "candidates: own profile", "select * from candidates where user_id = auth.uid()"),
+]
+
+SEED_SIZES = {
+    "n_profiles": 2000,
+    "n_jobs": 500,
+    "n_candidates": 50000,
+    "n_applications": 200000,
+    "n_notes": 100000,
+    "n_audit": 200000
+}
+
+class Psql:
+    def __init__(self, psql: str, dsn: str):
+        self.psql = psql
+        self.dsn = dsn
+
+    def run(self, sql: str = None, file: Path = None, variables: Dict[str, object] = None) -> str:
+        cmd = [self.psql, self.dsn, "-X", "-q", "-At", "-v", "ON_ERROR_STOP=1"]
+        for k, v in (variables or {}).items():
+            cmd += ["-v", f"{k}={v}"]
+        if file:
+            cmd += ["-f", str(file)]
+        proc = subprocess.run(cmd, input=sql, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"psql failed ({file or sql[:80]}):\n{proc.stderr}")
+        return proc.stdout
+
+def _with_db(dsn: str, dbname: str) -> str:
+    """Same URI-style DSN pointing at another database."""
+    parts = urlsplit(dsn)
+    return urlunsplit(parts._replace(path=f"/{dbname}"))
+
+def time_query(db: Psql, persona: str, sql: str, repeat: int) -> Dict[str, float]:
+    """Median/min EXPLAIN ANALYZE execution time (ms) of `sql` as `persona` under RLS."""
+    script = []
+    for _ in range(repeat + 1):  # first run warms caches and is discarded
+        script.append(
+            "begin;\n"
+            "set local role authenticated;\n"
+            f"set local request.jwt.claim.sub = '{PERSONAS[persona]}';\n"
+            f"explain (analyze, format json) {sql};\n"
+            "rollback;\n"
+            "\\echo @@plan@@\n"
+        )
+    out = db.run("".join(script))
+    timings = []
+    for chunk in out.split("@@plan@@"):
+        if chunk.strip():
+            timings.append(json.loads(chunk)[0]["Execution Time"])
+    timings = timings[1:]
+    return {"median_ms": round(statistics.median(timings), 3), "min_ms": round(min(timings), 3)}
+
+def run_suite(db: Psql, repeat: int) -> Dict[str, Dict[str, float]]:
+    return {f"{persona}: {name}": time_query(db, persona, sql, repeat) for persona, name, sql in QUERIES}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="RLS policy before/after benchmark")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_PG_DSN", "postgresql://postgres@localhost:5432/postgres"),
+                        help="Maintenance DSN; a scratch database is created next to it")
+    parser.add_argument("--psql", default="psql")
+    parser.add_argument("--dbname", default="rls_bench")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for seed sizes")
+    parser.add_argument("--keep", action="store_true", help="Don't drop the scratch database")
+    parser.add_argument("--output", help="Write results JSON to this path")
+    args = parser.parse_args(argv)
+
+    admin = Psql(args.psql, args.dsn)
+    admin.run(f"drop database if exists {args.dbname};\ncreate database {args.dbname};\n")
+    db = Psql(args.psql, _with_db(args.dsn, args.dbname))
+
+    try:
+        for f in BASE_FILES:
+            db.run(file=f)
+        sizes = {k: max(1, int(v * args.scale)) for k, v in SEED_SIZES.items()}
+        print(f"Seeding {sizes} ...")
+        db.run(file=STUB_DIR / "seed.sql", variables=sizes)
+
+        print("Timing original policies ...")
+        before = run_suite(db, args.repeat)
+        db.run(file=MIGRATION)
+        db.run("analyze;")
+        print("Timing reworked policies ...")
+        after = run_suite(db, args.repeat)
+    finally:
+        if not args.keep:
+            admin.run(f"drop database if exists {args.dbname};")
+
+    width = max(len(k) for k in before)
+    print(f"\n{'query':<{width}}  {'before ms':>10}  {'after ms':>10}  {'speedup':>8}")
+    for name in before:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        speedup = b / a if a else float("inf")
+        print(f"{name:<{width}}  {b:>10.2f}  {a:>10.2f}  {speedup:>7.1f}x")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps({"seed": SEED_SIZES, "scale": args.scale,
+                                                 "before": before, "after": after}, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run                      # run and print results
+    python -m benchmarks.run --save-baseline      # write benchmarks/baseline.json
+    python -m benchmarks.run --compare            # fail (exit 1) on regressions vs baseline
+
+Covers text extraction, PII redaction, prompt assembly and call_llm_json end to end
+against a local fake Gemini server (benchmarks/fake_gemini.py).
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List, Any
+
+# Allow `python benchmarks/run.py` as well as `python -m benchmarks.run`
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Keep benchmark LLM telemetry out of the real store
+os.environ.setdefault("TELEMETRY_DB_PATH", os.path.join(tempfile.gettempdir(), "bench_telemetry.sqlite3"))
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-fake-key")
+
+from benchmarks.corpus import build_corpus, SIZES
+from benchmarks.fake_gemini import FakeGeminiServer
+
+BASELINE_PATH = ROOT / "benchmarks" / "baseline.json"
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 4),
+        "min_ms": round(timings[0], 4),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "runs": repeat
+    }
+
+def bench_extraction(corpus, repeat: int) -> Dict[str, Dict]:
+    from src.utils import extract_text_from_file
+    results = {}
+    for kind in ("resume", "jd"):
+        for size in SIZES:
+            for fmt in ("txt", "docx", "pdf"):
+                data = corpus[kind][size][fmt]
+                name = f"extract_text_from_file[{kind}-{fmt}-{size}]"
+                results[name] = measure(lambda: extract_text_from_file(io.BytesIO(data), f"file.{fmt}"), repeat)
+    return results
+
+def bench_redaction(corpus, repeat: int) -> Dict[str, Dict]:
+    from src.utils import redact_pii
+    results = {}
+    for size in SIZES:
+        text = corpus["resume"][size]["text"].decode("utf-8")
+        results[f"redact_pii[{size}]"] = measure(lambda: redact_pii(text), repeat)
+    return results
+
+def bench_prompts(corpus, repeat: int) -> Dict[str, Dict]:
+    from src import llm
+    from src.schemas import JobParsingSchema, CandidateParsingSchema, EvaluationResult
+    from benchmarks.fake_gemini import CANNED
+
+    results = {}
+    for size in SIZES:
+        resume = corpus["resume"][size]["text"].decode("utf-8")
+        jd = corpus["jd"][size]["text"].decode("utf-8")
+        job_row = dict(CANNED["JobParsingSchema"], jd_text=jd)
+        candidate = CANNED["CandidateParsingSchema"]
+        cases = {
+            "parse_job_description": lambda: llm.build_json_prompt(llm.build_job_description_prompt(jd), JobParsingSchema),
+            "parse_resume": lambda: llm.build_json_prompt(llm.build_resume_prompt(resume), CandidateParsingSchema),
+            "evaluate_candidate": lambda: llm.build_json_prompt(
+                llm.build_evaluation_prompt(job_row, candidate, resume), EvaluationResult
+            )
+        }
+        for task, fn in cases.items():
+            results[f"prompt[{task}-{size}]"] = measure(fn, repeat)
+    return results
+
+def bench_llm(corpus, repeat: int, latency_ms: float, invalid_rate: float) -> Dict[str, Dict]:
+    from src import llm, llm_scheduler
+    from src.schemas import JobParsingSchema, CandidateParsingSchema, EvaluationResult
+
+    # Measure call_llm_json itself: the fake server has no quota to protect
+    llm_scheduler.configure_scheduler(requests_per_minute=10**6, tokens_per_minute=10**9)
+    results = {}
+    with FakeGeminiServer(latency_ms=latency_ms, invalid_rate=invalid_rate) as server:
+        os.environ["GEMINI_API_ENDPOINT"] = server.endpoint
+        resume = corpus["resume"]["medium"]["text"].decode("utf-8")
+        jd = corpus["jd"]["medium"]["text"].decode("utf-8")
+        cases = {
+            "parse_job_description": (llm.build_job_description_prompt(jd), JobParsingSchema),
+            "parse_resume": (llm.build_resume_prompt(resume), CandidateParsingSchema),
+            "evaluate_candidate": (llm.build_resume_prompt(resume), EvaluationResult)
+        }
+        for task, (prompt, schema) in cases.items():
+            def run():
+                # Measure the API path, not the response cache
+                llm.clear_response_cache()
+                if llm.call_llm_json(prompt, schema, task=f"benchmark_{task}") is None:
+                    raise RuntimeError(f"call_llm_json returned None for {task}")
+            results[f"call_llm_json[{task}]"] = measure(run, repeat)
+        os.environ.pop("GEMINI_API_ENDPOINT", None)
+    llm_scheduler.configure_scheduler()
+    return results
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """Names of benchmarks whose median regressed beyond tolerance (and an absolute floor)."""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = base["median_ms"] * (1 + tolerance)
+        if res["median_ms"] > limit and res["median_ms"] - base["median_ms"] > min_delta_ms:
+            regressions.append(
+                f"{name}: {res['median_ms']:.3f} ms vs baseline {base['median_ms']:.3f} ms "
+                f"(+{(res['median_ms'] / base['median_ms'] - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recruitment agent benchmarks")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="Fewer runs, for a smoke check")
+    parser.add_argument("--only", help="Substring filter on benchmark groups: extract, redact, prompt, llm")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake Gemini response latency")
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Fraction of malformed fake responses")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE_PATH.name}")
+    parser.add_argument("--compare", action="store_true", help="Compare against baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore regressions smaller than this")
+    parser.add_argument("--output", help="Also write results JSON to this path")
+    args = parser.parse_args(argv)
+
+    repeat = 3 if args.quick else args.repeat
+    llm_repeat = max(3, repeat // 4)
+    corpus = build_corpus()
+
+    groups = {
+        "extract": lambda: bench_extraction(corpus, repeat),
+        "redact": lambda: bench_redaction(corpus, repeat),
+        "prompt": lambda: bench_prompts(corpus, repeat),
+        "llm": lambda: bench_llm(corpus, llm_repeat, args.latency_ms, args.invalid_rate)
+    }
+    results: Dict[str, Dict] = {}
+    for group, run in groups.items():
+        if args.only and args.only not in group:
+            continue
+        results.update(run())
+
+    width = max(len(n) for n in results) if results else 10
+    print(f"{'benchmark':<{width}}  {'median ms':>10}  {'min ms':>10}  {'p95 ms':>10}")
+    for name, res in results.items():
+        print(f"{name:<{width}}  {res['median_ms']:>10.3f}  {res['min_ms']:>10.3f}  {res['p95_ms']:>10.3f}")
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "fake_latency_ms": args.latency_ms,
+        "results": results
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline written to {BASELINE_PATH}")
+
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            print(f"\nNo baseline at {BASELINE_PATH}; run with --save-baseline first.")
+            return 1
+        baseline = json.loads(BASELINE_PATH.read_text())["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("\nPerformance regressions:")
+            for r in regressions:
+                print(f"  - {r}")
+            return 1
+        print(f"\nNo regressions vs baseline (tolerance {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
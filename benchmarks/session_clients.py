@@ -0,0 +1,226 @@
+"""
+Concurrency check for per-session Supabase clients (src.db.create_session_client).
+
+    python -m benchmarks.session_clients --sessions 50 --queries 20
+
+Starts a fake PostgREST + GoTrue server, then simulates many browser sessions in
+parallel: each signs in through its own client (as login_user does) and runs queries
+with a client carrying its JWT. The fake server answers every query with the user the
+request was authorized as, so the run verifies:
+  - isolation: every response belongs to the session that sent it, and an anonymous
+    client is never upgraded by someone else's login;
+  - connection reuse: all sessions share the keep-alive pool, so the number of TCP
+    connections stays far below the number of requests (and within the pool limit).
+Exits 1 if either check fails.
+"""
+import sys
+import json
+import time
+import uuid
+import base64
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+ANON_KEY = "anon-key"
+
+def _b64(data: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).rstrip(b"=").decode("ascii")
+
+def make_jwt(sub: str, email: str, expires_at: int) -> str:
+    header = {"alg": "HS256", "typ": "JWT"}
+    payload = {"sub": sub, "email": email, "role": "authenticated", "aud": "authenticated", "exp": expires_at}
+    return f"{_b64(header)}.{_b64(payload)}.signature"
+
+def jwt_subject(authorization: Optional[str]) -> str:
+    token = (authorization or "").removeprefix("Bearer ").strip()
+    if token == ANON_KEY or token.count(".") != 2:
+        return "anon"
+    payload = token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))["sub"]
+
+def user_id(email: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, email))
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 256  # every simulated session connects at once
+    daemon_threads = True
+
+class FakeSupabaseServer:
+    """Threaded HTTP/1.1 server (keep-alive) standing in for GoTrue and PostgREST."""
+
+    def __init__(self, latency_ms: float = 5, host: str = "127.0.0.1", port: int = 0):
+        self.latency_ms = latency_ms
+        self.requests = 0
+        self.connections = 0
+        self.open_connections = 0
+        self.max_open_connections = 0
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                with server._lock:
+                    server.connections += 1
+                    server.open_connections += 1
+                    server.max_open_connections = max(server.max_open_connections, server.open_connections)
+                try:
+                    super().handle()
+                finally:
+                    with server._lock:
+                        server.open_connections -= 1
+
+            def _send(self, status: int, payload: Any):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self) -> Dict[str, Any]:
+                length = int(self.headers.get("Content-Length", 0))
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_POST(self):
+                with server._lock:
+                    server.requests += 1
+                body = self._body()
+                time.sleep(server.latency_ms / 1000)
+                if self.path.startswith("/auth/v1/token"):
+                    email = body.get("email", "")
+                    now = int(time.time())
+                    sub = user_id(email)
+                    self._send(200, {
+                        "access_token": make_jwt(sub, email, now + 3600),
+                        "refresh_token": uuid.uuid4().hex,
+                        "token_type": "bearer",
+                        "expires_in": 3600,
+                        "expires_at": now + 3600,
+                        "user": {
+                            "id": sub, "aud": "authenticated", "role": "authenticated", "email": email,
+                            "app_metadata": {}, "user_metadata": {}, "created_at": "2024-01-01T00:00:00Z"
+                        }
+                    })
+                elif self.path.startswith("/auth/v1/logout"):
+                    self._send(204, {})
+                else:
+                    self._send(201, [{"sub": jwt_subject(self.headers.get("Authorization"))}])
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                time.sleep(server.latency_ms / 1000)
+                # PostgREST stand-in: who was this request authorized as?
+                self._send(200, [{"sub": jwt_subject(self.headers.get("Authorization"))}])
+
+        return Handler
+
+    def start(self) -> "FakeSupabaseServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def simulate_session(index: int, queries: int, barrier: threading.Barrier) -> Dict[str, Any]:
+    from src import db
+    email = f"user{index}@example.com"
+    expected = user_id(email)
+
+    # What login_user does: sign in on a throwaway client, then build the session's client
+    response = db.create_session_client().auth.sign_in_with_password({"email": email, "password": "secret"})
+    start = time.perf_counter()
+    client = db.create_session_client(response.session.access_token)
+    create_ms = (time.perf_counter() - start) * 1000
+
+    barrier.wait(timeout=60)  # all sessions query at once
+    mismatches = 0
+    for _ in range(queries):
+        rows = client.table("profiles").select("*").execute().data
+        if rows[0]["sub"] != expected:
+            mismatches += 1
+    return {"mismatches": mismatches, "create_ms": create_ms}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=20, help="queries per session")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    from src import db
+    from src.constants import SUPABASE_POOL_MAX_CONNECTIONS
+
+    with FakeSupabaseServer(latency_ms=args.latency_ms) as server:
+        # Point the client factory at the fake server instead of secrets / env
+        db._supabase_settings = lambda: (server.url, ANON_KEY)
+        anonymous = db.create_session_client()
+
+        barrier = threading.Barrier(args.sessions)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            results = list(pool.map(lambda i: simulate_session(i, args.queries, barrier), range(args.sessions)))
+        elapsed = time.perf_counter() - start
+
+        anon_sub = anonymous.table("profiles").select("*").execute().data[0]["sub"]
+
+    mismatches = sum(r["mismatches"] for r in results)
+    create_ms = sorted(r["create_ms"] for r in results)
+    report = {
+        "sessions": args.sessions,
+        "requests": server.requests,
+        "tcp_connections": server.connections,
+        "max_open_connections": server.max_open_connections,
+        "pool_max_connections": SUPABASE_POOL_MAX_CONNECTIONS,
+        "requests_per_connection": round(server.requests / max(1, server.connections), 1),
+        "cross_session_responses": mismatches,
+        "anonymous_client_sub": anon_sub,
+        "client_create_ms_median": round(create_ms[len(create_ms) // 2], 2),
+        "elapsed_s": round(elapsed, 2)
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if mismatches:
+        failures.append(f"{mismatches} responses were authorized as another session's user")
+    if anon_sub != "anon":
+        failures.append("anonymous client picked up a user's JWT")
+    if server.max_open_connections > SUPABASE_POOL_MAX_CONNECTIONS:
+        failures.append("more open connections than the pool allows")
+    if server.connections * 2 > server.requests:
+        failures.append("connections are not being reused")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
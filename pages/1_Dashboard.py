@@ -7,15 +7,18 @@ root_path = Path(__file__).parent.parent
 sys.path.append(str(root_path))
 
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from src.auth import get_current_user
 from src.db import get_user_role, get_dashboard_stats
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun
+from src.loaders import load_job_options, load_stage_analytics
+from src.constants import STAGES, PIPELINE_STAGES
 
 st.set_page_config(page_title="Dashboard", page_icon="📊", layout="wide")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("dashboard")
 
 user = get_current_user()
 if not user:
@@ -27,6 +30,39 @@ if role == 'candidate':
     st.error("Access Denied. Please use the Candidate Portal.")
     st.stop()
 
+# --- Figures ---
+# Counter figures depend only on the trigger-maintained counters, which are the same
+# for every staff user: build each one once per counter version, shared by all sessions.
+
+def _funnel_figure(values):
+    fig = go.Figure(go.Funnel(
+        y=PIPELINE_STAGES,
+        x=list(values),
+        textinfo="value+percent initial"
+    ))
+    fig.update_layout(margin=dict(t=0, b=0, l=0, r=0), height=300)
+    return fig
+
+def _per_job_figure(rows):
+    titles = list(dict.fromkeys(r["title"] for r in rows))
+    counts = {(r["title"], r["stage"]): r["applications"] for r in rows}
+    fig = go.Figure([
+        go.Bar(name=stage, y=titles, x=[counts.get((t, stage), 0) for t in titles], orientation="h")
+        for stage in STAGES
+    ])
+    fig.update_layout(barmode="stack", margin=dict(t=0, b=0, l=0, r=0), height=max(200, 40 * len(titles) + 80))
+    return fig
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _cached_figure(kind: str, version: int, _build, _data):
+    return _build(_data)
+
+def counter_figure(kind: str, version, build, data):
+    if version is None:
+        # Counted without the counter tables: nothing to key a cache by
+        return build(data)
+    return _cached_figure(kind, version, build, data)
+
 st.title("📊 Recruitment Command Center")
 st.markdown("Overview of your hiring pipeline.")
 st.divider()
@@ -56,18 +92,8 @@ with col_left:
     st.subheader("Candidate Pipeline")
     # Funnel Chart
     funnel_data = stats["funnel"]
-    stages_ordered = ["new", "screened", "interview", "offer", "hired"] # Exclude rejected for funnel flow usually? Or include.
-    
-    # Let's filter out 0s for cleaner chart if desired, or keep to show dropoff
-    values = [funnel_data.get(s, 0) for s in stages_ordered]
-    
-    fig = go.Figure(go.Funnel(
-        y=stages_ordered,
-        x=values,
-        textinfo="value+percent initial"
-    ))
-    fig.update_layout(margin=dict(t=0, b=0, l=0, r=0), height=300)
-    st.plotly_chart(fig, use_container_width=True)
+    values = tuple(funnel_data.get(s, 0) for s in PIPELINE_STAGES)
+    st.plotly_chart(counter_figure("funnel", stats["version"], _funnel_figure, values), use_container_width=True)
 
 with col_right:
     st.subheader("Action Needed")
@@ -81,6 +107,76 @@ with col_right:
     with st.expander("Show Rejected Count"):
         st.write(f"{funnel_data.get('rejected', 0)} Rejected")
 
+# --- Pipeline by Job (open jobs, from the per-job counters) ---
+open_job_rows = [r for r in stats.get("per_job", []) if r.get("status") == "open"]
+if open_job_rows:
+    st.subheader("Pipeline by Job")
+    st.plotly_chart(
+        counter_figure("per_job", stats["version"], _per_job_figure, open_job_rows),
+        use_container_width=True
+    )
+
+# --- Pipeline Flow (aggregated server-side from stage history) ---
+st.subheader("Pipeline Flow")
+f1, f2 = st.columns([3, 1])
+job_opts = {"All jobs": None}
+job_opts.update({j["title"]: j["id"] for j in load_job_options()})
+with f1:
+    flow_job = job_opts[st.selectbox("Job", list(job_opts.keys()), key="flow_job")]
+with f2:
+    stuck_days = st.number_input("Stuck after (days)", min_value=1, max_value=180, value=14, key="stuck_days")
+
+flow = load_stage_analytics(flow_job, int(stuck_days))
+if flow["time_in_stage"] is None:
+    st.caption("Stage history unavailable (run sql/stage_history_migration.sql).")
+else:
+    t_col, w_col = st.columns(2)
+    with t_col:
+        st.markdown("**Time in stage** (last 90 days)")
+        rows = [r for r in flow["time_in_stage"] if r["stage"] not in ("hired", "rejected")]
+        if rows:
+            fig = go.Figure([
+                go.Bar(name="Median", x=[r["stage"] for r in rows], y=[(r["p50_hours"] or 0) / 24 for r in rows]),
+                go.Bar(name="P90", x=[r["stage"] for r in rows], y=[(r["p90_hours"] or 0) / 24 for r in rows])
+            ])
+            fig.update_layout(barmode="group", yaxis_title="days", margin=dict(t=0, b=0, l=0, r=0), height=280)
+            st.plotly_chart(fig, use_container_width=True)
+            st.dataframe(pd.DataFrame([{
+                "Stage": r["stage"],
+                "Completed": r["completed"],
+                "In stage now": r["in_stage_now"],
+                "Median (days)": round((r["p50_hours"] or 0) / 24, 1),
+                "P90 (days)": round((r["p90_hours"] or 0) / 24, 1)
+            } for r in rows]), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No stage changes recorded yet.")
+    with w_col:
+        st.markdown("**Weekly flow** (applications entering each stage)")
+        weekly = flow["weekly_flow"] or []
+        if weekly:
+            weeks = sorted({r["week"] for r in weekly})
+            entered = {(r["week"], r["stage"]): r["entered"] for r in weekly}
+            fig = go.Figure([
+                go.Bar(name=stage, x=weeks, y=[entered.get((w, stage), 0) for w in weeks])
+                for stage in STAGES
+            ])
+            fig.update_layout(barmode="stack", margin=dict(t=0, b=0, l=0, r=0), height=280)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.caption("No activity in the last 12 weeks.")
+
+    stuck = flow["stuck"] or []
+    with st.expander(f"⏳ Stuck candidates ({len(stuck)}{'+' if len(stuck) >= 50 else ''})", expanded=bool(stuck)):
+        if stuck:
+            st.dataframe(pd.DataFrame([{
+                "Candidate": r["candidate_name"],
+                "Job": r["job_title"],
+                "Stage": r["stage"].upper(),
+                "Days in stage": int(r["days_in_stage"])
+            } for r in stuck]), use_container_width=True, hide_index=True)
+        else:
+            st.caption(f"Nobody has been in the same stage for {stuck_days}+ days.")
+
 # --- Recent Activity ---
 st.subheader("Recent Applications")
 recent = stats.get("recent_activity", [])
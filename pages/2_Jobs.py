@@ -8,16 +8,19 @@ root_path = Path(__file__).parent.parent
 sys.path.append(str(root_path))
 import json
 from src.auth import get_current_user
-from src.db import create_job, get_jobs, get_user_role
+from src.db import create_job, get_jobs, get_user_role, count_stale_applications
+from src.rescoring import rescore_stale, flag_config_staleness
 from src.llm import parse_job_description
-import pandas as pd
-from src.constants import DEFAULT_INTERVIEW_STAGES
-from src.utils import extract_text_from_file
+from src.constants import DEFAULT_INTERVIEW_STAGES, RESCORE_MAX_CALLS, UPLOAD_EXTENSIONS, EVAL_CASCADE_ENABLED
+from src.uploads import open_upload, UploadRejected
+from src import session_store
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun
 
 st.set_page_config(page_title="Jobs", page_icon="💼")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("jobs")
 
 user = get_current_user()
 if not user:
@@ -41,17 +44,20 @@ if not role:
 with st.expander("➕ Create New Job", expanded=False):
     st.subheader("Step 1: Upload or Paste JD")
     
-    jd_file = st.file_uploader("Upload Job Description (PDF/DOCX/TXT)", type=["pdf", "docx", "txt"])
+    jd_file = st.file_uploader("Upload Job Description (PDF/DOCX/ODT/RTF/HTML/TXT)", type=UPLOAD_EXTENSIONS)
     jd_text_input = st.text_area("Or Paste Job Description Text", height=200)
     
-    # State for parsed data
-    if "parsed_job" not in st.session_state:
-        st.session_state["parsed_job"] = None
-
+    # Parsed data and the full JD text live in the session store (session_state keeps references)
     if st.button("✨ Parse with AI"):
         text_to_parse = ""
         if jd_file:
-            text_to_parse = extract_text_from_file(jd_file, jd_file.name)
+            # Checked before parsing: oversized or non-document files never reach the LLM
+            try:
+                with open_upload(jd_file, jd_file.name) as upload:
+                    text_to_parse = upload.text()
+            except UploadRejected as e:
+                st.error(f"Upload rejected: {e}")
+                st.stop()
         elif jd_text_input:
             text_to_parse = jd_text_input
             
@@ -59,8 +65,8 @@ with st.expander("➕ Create New Job", expanded=False):
             with st.spinner("Analyzing Job Description..."):
                 parsed = parse_job_description(text_to_parse)
                 if parsed:
-                    st.session_state["parsed_job"] = parsed
-                    st.session_state["jd_text_full"] = text_to_parse
+                    session_store.put("parsed_job", parsed)
+                    session_store.put("jd_text_full", text_to_parse)
                     st.success("Parsed successfully!")
                 else:
                     st.error("AI could not parse the format.")
@@ -73,7 +79,7 @@ with st.expander("➕ Create New Job", expanded=False):
     # Form
     with st.form("create_job_form"):
         # Pre-fill if parsed
-        parsed_data = st.session_state.get("parsed_job")
+        parsed_data = session_store.get("parsed_job")
         
         title = st.text_input("Job Title", value=parsed_data.title if parsed_data else "")
         team = st.text_input("Team", value=parsed_data.team if parsed_data else "")
@@ -111,7 +117,7 @@ with st.expander("➕ Create New Job", expanded=False):
                 except:
                     stages_json = DEFAULT_INTERVIEW_STAGES
                 
-                final_jd_text = st.session_state.get("jd_text_full", jd_text_input or "")
+                final_jd_text = session_store.get("jd_text_full", jd_text_input or "")
                 
                 new_job = {
                     "created_by": user.id,
@@ -133,7 +139,8 @@ with st.expander("➕ Create New Job", expanded=False):
                 if res:
                     st.success(f"Job '{title}' created!")
                     # Clear state
-                    st.session_state["parsed_job"] = None
+                    session_store.drop("parsed_job")
+                    session_store.drop("jd_text_full")
                     st.rerun()
                 else:
                     st.error("Failed to save job.")
@@ -160,3 +167,42 @@ if jobs_list:
     st.dataframe(display_data, use_container_width=True)
 else:
     st.info("No jobs found.")
+
+# --- Stale Evaluations ---
+if role in ("admin", "recruiter"):
+    # Model / prompt bumps only show up once flagged
+    flag_config_staleness()
+    stale_count = count_stale_applications()
+    if stale_count:
+        with st.expander(f"♻️ {stale_count} evaluation(s) out of date", expanded=False):
+            st.caption(
+                "Scores whose job description, resume, prompt or model changed since they were evaluated. "
+                "Re-scoring goes highest current score first and stops at the budget; "
+                "unchanged inputs are settled without an LLM call."
+            )
+            b1, b2 = st.columns(2)
+            # An evaluation may take two calls (fast model + escalation), and the budget
+            # is checked against that worst case
+            max_calls = b1.number_input(
+                "Max LLM calls", min_value=2 if EVAL_CASCADE_ENABLED else 1, max_value=500, value=RESCORE_MAX_CALLS
+            )
+            max_cost = b2.number_input("Max estimated cost (USD, 0 = no limit)", min_value=0.0, value=0.0, step=0.5)
+            c1, c2 = st.columns(2)
+            dry_run = c1.button("Estimate")
+            run_now = c2.button("Re-score now", type="primary")
+            if dry_run or run_now:
+                progress = st.empty()
+                with st.spinner("Re-scoring..." if run_now else "Estimating..."):
+                    report = rescore_stale(
+                        max_calls=int(max_calls),
+                        max_cost_usd=max_cost or None,
+                        actor_id=user.id,
+                        dry_run=dry_run,
+                        on_progress=lambda r: progress.caption(f"{r['reevaluated']} re-evaluated, {r['failed']} failed")
+                    )
+                verb = "Would re-evaluate" if dry_run else "Re-evaluated"
+                st.success(
+                    f"{verb} {report['reevaluated']} (≈ ${report['estimated_cost_usd']:.2f}); "
+                    f"{report['reused']} reused a stored result, {report['unchanged']} unchanged, "
+                    f"{report['failed']} failed. {report['remaining']} still stale."
+                )
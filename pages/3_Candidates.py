@@ -9,11 +9,15 @@ sys.path.append(str(root_path))
 import pandas as pd
 from src.auth import get_current_user
 from src.db import get_jobs, get_candidates_for_job, get_user_role
+from src.constants import OUTREACH_COMPANY_NAME
+from src.outreach import bulk_outreach
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun
 
 st.set_page_config(page_title="Candidates", page_icon="👥")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("candidates")
 
 user = get_current_user()
 if not user:
@@ -38,9 +42,13 @@ if not jobs:
 job_options = {j["title"]: j["id"] for j in jobs}
 selected_job_title = st.selectbox("Select Job", list(job_options.keys()))
 selected_job_id = job_options[selected_job_title]
+selected_job = next(j for j in jobs if j["id"] == selected_job_id)
 
-# Fetch Candidates
-candidates = get_candidates_for_job(selected_job_id)
+# Fetch Candidates (applications of long-closed jobs are archived)
+include_archived = False
+if selected_job.get("status") == "closed":
+    include_archived = st.checkbox("Include archived applications")
+candidates = get_candidates_for_job(selected_job_id, include_archived=include_archived)
 
 st.divider()
 
@@ -96,3 +104,64 @@ else:
     )
     
     st.caption("Copy 'Candidate ID' to view details in the Detail page (Navigation limitation of Streamlit MP without query params fully utilized).")
+
+    # --- Bulk Outreach ---
+    if role in ("admin", "recruiter"):
+        st.divider()
+        st.subheader("✉️ Bulk Outreach")
+        st.caption(
+            "Emails are filled in from a few AI templates per job and tone. "
+            "Tick 'Deep' for candidates who should get an individually written email (one AI call each)."
+        )
+        outreach_df = filtered_df[["Candidate Name", "Email", "Stage", "Match Score", "Application ID"]].copy()
+        outreach_df.insert(0, "Deep", False)
+        outreach_df.insert(0, "Send", True)
+        edited = st.data_editor(
+            outreach_df,
+            column_config={
+                "Send": st.column_config.CheckboxColumn("Send"),
+                "Deep": st.column_config.CheckboxColumn("Deep", help="Personalize with an individual AI call"),
+                "Application ID": None
+            },
+            disabled=["Candidate Name", "Email", "Stage", "Match Score"],
+            hide_index=True,
+            use_container_width=True,
+            key=f"outreach_editor_{selected_job_id}"
+        )
+        selected_ids = set(edited.loc[edited["Send"], "Application ID"])
+        deep_ids = set(edited.loc[edited["Send"] & edited["Deep"], "Application ID"])
+
+        col1, col2 = st.columns([2, 1])
+        tone = col1.select_slider("Tone", options=["friendly", "formal", "concise"], key="bulk_outreach_tone")
+        if col2.button(f"Generate {len(selected_ids)} Email(s)", disabled=not selected_ids):
+            with st.spinner("Writing templates and personalizing..."):
+                st.session_state["bulk_outreach"] = bulk_outreach(
+                    selected_job,
+                    [c for c in candidates if c["id"] in selected_ids],
+                    tone,
+                    OUTREACH_COMPANY_NAME,
+                    deep_ids=deep_ids
+                )
+
+        report = st.session_state.get("bulk_outreach")
+        if report is not None:
+            if not report["messages"]:
+                st.error("Could not generate outreach templates.")
+            else:
+                st.caption(
+                    f"{len(report['messages'])} email(s) from {report['templates']} template(s); "
+                    f"{report['llm_calls']} individually written"
+                    + (f", {report['fallbacks']} fell back to a template" if report["fallbacks"] else "")
+                )
+                messages_df = pd.DataFrame(report["messages"])
+                st.dataframe(
+                    messages_df[["full_name", "email", "source", "subject", "body"]],
+                    use_container_width=True,
+                    hide_index=True
+                )
+                st.download_button(
+                    "Download CSV",
+                    messages_df.to_csv(index=False).encode("utf-8"),
+                    file_name=f"outreach_{selected_job_id}.csv",
+                    mime="text/csv"
+                )
@@ -7,52 +7,99 @@ root_path = Path(__file__).parent.parent
 sys.path.append(str(root_path))
 
 import json
-import pandas as pd
 from src.auth import get_current_user
 from src.db import (
-    get_jobs, 
-    get_candidates_for_job, 
-    get_application_details,
-    update_application_evaluation,
     update_application_stage,
-    add_note,
-    get_notes,
-    get_user_role,
     create_candidate,
-    create_application
+    create_application,
+    get_candidate_by_resume_hash
 )
-from src.llm import evaluate_candidate, generate_outreach, parse_resume
-from src.utils import extract_text_from_file
+from src.metrics import begin_rerun, render_rerun_stats
+from src.constants import OUTREACH_COMPANY_NAME, UPLOAD_EXTENSIONS
+from src.loaders import (
+    load_user_role,
+    load_job_options,
+    load_application_options,
+    load_application,
+    invalidate_application
+)
+from src.llm import generate_outreach
+from src.resume_parser import parse_resume
+from src.evaluations import latest_evaluation, is_current, run_evaluation
+from src.screening import analyze_transcript
+from src.uploads import open_upload, UploadRejected
+from src.storage import store_resume, discard_resume, get_resume_url, iter_resume
+from src.identity import (
+    build_identity,
+    resolve_candidate,
+    identity_columns,
+    index_candidate,
+    normalize_email,
+    normalize_phone
+)
+from src.notes import get_thread, load_older, refresh, post_note, author_names
 from src.ui import apply_custom_css, display_theme_toggle
 
 st.set_page_config(page_title="Candidate Detail", page_icon="🧑‍💼", layout="wide")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("candidate_detail")
 
 user = get_current_user()
 if not user:
     st.warning("Please log in.")
     st.stop()
 
-from src.db import get_user_role
-role = get_user_role(user.id)
+role = load_user_role(user.id)
 if role == 'candidate':
     st.error("Access Denied. Please use the Candidate Portal.")
     st.stop()
     
+@st.fragment
+def render_notes(app_id: str, archived: bool = False):
+    """Notes tab. A fragment, so posting or paging reruns only this tab, not the whole page."""
+    st.header("Team Notes")
+    with st.form(f"note_form_{app_id}", clear_on_submit=True):
+        new_note = st.text_area("Add a note...")
+        posted = st.form_submit_button("Post Note")
+    if posted and new_note.strip():
+        if post_note(app_id, user.id, new_note.strip(), include_archived=archived):
+            st.toast("Posted!")
+
+    thread = get_thread(app_id, include_archived=archived)
+    if thread is None:
+        return
+    if st.button("🔄 Check for new notes", key=f"notes_refresh_{app_id}"):
+        added = refresh(app_id)
+        st.toast(f"{added} new note(s)" if added else "No new notes")
+
+    names = author_names()
+    for n in thread["notes"]:
+        st.markdown(f"**{names.get(n['author_id']) or 'Unknown'}** ({n['created_at']})")
+        st.write(n['note'])
+        st.divider()
+    if not thread["notes"]:
+        st.caption("No notes yet.")
+    if thread["older_cursor"]:
+        # on_click runs before the fragment reruns, so the older page renders in that run
+        st.button("Show older notes", key=f"notes_older_{app_id}", on_click=load_older, args=(app_id,))
+
 # --- Sidebar Selection ---
 st.sidebar.header("Select Candidate")
-role = get_user_role(user.id)
-jobs = get_jobs(role or "recruiter", user.id)
+jobs = load_job_options()
 job_map = {j["title"]: j["id"] for j in jobs}
 
 selected_job_title = st.sidebar.selectbox("1. Select Job", list(job_map.keys()) if jobs else [])
+include_archived = st.sidebar.checkbox("Include archived", help="Applications of jobs closed long ago are archived.")
 
 selected_app_id = None
 if selected_job_title:
     job_id = job_map[selected_job_title]
-    candidates = get_candidates_for_job(job_id)
-    cand_map = {f"{c['candidates']['full_name']} ({c['overall_score'] or 'N/A'})": c['id'] for c in candidates}
+    candidates = load_application_options(job_id, include_archived)
+    cand_map = {
+        f"{c['candidates']['full_name']} ({c['overall_score'] or 'N/A'}){' 🗄️' if c.get('archived') else ''}": c['id']
+        for c in candidates
+    }
     
     # helper for creating new
     cand_map["+ Add New Candidate"] = "NEW"
@@ -65,45 +112,90 @@ if selected_job_title:
 
 if selected_app_id == "NEW":
     st.header("📥 Add New Candidate")
-    uploaded_resume = st.file_uploader("Upload Resume (PDF/DOCX)", type=["pdf", "docx", "txt"])
+    uploaded_resume = st.file_uploader("Upload Resume", type=UPLOAD_EXTENSIONS)
     
     if uploaded_resume:
         if st.button("Parse & Add"):
             with st.spinner("Parsing Resume..."):
-                text = extract_text_from_file(uploaded_resume, uploaded_resume.name)
-                cand_parsed = parse_resume(text)
-                
-                if cand_parsed:
-                    # Save Candidate
-                    # Assume job_id is selected from sidebar
-                    c_data = cand_parsed.dict()
-                    c_data["resume_text"] = text
-                    c_data["created_by"] = user.id
-                    
-                    # Insert Candidate
-                    new_cand = create_candidate(c_data)
-                    if new_cand:
-                        # Create Application
-                        app_data = {
-                            "job_id": job_id,
-                            "candidate_id": new_cand["id"],
-                            "stage": "new"
-                        }
-                        new_app = create_application(app_data)
-                        if new_app:
-                            st.success("Candidate added successfully! Refreshing...")
-                            st.session_state["selected_app_id"] = new_app["id"] # Try to persist selection?
-                            st.rerun()
+                try:
+                    upload = open_upload(uploaded_resume, uploaded_resume.name)
+                except UploadRejected as e:
+                    st.error(f"Upload rejected: {e}")
+                    st.stop()
+
+                with upload:
+                    # Keep the original file; identical files are stored once
+                    stored = store_resume(upload.file, uploaded_resume.name, upload.content_type)
+                    existing = get_candidate_by_resume_hash(stored["sha256"]) if stored else None
+
+                    candidate_id = None
+                    if existing:
+                        # Same resume already parsed: link this application, skip extraction + LLM
+                        st.info(f"This resume is already on file for **{existing['full_name']}**. Linking the application.")
+                        candidate_id = existing["id"]
+                    else:
+                        try:
+                            text = upload.text()
+                        except UploadRejected as e:
+                            discard_resume(stored)
+                            st.error(f"Upload rejected: {e}")
+                            st.stop()
+                        # Same person under another file? (email/phone keys, then MinHash over the text)
+                        identity = build_identity(text)
+                        match = resolve_candidate(identity)
+                        if match:
+                            st.info(f"Matched an existing candidate by {match['reason'].replace('_', ' ')} "
+                                    f"(similarity {match['similarity']:.0%}). Linking the application.")
+                            candidate_id = match["candidate_id"]
+                            # The matched candidate keeps its own resume; don't leave this copy orphaned
+                            discard_resume(stored)
                         else:
-                            st.error("Failed to create application.")
+                            cand_parsed = parse_resume(text)
+                    
+                            if cand_parsed:
+                                # Save Candidate
+                                # Assume job_id is selected from sidebar
+                                c_data = cand_parsed.dict()
+                                c_data["resume_text"] = text
+                                c_data["created_by"] = user.id
+                                if stored:
+                                    c_data["resume_file_path"] = stored["path"]
+                                    c_data["resume_sha256"] = stored["sha256"]
+                                identity["email_key"] = normalize_email(cand_parsed.email) or identity["email_key"]
+                                identity["phone_key"] = normalize_phone(cand_parsed.phone) or identity["phone_key"]
+                                c_data.update(identity_columns(identity))
+                        
+                                # Insert Candidate
+                                new_cand = create_candidate(c_data)
+                                if new_cand:
+                                    candidate_id = new_cand["id"]
+                                    index_candidate(candidate_id, identity)
+                                else:
+                                    discard_resume(stored)
+                                    st.error("Failed to create candidate record.")
+                            else:
+                                discard_resume(stored)
+                                st.error("Failed to parse resume.")
+
+                if candidate_id:
+                    # Create Application
+                    app_data = {
+                        "job_id": job_id,
+                        "candidate_id": candidate_id,
+                        "stage": "new"
+                    }
+                    new_app = create_application(app_data)
+                    if new_app:
+                        invalidate_application(new_app["id"], job_id)
+                        st.success("Candidate added successfully! Refreshing...")
+                        st.session_state["selected_app_id"] = new_app["id"] # Try to persist selection?
+                        st.rerun()
                     else:
-                        st.error("Failed to create candidate record.")
-                else:
-                    st.error("Failed to parse resume.")
+                        st.error("Failed to create application.")
 
 elif selected_app_id:
-    # Load Data
-    app_details = get_application_details(selected_app_id)
+    # Load Data (application, job and candidate in one query, memoized per version)
+    app_details = load_application(selected_app_id)
     if not app_details:
         st.error("Could not load application.")
         st.stop()
@@ -113,12 +205,16 @@ elif selected_app_id:
     
     st.title(f"{candidate['full_name']}")
     st.caption(f"Applied for: **{job['title']}** | Stage: **{app_details['stage'].upper()}** | Score: **{app_details['overall_score'] or 'N/A'}**")
+    archived = app_details.get("archived", False)
+    if archived:
+        st.info("🗄️ Archived: this job has been closed for a while. Reopening the job restores its applications.")
     
     # Stage Mover
     new_stage = st.selectbox("Update Stage", ["new", "screened", "interview", "offer", "hired", "rejected"], 
                              index=["new", "screened", "interview", "offer", "hired", "rejected"].index(app_details['stage']))
     if new_stage != app_details['stage']:
         if update_application_stage(selected_app_id, new_stage):
+            invalidate_application(selected_app_id)
             st.success(f"Moved to {new_stage}")
             st.rerun()
 
@@ -140,95 +236,144 @@ elif selected_app_id:
             links = candidate.get("links") or {}
             for k, v in links.items():
                 st.markdown(f"[{k}]({v})")
+
+            resume_path = candidate.get("resume_file_path")
+            if resume_path:
+                st.subheader("Original Resume")
+                # Signed URL: the browser downloads straight from storage, not via Streamlit
+                url = get_resume_url(resume_path)
+                if url:
+                    st.link_button("📎 Open Original", url)
+                else:
+                    # Local storage stand-in (dev): read only when the button is clicked
+                    st.download_button(
+                        "📎 Download Original", lambda: b"".join(iter_resume(resume_path)),
+                        file_name=resume_path.split("/")[-1]
+                    )
     
     with tab2:
         st.header("AI Match Evaluation")
-        
-        if not app_details.get("ai_summary"):
-            st.info("Not evaluated yet.")
-            if st.button("✨ Run Evaluation"):
-                with st.spinner("Evaluator Bot is reading..."):
-                    # construct job and cand json
-                    # We might need to parse JD text again or rely on stored fields
-                    # We have job struct in DB, let's use that
-                    eval_res = evaluate_candidate(job, candidate, candidate.get("resume_text", ""))
-                    
-                    if eval_res:
-                        # Save
-                        update_data = {
-                            "overall_score": eval_res.overall_score,
-                            "score_breakdown": eval_res.score_breakdown.dict(),
-                            "ai_summary": eval_res.ai_summary,
-                            "risk_flags": eval_res.risk_flags
-                            # We could store strengths/questions in a separate JSONB col if schema supported, 
-                            # or append to ai_summary. Schema has score_breakdown (jsonb) and ai_summary (text).
-                            # Let's verify Schema.
-                            # schema.sql: overall_score, score_breakdown, ai_summary, risk_flags
-                            # We'll stick to that. strengths/concerns can go into 'score_breakdown' or we assume we append to summary.
-                        }
-                        update_application_evaluation(selected_app_id, update_data)
-                        st.success("Evaluation Complete!")
-                        st.rerun()
-                    else:
-                        st.error("Evaluation failed.")
-        else:
-            # Display Evaluation
-            score = app_details.get("overall_score")
-            st.metric("Overall Match Score", f"{score}/100")
-            
-            # Breakdown
-            breakdown = app_details.get("score_breakdown")
-            if breakdown:
-                st.json(breakdown)
-                
+        evaluation = latest_evaluation(app_details)
+        current = is_current(evaluation, job, candidate)
+
+        if evaluation:
+            result = evaluation["result"]
+            st.metric("Overall Match Score", f"{result['overall_score']}/100")
+            st.caption(
+                f"Evaluated {evaluation['created_at'].split('T')[0]} · job v{evaluation['job_version']} · "
+                f"{evaluation['model']}"
+            )
+            if result.get("score_breakdown"):
+                st.json(result["score_breakdown"])
+
             st.subheader("Summary")
-            st.write(app_details.get("ai_summary"))
-            
-            st.subheader("Risk Flags")
-            flags = app_details.get("risk_flags")
-            if flags:
+            st.write(result.get("ai_summary"))
+
+            c_left, c_right = st.columns(2)
+            with c_left:
+                st.subheader("Strengths")
+                for item in result.get("strengths") or []:
+                    st.markdown(f"- ✅ {item}")
+                st.subheader("Missing Must-Haves")
+                missing = result.get("missing_must_haves") or []
+                for item in missing:
+                    st.markdown(f"- ❌ {item}")
+                if not missing:
+                    st.caption("None.")
+            with c_right:
+                st.subheader("Concerns")
+                for item in result.get("concerns") or []:
+                    st.markdown(f"- ⚠️ {item}")
+                st.subheader("Risk Flags")
+                flags = result.get("risk_flags") or []
                 for f in flags:
                     st.error(f"🚩 {f}")
-            else:
-                st.success("No major risk flags detected.")
+                if not flags:
+                    st.success("No major risk flags detected.")
 
-            if st.button("🔄 Re-run Evaluation"):
-                 # Duplicate logic, simplified
-                 pass
+            st.subheader("Suggested Interview Questions")
+            for i, q in enumerate(result.get("suggested_interview_questions") or [], 1):
+                st.markdown(f"{i}. {q}")
+        elif app_details.get("ai_summary"):
+            # Evaluated before full results were stored: only the summary columns exist
+            st.metric("Overall Match Score", f"{app_details.get('overall_score')}/100")
+            if app_details.get("score_breakdown"):
+                st.json(app_details["score_breakdown"])
+            st.subheader("Summary")
+            st.write(app_details.get("ai_summary"))
+            for f in app_details.get("risk_flags") or []:
+                st.error(f"🚩 {f}")
+            st.info("Strengths, concerns and interview questions weren't stored for this evaluation.")
+        else:
+            st.info("Not evaluated yet.")
+
+        if evaluation and current:
+            st.caption("✔️ Up to date with the current job description and resume.")
+        else:
+            if evaluation:
+                st.warning("The job description, resume or model changed since this evaluation.")
+            label = "🔄 Re-run Evaluation" if (evaluation or app_details.get("ai_summary")) else "✨ Run Evaluation"
+            if st.button(label):
+                with st.spinner("Evaluator Bot is reading..."):
+                    saved = run_evaluation(selected_app_id, job, candidate, actor_id=user.id)
+                if saved:
+                    invalidate_application(selected_app_id, job_id)
+                    st.success("Evaluation Complete!")
+                    st.rerun()
+                else:
+                    st.error("Evaluation failed.")
 
     with tab3:
         st.header("Generate Outreach")
         tone = st.select_slider("Tone", options=["friendly", "formal", "concise"])
         if st.button("Wait, Write Email"):
-            outreach = generate_outreach(candidate.get("full_name").split(" ")[0], job.get("title"), "Acme Corp", tone) # Company name hardcoded for demo or add to settings
+            outreach = generate_outreach(candidate.get("full_name").split(" ")[0], job.get("title"), OUTREACH_COMPANY_NAME, tone)
             if outreach:
                 st.text_input("Subject", value=outreach.subject)
                 st.text_area("Body", value=outreach.body, height=300)
     
     with tab4:
-        st.header("Screening Interview (Simulated)")
-        # Simple chat interface stored in session state momentarily (or Notes?)
-        # For simplicity, we just have a text area for Q&A history and a "Summarize" button
-        
-        qa_history = st.text_area("Paste Interview Transcript / Q&A", height=300)
+        st.header("Screening Interview")
+        # Long transcripts are chunked and summarized piecewise; chunk summaries are
+        # cached, so re-analyzing after appending more of the interview only
+        # summarizes the new part.
+        qa_history = st.text_area("Paste Interview Transcript / Q&A", height=300, key=f"screening_transcript_{selected_app_id}")
+        analysis_key = f"screening_analysis_{selected_app_id}"
         if st.button("Analyze Screening"):
-            # Call llm summarize
-            st.info("Feature placeholder: LLM analyzes text and updates score.")
+            with st.spinner("Analyzing transcript..."):
+                st.session_state[analysis_key] = analyze_transcript(qa_history)
+
+        analysis = st.session_state.get(analysis_key)
+        if analysis:
+            screening = analysis["result"]
+            st.caption(
+                f"{analysis['chunks']} chunk(s): {analysis['processed']} summarized, "
+                f"{analysis['cached']} reused from earlier analyses"
+            )
+            if screening is None:
+                st.error("Screening analysis failed." if analysis["chunks"] else "Transcript is empty.")
+            else:
+                st.subheader("Summary")
+                st.write(screening.summary)
+                st.subheader("Rubric Notes")
+                st.write(screening.updated_rubric_notes)
+                st.info(f"Recommended next stage: **{screening.recommended_stage}**")
+
+                col1, col2 = st.columns(2)
+                if screening.recommended_stage != app_details["stage"]:
+                    if col1.button(f"Move to {screening.recommended_stage}"):
+                        if update_application_stage(selected_app_id, screening.recommended_stage):
+                            invalidate_application(selected_app_id, job_id)
+                            st.rerun()
+                if col2.button("Save as Note"):
+                    note = f"Screening summary: {screening.summary}\n\nRubric notes: {screening.updated_rubric_notes}"
+                    if post_note(selected_app_id, user.id, note, include_archived=archived):
+                        st.toast("Saved to notes")
             
     with tab5:
-        st.header("Team Notes")
-        new_note = st.text_area("Add a note...")
-        if st.button("Post Note"):
-            if new_note:
-                add_note(selected_app_id, user.id, new_note)
-                st.success("Posted!")
-                st.rerun()
-        
-        notes = get_notes(selected_app_id)
-        for n in notes:
-            st.markdown(f"**{n['profiles']['full_name']}** ({n['created_at']})")
-            st.write(n['note'])
-            st.divider()
+        render_notes(selected_app_id, archived)
 
 else:
     st.info("Select a job and candidate from the sidebar.")
+
+render_rerun_stats()
@@ -7,13 +7,30 @@ root_path = Path(__file__).parent.parent
 sys.path.append(str(root_path))
 
 import pandas as pd
+from datetime import timedelta
 from src.auth import get_current_user
-from src.db import get_user_role, get_audit_logs, get_all_users, update_user_role
+from src.db import (
+    get_user_role,
+    get_audit_logs,
+    search_users,
+    get_role_counts,
+    bulk_update_user_roles,
+    check_dashboard_counters,
+    archive_closed_jobs
+)
+from src.loaders import load_llm_calls
+from src.llm_scheduler import get_scheduler_stats
+from src.resume_parser import get_parser_stats
+from src.audit import AUDIT_ACTIONS, AUDIT_ENTITY_TYPES, flush_audit_log, get_audit_writer_stats
+from src.constants import AUDIT_PAGE_SIZE, USER_PAGE_SIZE, SESSION_MEMORY_BUDGET_BYTES, ARCHIVE_AFTER_CLOSED_DAYS
+from src.session_store import get_session_footprints, get_store_stats, prune_store, track_session
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun, get_metrics_snapshot, reset_metrics, export_json, export_prometheus
 
 st.set_page_config(page_title="Admin Console", page_icon="🛡️")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("admin")
 
 user = get_current_user()
 if not user:
@@ -28,40 +45,313 @@ if current_role != 'admin':
 
 st.title("🛡️ Admin Console")
 
-tab1, tab2 = st.tabs(["👥 User Management", "📜 Audit Logs"])
+tab1, tab2, tab3, tab4, tab5 = st.tabs(["👥 User Management", "📜 Audit Logs", "⚡ Performance", "🧠 LLM Usage", "🧮 Sessions"])
 
 with tab1:
     st.header("Manage Users")
-    users = get_all_users()
-    if users:
-        # editable data editor? or just list
-        for u in users:
-            with st.expander(f"{u.get('full_name') or u.get('id')} ({u['role']})"):
-                st.write(f"ID: {u['id']}")
-                st.write(f"Current Role: **{u['role']}**")
-                
-                new_role = st.selectbox("Change Role", ["admin", "recruiter", "manager", "candidate"], index=["admin", "recruiter", "manager", "candidate"].index(u['role']), key=f"role_{u['id']}")
-                if new_role != u['role']:
-                    if st.button("Update Role", key=f"btn_{u['id']}"):
-                        if update_user_role(u['id'], new_role):
-                            st.success("Role Updated!")
-                            st.rerun()
-    else:
+    ROLES = ["admin", "recruiter", "manager", "candidate"]
+
+    counts = get_role_counts()
+    count_cols = st.columns(len(ROLES) + 1)
+    count_cols[0].metric("Total", sum(counts.values()))
+    for col, r in zip(count_cols[1:], ROLES):
+        col.metric(r.capitalize(), counts.get(r, 0))
+
+    s1, s2 = st.columns([3, 1])
+    search = s1.text_input("Search by name", key="user_search").strip()
+    role_filter = s2.selectbox("Role", ["All"] + ROLES, key="user_role_filter")
+    user_filters = (search, role_filter)
+    if st.session_state.get("user_dir_filters") != user_filters:
+        st.session_state["user_dir_filters"] = user_filters
+        st.session_state["user_dir_page"] = 0
+    page_no = st.session_state.get("user_dir_page", 0)
+
+    result = search_users(search or None, None if role_filter == "All" else role_filter,
+                          page=page_no, page_size=USER_PAGE_SIZE)
+    if result and result["rows"]:
+        users_df = pd.DataFrame([{
+            "id": u["id"],
+            "Name": u.get("full_name") or "—",
+            "Role": u["role"],
+            "Joined": (u.get("created_at") or "").split("T")[0]
+        } for u in result["rows"]])
+        edited = st.data_editor(
+            users_df,
+            key=f"user_grid_{page_no}_{search}_{role_filter}",
+            hide_index=True,
+            use_container_width=True,
+            disabled=["id", "Name", "Joined"],
+            column_config={
+                "id": None,
+                "Role": st.column_config.SelectboxColumn("Role", options=ROLES, required=True)
+            }
+        )
+        changed = edited[edited["Role"] != users_df["Role"]]
+        changes = dict(zip(changed["id"], changed["Role"]))
+        if user.id in changes:
+            st.warning("You can't change your own role here.")
+            changes.pop(user.id)
+
+        if st.button(f"Save {len(changes)} role change(s)", disabled=not changes, type="primary"):
+            updated = bulk_update_user_roles(changes)
+            if updated is None:
+                st.error("Role update failed.")
+            else:
+                st.success(f"Updated {len(updated)} user(s).")
+                st.rerun()
+
+        total_pages = max(1, -(-result["total"] // USER_PAGE_SIZE))
+        n1, n2, n3 = st.columns([1, 2, 1])
+        if n1.button("← Prev", disabled=page_no == 0, key="user_prev"):
+            st.session_state["user_dir_page"] = page_no - 1
+            st.rerun()
+        n2.caption(f"Page {page_no + 1} of {total_pages} · {result['total']} users")
+        if n3.button("Next →", disabled=page_no + 1 >= total_pages, key="user_next"):
+            st.session_state["user_dir_page"] = page_no + 1
+            st.rerun()
+    elif result is not None:
         st.info("No users found.")
 
 with tab2:
     st.header("System Audit Log")
-    logs = get_audit_logs()
-    if logs:
+    # Audit rows are written in background batches; flushing (up to 2s) only on request
+    st.button(
+        "🔄 Refresh", key="audit_refresh", on_click=flush_audit_log, kwargs={"timeout": 2.0},
+        help="Write buffered events, including your own recent actions, then reload."
+    )
+
+    f1, f2, f3 = st.columns(3)
+    actor_filter = f1.text_input("Actor name contains", key="audit_actor")
+    action_filter = f2.selectbox("Action", ["All"] + AUDIT_ACTIONS, key="audit_action")
+    entity_type_filter = f3.selectbox("Entity type", ["All"] + AUDIT_ENTITY_TYPES, key="audit_entity_type")
+    f4, f5 = st.columns(2)
+    entity_id_filter = f4.text_input("Entity ID", key="audit_entity_id").strip()
+    date_range = f5.date_input("Date range", value=(), key="audit_dates")
+
+    since = until = None
+    if len(date_range) >= 1:
+        since = date_range[0].isoformat()
+    if len(date_range) == 2:
+        until = (date_range[1] + timedelta(days=1)).isoformat()
+    filters = {
+        "actor_name": actor_filter.strip() or None,
+        "action": None if action_filter == "All" else action_filter,
+        "entity_type": None if entity_type_filter == "All" else entity_type_filter,
+        "entity_id": entity_id_filter or None,
+        "since": since,
+        "until": until
+    }
+
+    # Keyset pagination: a stack of cursors, one per page visited; reset when filters change
+    if st.session_state.get("audit_filters") != filters:
+        st.session_state["audit_filters"] = filters
+        st.session_state["audit_cursors"] = [None]
+    cursors = st.session_state["audit_cursors"]
+
+    page = get_audit_logs(limit=AUDIT_PAGE_SIZE, before=cursors[-1], **filters)
+    if page and page["rows"]:
         data = []
-        for l in logs:
+        for l in page["rows"]:
             data.append({
                 "Time": l['created_at'],
                 "Actor": l['profiles']['full_name'] if l['profiles'] else "System",
                 "Action": l['action'],
                 "Entity Type": l['entity_type'],
-                "Entity ID": l['entity_id']
+                "Entity ID": l['entity_id'],
+                "Details": ", ".join(f"{k}={v}" for k, v in (l.get('metadata') or {}).items())
             })
-        st.dataframe(data, use_container_width=True)
+        st.dataframe(data, use_container_width=True, hide_index=True)
+    elif page is not None:
+        st.info("No audit logs match these filters.")
+
+    p1, p2, p3 = st.columns([1, 2, 1])
+    if p1.button("← Newer", disabled=len(cursors) == 1, key="audit_prev"):
+        cursors.pop()
+        st.rerun()
+    p2.caption(f"Page {len(cursors)}")
+    if p3.button("Older →", disabled=not (page and page["next_cursor"]), key="audit_next"):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+
+    writer = get_audit_writer_stats()
+    st.caption(
+        f"Writer: {writer['written']} written in {writer['batches']} batches, "
+        f"{writer['pending']} pending, {writer['failures']} failed flushes, {writer['dropped']} dropped, {writer['rejected']} rejected (no session)."
+    )
+
+with tab3:
+    st.header("DB Performance")
+    st.caption("Process-wide db layer metrics since the last restart or reset, tagged by page and function.")
+    rows = get_metrics_snapshot()
+    if rows:
+        df = pd.DataFrame(rows).drop(columns=["buckets"])
+
+        # Slowest pages first
+        by_page = df.groupby("page").agg(
+            calls=("calls", "sum"),
+            errors=("errors", "sum"),
+            total_ms=("total_ms", "sum"),
+            payload_bytes=("payload_bytes", "sum")
+        ).sort_values("total_ms", ascending=False)
+        st.subheader("By Page")
+        st.bar_chart(by_page["total_ms"])
+        st.dataframe(by_page, use_container_width=True)
+
+        st.subheader("By Function")
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+        c1, c2, c3 = st.columns(3)
+        # Callables: the payloads are only built when a button is clicked
+        c1.download_button("Export JSON", export_json, file_name="db_metrics.json", mime="application/json")
+        c2.download_button("Export Prometheus", export_prometheus, file_name="db_metrics.prom", mime="text/plain")
+        if c3.button("Reset Metrics"):
+            reset_metrics()
+            st.rerun()
     else:
-        st.info("No audit logs.")
+        st.info("No db calls recorded yet.")
+
+    st.subheader("Dashboard Counters")
+    st.caption(
+        "The Dashboard reads job and application counts from counter tables kept up to date by triggers. "
+        "Check compares them with a full recount; Rebuild recounts and fixes any drift."
+    )
+    k1, k2 = st.columns(2)
+    counter_check = None
+    if k1.button("Check Counters"):
+        counter_check = check_dashboard_counters()
+    if k2.button("Rebuild Counters"):
+        counter_check = check_dashboard_counters(repair=True)
+        if counter_check:
+            st.toast(f"Rebuilt counters ({len(counter_check)} corrected)")
+    if counter_check is not None:
+        if counter_check:
+            st.warning(f"{len(counter_check)} counter(s) differ from a recount.")
+            st.dataframe(pd.DataFrame(counter_check), use_container_width=True, hide_index=True)
+        else:
+            st.success("Counters match a full recount.")
+
+    st.subheader("Archive")
+    st.caption(
+        "Applications and notes of jobs closed for a while move to the archive, which pipeline lists, "
+        "re-scoring and note threads skip unless asked. Reopening a job restores its applications."
+    )
+    closed_days = st.number_input("Closed for at least (days)", min_value=0, value=ARCHIVE_AFTER_CLOSED_DAYS, step=30)
+    if st.button("Archive Closed Jobs"):
+        archived = archive_closed_jobs(int(closed_days))
+        if archived is not None:
+            st.success(
+                f"Archived {archived['archived_applications']} application(s) from {archived['archived_jobs']} job(s) "
+                f"and {archived['archived_notes']} note(s)."
+            )
+
+with tab4:
+    st.header("LLM Usage")
+
+    st.subheader("Scheduler")
+    sched = get_scheduler_stats()
+    st.caption(
+        f"Process-wide quota: {sched['requests_per_minute']:.0f} requests/min, "
+        f"{sched['tokens_per_minute']:,} tokens/min. Interactive calls go first, then the "
+        "candidate portal, then batch jobs; users share each class round-robin."
+    )
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Queued", sum(c["queued"] for c in sched["classes"]))
+    c2.metric("Requests Available", f"{sched['requests_available']:.0f}")
+    c3.metric("Tokens Available", f"{sched['tokens_available']:,}")
+    c4.metric("429 Backoffs", sched["rate_limited"], delta=f"paused {sched['paused_s']}s" if sched["paused_s"] else None, delta_color="off")
+    st.dataframe(pd.DataFrame([{
+        "Class": c["priority"],
+        "Queued": c["queued"],
+        "Waiting Users": c["queued_users"],
+        "Oldest Wait (s)": c["oldest_wait_s"],
+        "Granted": c["granted"],
+        "Timeouts": c["timeouts"],
+        "Avg Wait (s)": c["avg_wait_s"],
+        "p95 Wait (s)": c["p95_wait_s"],
+        "Max Wait (s)": c["max_wait_s"]
+    } for c in sched["classes"]]), use_container_width=True, hide_index=True)
+    if st.button("Refresh", key="refresh_scheduler"):
+        st.rerun()
+
+    parser_stats = get_parser_stats()
+    if parser_stats["parses"]:
+        st.caption(
+            f"Resume parsing: {parser_stats['fast_path_rate'] * 100:.0f}% of {parser_stats['parses']} resumes "
+            f"parsed by rules alone (no LLM call); {parser_stats['llm_fallback']} needed the LLM for missing fields, "
+            f"{parser_stats['llm_failed']} fallback call(s) failed."
+        )
+
+    days = st.selectbox("Window", [1, 7, 30, 90], index=2, format_func=lambda d: f"Last {d} days")
+    calls = load_llm_calls(days)
+    if calls:
+        import plotly.express as px
+
+        df = pd.DataFrame(calls)
+        df["total_tokens"] = df["prompt_tokens"] + df["response_tokens"]
+        live = df[df["cache_hit"] == 0]
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Calls", len(df))
+        c2.metric("Cache Hit Rate", f"{df['cache_hit'].mean() * 100:.1f}%")
+        c3.metric("Tokens", f"{int(df['total_tokens'].sum()):,}")
+        c4.metric("Est. Cost", f"${df['cost_usd'].sum():.2f}")
+
+        st.subheader("Per Task")
+        per_task = df.groupby("task").agg(
+            calls=("id", "count"),
+            cache_hits=("cache_hit", "sum"),
+            failures=("success", lambda s: int((s == 0).sum())),
+            retries=("attempts", lambda s: int((s - 1).sum())),
+            validation_failures=("validation_failures", "sum"),
+            prompt_tokens=("prompt_tokens", "sum"),
+            response_tokens=("response_tokens", "sum"),
+            cost_usd=("cost_usd", "sum")
+        )
+        if not live.empty:
+            latency = live.groupby("task")["latency_ms"].quantile([0.5, 0.95]).unstack()
+            latency.columns = ["p50_ms", "p95_ms"]
+            per_task = per_task.join(latency)
+        st.dataframe(per_task.round(2), use_container_width=True)
+
+        if not live.empty:
+            st.subheader("Latency p50 / p95")
+            lat_long = latency.reset_index().melt(id_vars="task", var_name="quantile", value_name="ms")
+            st.plotly_chart(px.bar(lat_long, x="task", y="ms", color="quantile", barmode="group"), use_container_width=True)
+
+        st.subheader("Daily Token Spend")
+        daily = df.groupby(["day", "task"], as_index=False).agg(tokens=("total_tokens", "sum"), cost_usd=("cost_usd", "sum"))
+        metric = st.radio("Show", ["tokens", "cost_usd"], horizontal=True)
+        st.plotly_chart(px.bar(daily, x="day", y=metric, color="task"), use_container_width=True)
+    else:
+        st.info("No LLM calls recorded in this window.")
+
+with tab5:
+    st.header("Session Memory")
+    st.caption(
+        "Estimated session_state size of each recently active session on this server process. "
+        f"Parsed documents live in the shared session store; each session keeps at most "
+        f"{SESSION_MEMORY_BUDGET_BYTES // 1024} KB of them in memory."
+    )
+    track_session(force=True)
+    footprints = get_session_footprints()
+    store = get_store_stats()
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Active Sessions", len(footprints))
+    c2.metric("Session State", f"{sum(f['state_bytes'] for f in footprints) / 1024:,.0f} KB")
+    c3.metric("Store Blobs", store["blobs"])
+    c4.metric("Store on Disk", f"{store['disk_bytes'] / 1024:,.0f} KB")
+
+    if footprints:
+        st.dataframe(pd.DataFrame([{
+            "User": f["user"] or "—",
+            "Page": f["page"],
+            "State KB": round(f["state_bytes"] / 1024, 1),
+            "Store Refs": f["store_refs"],
+            "Referenced KB": round(f["store_bytes"] / 1024, 1),
+            "In-Memory KB": round(f["hot_bytes"] / 1024, 1),
+            "Largest Keys": ", ".join(f"{k} ({v / 1024:.0f} KB)" for k, v in f["largest_keys"]),
+            "Last Seen": pd.Timestamp(f["last_seen"], unit="s").strftime("%H:%M:%S")
+        } for f in footprints]), use_container_width=True, hide_index=True)
+    if st.button("Prune Store"):
+        st.toast(f"Removed {prune_store()} stale blob(s)")
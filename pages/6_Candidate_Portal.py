@@ -5,23 +5,30 @@ from pathlib import Path
 # Add project root to sys.path
 root_path = Path(__file__).parent.parent
 sys.path.append(str(root_path))
-import pandas as pd
 from src.auth import get_current_user
 from src.db import (
-    get_jobs, 
+    get_open_jobs, 
     get_candidate_profile, 
     create_candidate_profile, 
     update_candidate_profile, 
     apply_for_job_as_candidate, 
-    get_my_applications
+    get_my_applications,
+    get_candidate_by_resume_hash
 )
-from src.utils import extract_text_from_file
-from src.llm import parse_resume
+from src.uploads import open_upload, UploadRejected
+from src.constants import UPLOAD_EXTENSIONS
+from src import session_store
+from src.storage import store_resume
+from src.identity import build_identity, identity_columns, index_candidate
+from src.resume_parser import parse_resume
+from src.llm_scheduler import PORTAL, llm_context
 from src.ui import apply_custom_css, display_theme_toggle
+from src.metrics import begin_rerun
 
 st.set_page_config(page_title="Candidate Portal", page_icon="🚀", layout="wide")
 apply_custom_css()
 display_theme_toggle()
+begin_rerun("candidate_portal")
 
 user = get_current_user()
 if not user:
@@ -46,32 +53,54 @@ st.title("🚀 Career Portal")
 # 1. Fetch or Create Candidate Profile
 candidate = get_candidate_profile(user.id)
 
-# Initialize Session State for profile creation if needed
-if "parsed_profile" not in st.session_state:
-    st.session_state.parsed_profile = {}
-
 if not candidate:
     st.info("👋 Welcome! Let's build your profile to get started.")
     
     with st.container():
         st.subheader("Upload Resume")
-        uploaded_resume = st.file_uploader("Upload PDF/DOCX to auto-fill", type=["pdf", "docx", "txt"])
+        uploaded_resume = st.file_uploader("Upload your resume to auto-fill", type=UPLOAD_EXTENSIONS)
         
         if uploaded_resume and st.button("Parse Resume"):
             with st.spinner("Analyzing resume..."):
-                text = extract_text_from_file(uploaded_resume, uploaded_resume.name)
-                parsed = parse_resume(text)
-                if parsed:
-                    st.session_state.parsed_profile = parsed.dict()
-                    st.session_state.parsed_profile["resume_text"] = text
-                    st.success("Resume parsed! Please review below.")
-                else:
-                    st.error("Could not parse resume.")
+                try:
+                    upload = open_upload(uploaded_resume, uploaded_resume.name)
+                except UploadRejected as e:
+                    st.error(f"Upload rejected: {e}")
+                    st.stop()
+
+                with upload:
+                    stored = store_resume(upload.file, uploaded_resume.name, upload.content_type)
+                    existing = get_candidate_by_resume_hash(stored["sha256"]) if stored else None
+                    if existing:
+                        # Identical file was already parsed (e.g. a recruiter uploaded it): reuse it
+                        profile = {k: existing.get(k) for k in ("full_name", "email", "phone", "location", "links", "resume_text")}
+                    else:
+                        try:
+                            text = upload.text()
+                        except UploadRejected as e:
+                            st.error(f"Upload rejected: {e}")
+                            st.stop()
+                        with llm_context(PORTAL):
+                            parsed = parse_resume(text)
+                        profile = parsed.dict() if parsed else {}
+                        if parsed:
+                            profile["resume_text"] = text
+
+                    if profile:
+                        if stored:
+                            profile["resume_file_path"] = stored["path"]
+                            profile["resume_sha256"] = stored["sha256"]
+                        # Kept in the session store; session_state only holds a reference
+                        session_store.put("parsed_profile", profile)
+                        st.success("Resume parsed! Please review below.")
+                    else:
+                        session_store.drop("parsed_profile")
+                        st.error("Could not parse resume.")
 
         with st.form("create_profile_form"):
             st.subheader("Your Details")
             # Defaults from parsed
-            defaults = st.session_state.parsed_profile
+            defaults = session_store.get("parsed_profile", {})
             
             full_name = st.text_input("Full Name", value=defaults.get("full_name", ""))
             email = st.text_input("Email", value=defaults.get("email", user.email))
@@ -91,10 +120,16 @@ if not candidate:
                         "phone": phone,
                         "location": location,
                         "links": {"linkedin": linkedin},
-                        "resume_text": defaults.get("resume_text", "")
+                        "resume_text": defaults.get("resume_text", ""),
+                        "resume_file_path": defaults.get("resume_file_path"),
+                        "resume_sha256": defaults.get("resume_sha256")
                     }
+                    identity = build_identity(new_data["resume_text"], email, phone)
+                    new_data.update(identity_columns(identity))
                     res = create_candidate_profile(user.id, new_data)
                     if res:
+                        index_candidate(res["id"], identity)
+                        session_store.drop("parsed_profile")
                         st.success("Profile created!")
                         st.rerun()
     st.stop() # Don't show tabs until profile exists
@@ -114,10 +149,7 @@ with tab1:
     # We should just call a simple fetch here or accept get_jobs behavior.
     
     # Direct fetch to rely on RLS
-    from src.db import get_supabase_client
-    supabase = get_supabase_client()
-    res = supabase.table("jobs").select("*").eq("status", "open").execute()
-    jobs = res.data
+    jobs = get_open_jobs()
     
     if jobs:
         st.markdown("### 🎯 Featured Opportunities")
@@ -161,7 +193,8 @@ with tab1:
 
 with tab2:
     st.header("My Applications")
-    my_apps = get_my_applications(candidate['id'])
+    # A candidate's own history includes applications to jobs archived since
+    my_apps = get_my_applications(candidate['id'], include_archived=True)
     
     if my_apps:
         for app in my_apps:
@@ -0,0 +1,37 @@
+-- Analytics snapshot export
+-- The export (src/export.py) pages through each table in (watermark, id) order,
+-- starting after the last exported row. jobs/applications are watermarked on
+-- updated_at, which so far was only set on insert; keep it current on every
+-- update so edits are picked up. notes and audit_log are append-only and use
+-- created_at.
+
+create or replace function set_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  new.updated_at := now();
+  return new;
+end;
+$$;
+
+drop trigger if exists jobs_set_updated_at on jobs;
+create trigger jobs_set_updated_at
+  before update on jobs
+  for each row execute function set_updated_at();
+
+drop trigger if exists applications_set_updated_at on applications;
+create trigger applications_set_updated_at
+  before update on applications
+  for each row execute function set_updated_at();
+
+drop trigger if exists candidates_set_updated_at on candidates;
+create trigger candidates_set_updated_at
+  before update on candidates
+  for each row execute function set_updated_at();
+
+-- Keyset pagination indexes: (watermark, id) matches the export's order by
+create index if not exists jobs_updated_at_id_idx on jobs(updated_at, id);
+create index if not exists applications_updated_at_id_idx on applications(updated_at, id);
+create index if not exists notes_created_at_id_idx on notes(created_at, id);
+create index if not exists audit_log_created_at_id_idx on audit_log(created_at, id);
@@ -0,0 +1,228 @@
+-- Hot / cold split of applications and notes
+-- Applications of jobs that have been closed for a while (and their notes) are
+-- archived by archive_closed_jobs(); reopening a job restores them. Everyday reads
+-- (pipeline lists, stale re-scoring, stuck candidates, note threads) only look at hot
+-- rows; the app opts in to archived ones explicitly.
+-- notes is list-partitioned on `archived` into notes_hot and notes_archive, so reads
+-- filtered on archived = false only scan the hot partition and archiving moves rows
+-- between partitions.
+-- applications is not partitioned: notes, evaluations and application_stage_events
+-- reference applications(id), and the keys of a partitioned table must include its
+-- partition key, so every one of those foreign keys and unique(job_id, candidate_id)
+-- would have to change. It gets an `archived` flag instead, and its hot reads go
+-- through partial indexes on `not archived` that never contain archived rows.
+-- Run after dashboard_counters_migration.sql. Safe to re-run.
+
+-- --- Jobs: when were they closed ---
+
+alter table jobs
+add column if not exists closed_at timestamptz;
+
+update jobs set closed_at = coalesce(updated_at, created_at) where status = 'closed' and closed_at is null;
+
+create or replace function set_job_closed_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  if new.status = 'closed' then
+    if tg_op = 'INSERT' or old.status is distinct from 'closed' then
+      new.closed_at := now();
+    end if;
+  else
+    new.closed_at := null;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists jobs_set_closed_at on jobs;
+create trigger jobs_set_closed_at
+  before insert or update of status on jobs
+  for each row execute function set_job_closed_at();
+
+-- --- Applications: archived flag + hot partial indexes ---
+
+-- Constant defaults: no table rewrite
+alter table applications
+add column if not exists archived boolean not null default false,
+add column if not exists archived_at timestamptz;
+
+-- Pipeline lists per job (get_candidates_for_job / get_application_options)
+create index if not exists applications_hot_job_score_idx on applications(job_id, overall_score desc nulls last)
+  where not archived;
+-- Dashboard recent activity
+create index if not exists applications_hot_created_at_idx on applications(created_at desc)
+  where not archived;
+-- Re-scoring queue (supersedes applications_eval_stale_idx for the app's queries)
+create index if not exists applications_hot_eval_stale_idx on applications(overall_score desc nulls last, id)
+  where eval_stale and not archived;
+drop index if exists applications_eval_stale_idx;
+
+-- Stuck candidates: open, hot applications only
+create index if not exists applications_hot_open_stage_entered_idx on applications(stage_entered_at)
+  where stage not in ('hired', 'rejected') and not archived;
+drop index if exists applications_open_stage_entered_idx;
+
+create or replace function stuck_applications(p_job_id uuid default null, p_min_days int default 14, p_limit int default 50)
+returns table (
+  application_id uuid,
+  job_id uuid,
+  job_title text,
+  candidate_name text,
+  stage application_stage,
+  stage_entered_at timestamptz,
+  days_in_stage double precision
+)
+language sql
+stable
+as $$
+  select
+    a.id,
+    a.job_id,
+    j.title,
+    c.full_name,
+    a.stage,
+    a.stage_entered_at,
+    extract(epoch from now() - a.stage_entered_at) / 86400.0
+  from applications a
+  join jobs j on j.id = a.job_id
+  join candidates c on c.id = a.candidate_id
+  where a.stage not in ('hired', 'rejected')
+    and not a.archived
+    and a.stage_entered_at < now() - make_interval(days => p_min_days)
+    and (p_job_id is null or a.job_id = p_job_id)
+  order by a.stage_entered_at
+  limit p_limit
+$$;
+
+-- --- Notes: partitioned by archived ---
+
+do $$
+begin
+  -- Only while notes is still a plain table
+  if exists (
+    select 1 from pg_class
+    where relname = 'notes' and relnamespace = 'public'::regnamespace and relkind = 'r'
+  ) then
+    alter table notes rename to notes_unpartitioned;
+    alter table notes_unpartitioned rename constraint notes_pkey to notes_unpartitioned_pkey;
+
+    -- The primary key must include the partition key; ids stay unique (uuid default)
+    create table notes (
+      id uuid default uuid_generate_v4() not null,
+      application_id uuid references applications(id) on delete cascade not null,
+      author_id uuid references profiles(id) on delete set null,
+      note text not null,
+      created_at timestamptz default now(),
+      archived boolean not null default false,
+      primary key (id, archived)
+    ) partition by list (archived);
+
+    create table notes_hot partition of notes for values in (false);
+    create table notes_archive partition of notes for values in (true);
+
+    insert into notes (id, application_id, author_id, note, created_at, archived)
+    select n.id, n.application_id, n.author_id, n.note, n.created_at, a.archived
+    from notes_unpartitioned n
+    join applications a on a.id = n.application_id;
+
+    drop table notes_unpartitioned;
+  end if;
+end;
+$$;
+
+-- Created on the parent, so each partition gets its own copy.
+-- (application_id, created_at, id) also serves the foreign key's cascades.
+create index if not exists notes_application_created_at_id_idx on notes(application_id, created_at, id);
+create index if not exists notes_created_at_id_idx on notes(created_at, id);
+
+-- Policies live on the parent; the partitions have RLS on and no policies, so they
+-- can only be read through notes.
+alter table notes enable row level security;
+alter table notes_hot enable row level security;
+alter table notes_archive enable row level security;
+
+drop policy if exists "Authorized users can view notes" on notes;
+create policy "Authorized users can view notes" on notes
+  for select using ((select auth.uid()) is not null);
+
+drop policy if exists "Authenticated users can create notes" on notes;
+create policy "Authenticated users can create notes" on notes
+  for insert with check ((select auth.uid()) = author_id);
+
+-- --- Archival ---
+
+-- Archive the applications (and notes) of jobs closed more than p_min_closed_days
+-- ago. Also moves notes posted on already-archived applications since the last run.
+-- Admin only; schedule it with pg_cron or run it from Admin → Performance.
+create or replace function archive_closed_jobs(p_min_closed_days int default 90)
+returns table (archived_jobs bigint, archived_applications bigint, archived_notes bigint)
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_jobs bigint;
+  v_applications bigint;
+  v_notes bigint;
+begin
+  -- No JWT: SQL editor / service key / pg_cron
+  if auth.uid() is not null and (select get_my_role()) is distinct from 'admin' then
+    raise exception 'Only admins can archive jobs' using errcode = '42501';
+  end if;
+
+  with moved as (
+    update applications a
+    set archived = true, archived_at = now()
+    from jobs j
+    where j.id = a.job_id
+      and j.status = 'closed'
+      and j.closed_at < now() - make_interval(days => p_min_closed_days)
+      and not a.archived
+    returning a.job_id
+  )
+  select count(distinct m.job_id), count(*) into v_jobs, v_applications from moved m;
+
+  update notes n
+  set archived = true
+  from applications a
+  where a.id = n.application_id
+    and a.archived
+    and not n.archived;
+  get diagnostics v_notes = row_count;
+
+  return query select v_jobs, v_applications, v_notes;
+end;
+$$;
+
+revoke execute on function archive_closed_jobs(int) from public, anon;
+grant execute on function archive_closed_jobs(int) to authenticated;
+
+-- Reopening a job brings its applications and notes back to the hot set
+create or replace function restore_archived_job()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  update applications set archived = false, archived_at = null
+  where job_id = new.id and archived;
+
+  update notes n
+  set archived = false
+  from applications a
+  where a.id = n.application_id
+    and a.job_id = new.id
+    and n.archived;
+  return null;
+end;
+$$;
+
+drop trigger if exists jobs_restore_archived on jobs;
+create trigger jobs_restore_archived
+  after update of status on jobs
+  for each row
+  when (old.status = 'closed' and new.status is distinct from 'closed')
+  execute function restore_archived_job();
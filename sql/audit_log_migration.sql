@@ -0,0 +1,9 @@
+-- Audit log viewer indexes
+-- The admin viewer pages newest-first with a (created_at, id) keyset cursor and can
+-- filter by actor, action and entity; each filter gets an index that already yields
+-- rows in created_at order so a page is a short index range scan. Safe to re-run.
+
+create index if not exists audit_log_created_at_id_idx on audit_log(created_at, id);
+create index if not exists audit_log_actor_created_at_idx on audit_log(actor_id, created_at desc);
+create index if not exists audit_log_action_created_at_idx on audit_log(action, created_at desc);
+create index if not exists audit_log_entity_created_at_idx on audit_log(entity_type, entity_id, created_at desc);
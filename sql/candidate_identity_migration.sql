@@ -0,0 +1,43 @@
+-- Candidate identity resolution
+-- Normalized contact keys and a MinHash signature on each candidate, plus an LSH
+-- band table so near-duplicate resumes are found with index lookups at ingest.
+-- Existing candidates can be indexed with src.identity.backfill_candidate().
+-- Run after resume_storage_migration.sql. Safe to re-run.
+
+alter table candidates
+add column if not exists email_key text,
+add column if not exists phone_key text,
+add column if not exists resume_minhash bigint[];
+
+create index if not exists candidates_email_key_idx on candidates(email_key) where email_key is not null;
+create index if not exists candidates_phone_key_idx on candidates(phone_key) where phone_key is not null;
+
+create table if not exists candidate_lsh_bands (
+  band_key text not null, -- "<band>:<hash of the band's rows>"
+  candidate_id uuid references candidates(id) on delete cascade not null,
+  primary key (band_key, candidate_id)
+);
+
+create index if not exists candidate_lsh_bands_candidate_idx on candidate_lsh_bands(candidate_id);
+
+alter table candidate_lsh_bands enable row level security;
+
+drop policy if exists "Authorized users can view lsh bands" on candidate_lsh_bands;
+create policy "Authorized users can view lsh bands" on candidate_lsh_bands
+  for select using ((select auth.uid()) is not null);
+
+drop policy if exists "Authorized users can add lsh bands" on candidate_lsh_bands;
+create policy "Authorized users can add lsh bands" on candidate_lsh_bands
+  for insert with check ((select auth.uid()) is not null);
+
+-- A resume uploaded for someone who turned out to be an existing candidate, or whose
+-- candidate could not be created, is removed again (src.storage.discard_resume);
+-- files a candidate references are kept. Only staff upload from Candidate Detail.
+drop policy if exists "Authenticated users can delete unused resumes" on storage.objects;
+create policy "Authenticated users can delete unused resumes" on storage.objects
+  for delete using (
+    bucket_id = 'resumes'
+    and (select auth.uid()) is not null
+    and (select get_my_role()) in ('admin', 'recruiter')
+    and not exists (select 1 from public.candidates c where c.resume_file_path = storage.objects.name)
+  );
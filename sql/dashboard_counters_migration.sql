@@ -0,0 +1,244 @@
+-- Trigger-maintained counters for the Dashboard
+-- Jobs by status, applications by stage and applications per job and stage are kept
+-- in small counter tables, adjusted by triggers on every insert / update / delete of
+-- jobs and applications, so the Dashboard reads a few dozen rows instead of
+-- recounting both tables on every page load. Every adjustment also bumps the version
+-- in dashboard_counters_version; the Dashboard caches its figures by that version.
+-- The version is a table row rather than a sequence so it commits (or rolls back)
+-- together with the counts: a reader never sees a new version with old counts.
+-- Writes to the same counter row serialize until commit (every job / application
+-- write bumps the version row), which is fine at this app's write rate.
+-- check_dashboard_counters() compares the counters with a full recount and, on
+-- request, rebuilds them (e.g. after a TRUNCATE or a bulk load with triggers disabled).
+-- Run after stage_history_migration.sql. Safe to re-run; the counters are rebuilt at the end.
+
+create table if not exists job_status_counts (
+  status job_status primary key,
+  jobs bigint not null default 0
+);
+
+create table if not exists application_stage_totals (
+  stage application_stage primary key,
+  applications bigint not null default 0
+);
+
+-- No foreign key to jobs: when a job is deleted its applications' delete triggers
+-- still decrement these rows, and rows that reach zero are removed.
+create table if not exists application_stage_counts (
+  job_id uuid not null,
+  stage application_stage not null,
+  applications bigint not null default 0,
+  primary key (job_id, stage)
+);
+
+create table if not exists dashboard_counters_version (
+  id boolean primary key default true check (id),
+  version bigint not null default 0
+);
+insert into dashboard_counters_version (id) values (true) on conflict (id) do nothing;
+
+-- Earlier versions of this migration used a sequence (not transactional)
+drop sequence if exists dashboard_counters_version_seq;
+
+-- --- Triggers (security definer: users have no write policies on the counter tables) ---
+
+create or replace function bump_application_count(p_job_id uuid, p_stage application_stage, p_delta bigint)
+returns void
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if p_stage is null then
+    return;
+  end if;
+
+  insert into application_stage_totals (stage, applications) values (p_stage, p_delta)
+  on conflict (stage) do update set applications = application_stage_totals.applications + excluded.applications;
+
+  insert into application_stage_counts (job_id, stage, applications) values (p_job_id, p_stage, p_delta)
+  on conflict (job_id, stage) do update set applications = application_stage_counts.applications + excluded.applications;
+
+  if p_delta < 0 then
+    delete from application_stage_counts where job_id = p_job_id and stage = p_stage and applications <= 0;
+  end if;
+end;
+$$;
+
+revoke execute on function bump_application_count(uuid, application_stage, bigint) from public, anon, authenticated;
+
+create or replace function count_applications()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    if tg_op = 'UPDATE' and new.stage is not distinct from old.stage and new.job_id = old.job_id then
+      return null;
+    end if;
+    perform bump_application_count(old.job_id, old.stage, -1);
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') then
+    perform bump_application_count(new.job_id, new.stage, 1);
+  end if;
+  update dashboard_counters_version set version = version + 1 where id;
+  return null;
+end;
+$$;
+
+create or replace function count_jobs()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') then
+    if tg_op = 'UPDATE' and new.status is not distinct from old.status then
+      return null;
+    end if;
+    update job_status_counts set jobs = jobs - 1 where status = old.status;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') and new.status is not null then
+    insert into job_status_counts (status, jobs) values (new.status, 1)
+    on conflict (status) do update set jobs = job_status_counts.jobs + 1;
+  end if;
+  update dashboard_counters_version set version = version + 1 where id;
+  return null;
+end;
+$$;
+
+drop trigger if exists applications_count on applications;
+create trigger applications_count
+  after insert or update of stage, job_id or delete on applications
+  for each row execute function count_applications();
+
+drop trigger if exists jobs_count on jobs;
+create trigger jobs_count
+  after insert or update of status or delete on jobs
+  for each row execute function count_jobs();
+
+-- --- RLS ---
+alter table job_status_counts enable row level security;
+alter table application_stage_totals enable row level security;
+alter table application_stage_counts enable row level security;
+alter table dashboard_counters_version enable row level security;
+
+drop policy if exists "Staff can view job status counts" on job_status_counts;
+create policy "Staff can view job status counts" on job_status_counts
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+drop policy if exists "Staff can view application stage totals" on application_stage_totals;
+create policy "Staff can view application stage totals" on application_stage_totals
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+drop policy if exists "Staff can view application stage counts" on application_stage_counts;
+create policy "Staff can view application stage counts" on application_stage_counts
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+drop policy if exists "Staff can view dashboard counters version" on dashboard_counters_version;
+create policy "Staff can view dashboard counters version" on dashboard_counters_version
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+-- --- Reads ---
+
+-- Everything the Dashboard's counters show, in one round trip (security invoker)
+create or replace function dashboard_counters()
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'version', (select version from dashboard_counters_version where id),
+    'jobs_by_status', coalesce((select jsonb_object_agg(status, jobs) from job_status_counts), '{}'::jsonb),
+    'applications_by_stage', coalesce((select jsonb_object_agg(stage, applications) from application_stage_totals), '{}'::jsonb),
+    'per_job', coalesce((
+      select jsonb_agg(jsonb_build_object(
+        'job_id', c.job_id, 'title', j.title, 'status', j.status,
+        'stage', c.stage, 'applications', c.applications
+      ) order by j.title, c.stage)
+      from application_stage_counts c
+      join jobs j on j.id = c.job_id
+    ), '[]'::jsonb)
+  )
+$$;
+
+-- --- Consistency check / rebuild ---
+
+-- Rows whose stored count differs from a full recount. With p_repair the counters are
+-- rebuilt from the tables (under a lock that blocks concurrent job / application
+-- writes for the duration) and the returned rows are what was corrected. Admin only.
+create or replace function check_dashboard_counters(p_repair boolean default false)
+returns table (counter text, key text, stored bigint, actual bigint)
+language plpgsql
+security definer
+set search_path = public
+as $$
+#variable_conflict use_column
+begin
+  -- No JWT: SQL editor / service key
+  if auth.uid() is not null and (select get_my_role()) is distinct from 'admin' then
+    raise exception 'Only admins can check dashboard counters' using errcode = '42501';
+  end if;
+
+  if p_repair then
+    lock table jobs, applications in share mode;
+  end if;
+
+  drop table if exists counter_diff;
+  create temporary table counter_diff on commit drop as
+  with actual_jobs as (
+    select status, count(*) as n from jobs where status is not null group by status
+  ),
+  actual_totals as (
+    select stage, count(*) as n from applications where stage is not null group by stage
+  ),
+  actual_counts as (
+    select job_id, stage, count(*) as n from applications where stage is not null group by job_id, stage
+  )
+  select 'jobs_by_status'::text as counter, coalesce(s.status, a.status)::text as key,
+         coalesce(s.jobs, 0) as stored, coalesce(a.n, 0) as actual
+  from job_status_counts s
+  full join actual_jobs a on a.status = s.status
+  where coalesce(s.jobs, 0) <> coalesce(a.n, 0)
+  union all
+  select 'applications_by_stage', coalesce(s.stage, a.stage)::text,
+         coalesce(s.applications, 0), coalesce(a.n, 0)
+  from application_stage_totals s
+  full join actual_totals a on a.stage = s.stage
+  where coalesce(s.applications, 0) <> coalesce(a.n, 0)
+  union all
+  select 'applications_per_job', coalesce(s.job_id, a.job_id)::text || ':' || coalesce(s.stage, a.stage)::text,
+         coalesce(s.applications, 0), coalesce(a.n, 0)
+  from application_stage_counts s
+  full join actual_counts a on a.job_id = s.job_id and a.stage = s.stage
+  where coalesce(s.applications, 0) <> coalesce(a.n, 0);
+
+  if p_repair and exists (select 1 from counter_diff) then
+    -- "where true": PostgREST sessions reject unqualified deletes (pg-safeupdate)
+    delete from job_status_counts where true;
+    insert into job_status_counts (status, jobs)
+    select status, count(*) from jobs where status is not null group by status;
+
+    delete from application_stage_totals where true;
+    insert into application_stage_totals (stage, applications)
+    select stage, count(*) from applications where stage is not null group by stage;
+
+    delete from application_stage_counts where true;
+    insert into application_stage_counts (job_id, stage, applications)
+    select job_id, stage, count(*) from applications where stage is not null group by job_id, stage;
+
+    update dashboard_counters_version set version = version + 1 where id;
+  end if;
+
+  return query select d.counter, d.key, d.stored, d.actual from counter_diff d order by 1, 2;
+end;
+$$;
+
+revoke execute on function check_dashboard_counters(boolean) from public, anon;
+grant execute on function check_dashboard_counters(boolean) to authenticated;
+
+-- Initial fill (and repair on re-run). auth.uid() is null in the SQL editor.
+select * from check_dashboard_counters(true);
@@ -0,0 +1,93 @@
+-- Evaluation staleness tracking
+-- Each evaluation carries an input fingerprint (hash of the evaluation-relevant job
+-- and candidate fields, resume text, prompt version and model, computed in
+-- src/evaluations.py) and the application remembers the fingerprint / config its
+-- current score came from. Triggers flag applications as stale when their job's
+-- evaluated fields or the candidate's evaluated fields (name, location, links,
+-- resume) change; src/rescoring.py re-evaluates flagged applications
+-- within an LLM budget. Run after evaluations_migration.sql. Safe to re-run.
+
+alter table evaluations
+add column if not exists prompt_version text,
+add column if not exists fingerprint text;
+
+-- Stored results are now looked up by fingerprint (which covers job version, resume and model)
+alter table evaluations drop constraint if exists evaluations_application_id_job_version_resume_hash_model_key;
+create unique index if not exists evaluations_application_fingerprint_idx on evaluations(application_id, fingerprint);
+
+alter table applications
+add column if not exists eval_fingerprint text,
+add column if not exists eval_config text, -- "<model>:<prompt version>" of the current score
+add column if not exists eval_stale boolean default false not null;
+
+-- The re-scoring queue: only stale rows, highest current score first
+create index if not exists applications_eval_stale_idx on applications(overall_score desc nulls last, id)
+  where eval_stale;
+
+-- security definer: a candidate editing their own resume can't update applications under RLS
+create or replace function mark_job_evaluations_stale()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if new.version is distinct from old.version then
+    update applications
+    set eval_stale = true
+    where job_id = new.id
+      and not eval_stale
+      and (overall_score is not null or eval_fingerprint is not null);
+  end if;
+  return null;
+end;
+$$;
+
+create or replace function mark_candidate_evaluations_stale()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  -- The candidate fields the prompt reads (src/evaluations.py CANDIDATE_FIELDS + resume)
+  if new.resume_text is distinct from old.resume_text
+     or new.full_name is distinct from old.full_name
+     or new.location is distinct from old.location
+     or new.links is distinct from old.links then
+    update applications
+    set eval_stale = true
+    where candidate_id = new.id
+      and not eval_stale
+      and (overall_score is not null or eval_fingerprint is not null);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists jobs_mark_evaluations_stale on jobs;
+create trigger jobs_mark_evaluations_stale
+  after update on jobs
+  for each row execute function mark_job_evaluations_stale();
+
+drop trigger if exists candidates_mark_evaluations_stale on candidates;
+create trigger candidates_mark_evaluations_stale
+  after update of resume_text, full_name, location, links on candidates
+  for each row execute function mark_candidate_evaluations_stale();
+
+-- Prompt / model changes aren't visible to triggers: the re-scoring job calls this
+-- with the current "<model>:<prompt version>" to flag everything scored under another.
+create or replace function mark_stale_evaluations(p_config text)
+returns bigint
+language sql
+as $$
+  with flagged as (
+    update applications
+    set eval_stale = true
+    where not eval_stale
+      and overall_score is not null
+      and eval_config is distinct from p_config
+    returning 1
+  )
+  select count(*) from flagged
+$$;
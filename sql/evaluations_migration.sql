@@ -0,0 +1,63 @@
+-- Persisted, versioned candidate evaluations
+-- The full EvaluationResult (strengths, concerns, missing must-haves, interview
+-- questions...) is stored per application, keyed by the inputs that produced it:
+-- job version, resume text hash and model. Re-running with unchanged inputs reuses
+-- the stored row instead of calling the LLM again. applications keeps its summary
+-- columns (overall_score, ai_summary...) for lists and the dashboard.
+-- Run after rls_performance_migration.sql. Safe to re-run.
+
+-- Job version, bumped whenever a field the evaluation prompt reads changes
+alter table jobs
+add column if not exists version int default 1 not null;
+
+create or replace function bump_job_version()
+returns trigger
+language plpgsql
+as $$
+begin
+  if (new.title, new.team, new.location, new.employment_type, new.comp_range_min, new.comp_range_max,
+      new.must_have_skills, new.nice_to_have_skills, new.responsibilities, new.jd_text)
+     is distinct from
+     (old.title, old.team, old.location, old.employment_type, old.comp_range_min, old.comp_range_max,
+      old.must_have_skills, old.nice_to_have_skills, old.responsibilities, old.jd_text) then
+    new.version := old.version + 1;
+  end if;
+  return new;
+end;
+$$;
+
+drop trigger if exists jobs_bump_version on jobs;
+create trigger jobs_bump_version
+  before update on jobs
+  for each row execute function bump_job_version();
+
+create table if not exists evaluations (
+  id uuid default uuid_generate_v4() primary key,
+  application_id uuid references applications(id) on delete cascade not null,
+  job_id uuid references jobs(id) on delete cascade not null,
+  job_version int not null,
+  resume_hash text not null, -- sha256 of the resume text sent to the model
+  model text not null,
+  overall_score numeric,
+  result jsonb not null, -- full EvaluationResult
+  created_by uuid references profiles(id) on delete set null,
+  created_at timestamptz default now() not null,
+  unique (application_id, job_version, resume_hash, model)
+);
+
+-- Latest evaluation per application (embedded in the application bundle query)
+create index if not exists evaluations_application_created_at_idx on evaluations(application_id, created_at desc);
+
+alter table evaluations enable row level security;
+
+drop policy if exists "Staff can view evaluations" on evaluations;
+create policy "Staff can view evaluations" on evaluations
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+drop policy if exists "Recruiters/Admins can save evaluations" on evaluations;
+create policy "Recruiters/Admins can save evaluations" on evaluations
+  for insert with check ((select get_my_role()) in ('admin', 'recruiter'));
+
+drop policy if exists "Recruiters/Admins can update evaluations" on evaluations;
+create policy "Recruiters/Admins can update evaluations" on evaluations
+  for update using ((select get_my_role()) in ('admin', 'recruiter'));
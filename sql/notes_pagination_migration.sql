@@ -0,0 +1,7 @@
+-- Notes pagination
+-- Notes are read per application in (created_at, id) keyset pages, newest first,
+-- plus "since" fetches for new notes; one composite index serves both directions.
+-- It supersedes notes_application_id_idx. Safe to re-run.
+
+create index if not exists notes_application_created_at_id_idx on notes(application_id, created_at, id);
+drop index if exists notes_application_id_idx;
@@ -0,0 +1,18 @@
+-- Resume file storage
+-- Originals are stored in the private 'resumes' bucket under a content-addressed
+-- path (<sha256[:2]>/<sha256>.<ext>), and the hash is kept on the candidate so a
+-- re-uploaded resume is matched to the existing, already-parsed candidate.
+
+alter table candidates
+add column if not exists resume_sha256 text;
+
+create index if not exists candidates_resume_sha256_idx on candidates(resume_sha256);
+
+-- Storage policies for the private bucket (create the bucket in the dashboard first)
+drop policy if exists "Authenticated users can read resumes" on storage.objects;
+create policy "Authenticated users can read resumes" on storage.objects
+  for select using (bucket_id = 'resumes' and (select auth.uid()) is not null);
+
+drop policy if exists "Authenticated users can upload resumes" on storage.objects;
+create policy "Authenticated users can upload resumes" on storage.objects
+  for insert with check (bucket_id = 'resumes' and (select auth.uid()) is not null);
@@ -0,0 +1,129 @@
+-- RLS performance overhaul
+-- Run after rls_policies.sql and candidate_portal_migration.sql. Safe to re-run.
+--
+-- Why:
+-- * get_my_role() was a plain (VOLATILE) function, so Postgres called it - and its
+--   profiles lookup - once per row checked. It is now STABLE and every policy wraps
+--   it as (select get_my_role()), which the planner hoists into a one-off InitPlan.
+-- * auth.uid() is likewise wrapped as (select auth.uid()).
+-- * Candidate policies used `candidate_id IN (SELECT id FROM candidates WHERE user_id = auth.uid())`.
+--   That is replaced by get_my_candidate_ids(), evaluated once per statement.
+-- * Indexes back the columns the policies and the app filter on.
+--
+-- Semantics are unchanged: every policy grants exactly what it did before.
+
+-- --- Helper functions ---
+
+create or replace function get_my_role()
+returns user_role
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select role from public.profiles where id = auth.uid()
+$$;
+
+create or replace function get_my_candidate_ids()
+returns uuid[]
+language sql
+stable
+security definer
+set search_path = public
+as $$
+  select coalesce(array_agg(id), '{}'::uuid[]) from public.candidates where user_id = auth.uid()
+$$;
+
+-- --- Supporting indexes ---
+-- profiles(id) is the primary key; applications(job_id, candidate_id) is covered by the unique constraint.
+create index if not exists candidates_user_id_idx on candidates(user_id);
+create index if not exists applications_candidate_id_idx on applications(candidate_id);
+create index if not exists notes_application_id_idx on notes(application_id);
+create index if not exists jobs_status_idx on jobs(status);
+create index if not exists audit_log_created_at_idx on audit_log(created_at desc);
+
+-- --- PROFILES ---
+drop policy if exists "Users can view own profile" on profiles;
+create policy "Users can view own profile" on profiles
+  for select using ((select auth.uid()) = id);
+
+drop policy if exists "Users can insert own profile" on profiles;
+create policy "Users can insert own profile" on profiles
+  for insert with check ((select auth.uid()) = id);
+
+drop policy if exists "Users can update own profile" on profiles;
+create policy "Users can update own profile" on profiles
+  for update using ((select auth.uid()) = id);
+
+drop policy if exists "Admins can view all profiles" on profiles;
+create policy "Admins can view all profiles" on profiles
+  for select using ((select get_my_role()) = 'admin');
+
+-- --- JOBS ---
+drop policy if exists "Recruiters/Admins can insert jobs" on jobs;
+create policy "Recruiters/Admins can insert jobs" on jobs
+  for insert with check ((select get_my_role()) in ('admin', 'recruiter'));
+
+drop policy if exists "Recruiters/Admins can update jobs" on jobs;
+create policy "Recruiters/Admins can update jobs" on jobs
+  for update using ((select get_my_role()) in ('admin', 'recruiter'));
+
+-- --- CANDIDATES ---
+drop policy if exists "Authorized users can view candidates" on candidates;
+create policy "Authorized users can view candidates" on candidates
+  for select using ((select auth.uid()) is not null);
+
+drop policy if exists "Recruiters/Admins can create candidates" on candidates;
+create policy "Recruiters/Admins can create candidates" on candidates
+  for insert with check ((select get_my_role()) in ('admin', 'recruiter'));
+
+drop policy if exists "Candidates can view own profile" on candidates;
+create policy "Candidates can view own profile" on candidates
+  for select using ((select auth.uid()) = user_id);
+
+drop policy if exists "Candidates can update own profile" on candidates;
+create policy "Candidates can update own profile" on candidates
+  for update using ((select auth.uid()) = user_id);
+
+drop policy if exists "Candidates can insert own profile" on candidates;
+create policy "Candidates can insert own profile" on candidates
+  for insert with check ((select auth.uid()) = user_id);
+
+-- --- APPLICATIONS ---
+drop policy if exists "Authorized users can view applications" on applications;
+create policy "Authorized users can view applications" on applications
+  for select using ((select auth.uid()) is not null);
+
+drop policy if exists "Recruiters/Admins can update applications" on applications;
+create policy "Recruiters/Admins can update applications" on applications
+  for update using ((select get_my_role()) in ('admin', 'recruiter'));
+
+drop policy if exists "Recruiters/Admins can insert applications" on applications;
+create policy "Recruiters/Admins can insert applications" on applications
+  for insert with check ((select get_my_role()) in ('admin', 'recruiter'));
+
+drop policy if exists "Candidates can view own applications" on applications;
+create policy "Candidates can view own applications" on applications
+  for select using (candidate_id = any ((select get_my_candidate_ids())::uuid[]));
+
+drop policy if exists "Candidates can apply" on applications;
+create policy "Candidates can apply" on applications
+  for insert with check (candidate_id = any ((select get_my_candidate_ids())::uuid[]));
+
+-- --- NOTES ---
+drop policy if exists "Authorized users can view notes" on notes;
+create policy "Authorized users can view notes" on notes
+  for select using ((select auth.uid()) is not null);
+
+drop policy if exists "Authenticated users can create notes" on notes;
+create policy "Authenticated users can create notes" on notes
+  for insert with check ((select auth.uid()) = author_id);
+
+-- --- AUDIT LOG ---
+drop policy if exists "Admins can view audit logs" on audit_log;
+create policy "Admins can view audit logs" on audit_log
+  for select using ((select get_my_role()) = 'admin');
+
+drop policy if exists "System/Users can insert audit logs" on audit_log;
+create policy "System/Users can insert audit logs" on audit_log
+  for insert with check ((select auth.uid()) = actor_id);
@@ -0,0 +1,177 @@
+-- Stage-transition history and time-in-stage analytics
+-- Every change to applications.stage (and every new application) is recorded in
+-- application_stage_events by trigger, so the db layer can't forget to write it.
+-- applications.stage_entered_at mirrors the latest event for cheap "stuck" lookups.
+-- The aggregation functions below run server-side and return a few summary rows;
+-- the Dashboard calls them via RPC instead of pulling raw events.
+-- Run after rls_performance_migration.sql. Safe to re-run.
+
+create table if not exists application_stage_events (
+  id bigint generated always as identity primary key,
+  application_id uuid references applications(id) on delete cascade not null,
+  job_id uuid references jobs(id) on delete cascade not null,
+  from_stage application_stage, -- null for the application's first event
+  to_stage application_stage not null,
+  changed_by uuid references profiles(id) on delete set null,
+  changed_at timestamptz default now() not null
+);
+
+-- Per-application history in order (lead() over application), job-scoped and global windows
+create index if not exists stage_events_application_idx on application_stage_events(application_id, changed_at);
+create index if not exists stage_events_job_changed_at_idx on application_stage_events(job_id, changed_at);
+create index if not exists stage_events_changed_at_idx on application_stage_events(changed_at);
+
+alter table applications
+add column if not exists stage_entered_at timestamptz;
+
+update applications set stage_entered_at = coalesce(updated_at, created_at) where stage_entered_at is null;
+
+alter table applications alter column stage_entered_at set default now();
+
+-- Stuck-candidate scans only ever look at open applications
+create index if not exists applications_open_stage_entered_idx on applications(stage_entered_at)
+  where stage not in ('hired', 'rejected');
+
+-- --- Triggers ---
+
+create or replace function set_stage_entered_at()
+returns trigger
+language plpgsql
+as $$
+begin
+  if tg_op = 'INSERT' or new.stage is distinct from old.stage then
+    new.stage_entered_at := now();
+  end if;
+  return new;
+end;
+$$;
+
+-- security definer: users have no insert policy on the events table
+create or replace function record_stage_event()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if tg_op = 'INSERT' then
+    insert into application_stage_events (application_id, job_id, from_stage, to_stage, changed_by, changed_at)
+    values (new.id, new.job_id, null, new.stage, auth.uid(), new.stage_entered_at);
+  elsif new.stage is distinct from old.stage then
+    insert into application_stage_events (application_id, job_id, from_stage, to_stage, changed_by, changed_at)
+    values (new.id, new.job_id, old.stage, new.stage, auth.uid(), new.stage_entered_at);
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists applications_set_stage_entered_at on applications;
+create trigger applications_set_stage_entered_at
+  before insert or update of stage on applications
+  for each row execute function set_stage_entered_at();
+
+drop trigger if exists applications_record_stage_event on applications;
+create trigger applications_record_stage_event
+  after insert or update of stage on applications
+  for each row execute function record_stage_event();
+
+-- Backfill: one event per existing application at the time it entered its current stage.
+-- Earlier transitions were never recorded and can't be recovered.
+insert into application_stage_events (application_id, job_id, from_stage, to_stage, changed_at)
+select a.id, a.job_id, null, a.stage, a.stage_entered_at
+from applications a
+where not exists (select 1 from application_stage_events e where e.application_id = a.id);
+
+-- --- RLS ---
+alter table application_stage_events enable row level security;
+
+drop policy if exists "Staff can view stage events" on application_stage_events;
+create policy "Staff can view stage events" on application_stage_events
+  for select using ((select get_my_role()) in ('admin', 'recruiter', 'manager'));
+
+-- --- Aggregations (security invoker: callers only see what RLS lets them) ---
+
+-- Hours spent in each stage, over stage entries since p_since. Only completed stays
+-- count towards the percentiles; `in_stage_now` is the number still sitting there.
+create or replace function stage_time_stats(p_job_id uuid default null, p_since timestamptz default now() - interval '90 days')
+returns table (
+  stage application_stage,
+  completed bigint,
+  in_stage_now bigint,
+  p50_hours double precision,
+  p90_hours double precision,
+  avg_hours double precision
+)
+language sql
+stable
+as $$
+  with stays as (
+    select
+      e.to_stage,
+      e.changed_at,
+      lead(e.changed_at) over (partition by e.application_id order by e.changed_at, e.id) as left_at
+    from application_stage_events e
+    where e.changed_at >= p_since
+      and (p_job_id is null or e.job_id = p_job_id)
+  ),
+  durations as (
+    select to_stage, left_at, extract(epoch from left_at - changed_at) / 3600.0 as hours
+    from stays
+  )
+  select
+    to_stage,
+    count(left_at),
+    count(*) filter (where left_at is null and to_stage not in ('hired', 'rejected')),
+    percentile_cont(0.5) within group (order by hours),
+    percentile_cont(0.9) within group (order by hours),
+    avg(hours)
+  from durations
+  group by to_stage
+  order by to_stage
+$$;
+
+-- Applications entering each stage per week, for the last p_weeks weeks
+create or replace function stage_weekly_flow(p_job_id uuid default null, p_weeks int default 12)
+returns table (week date, stage application_stage, entered bigint)
+language sql
+stable
+as $$
+  select date_trunc('week', e.changed_at)::date, e.to_stage, count(*)
+  from application_stage_events e
+  where e.changed_at >= date_trunc('week', now()) - make_interval(weeks => p_weeks - 1)
+    and (p_job_id is null or e.job_id = p_job_id)
+  group by 1, 2
+  order by 1, 2
+$$;
+
+-- Open applications that have sat in their current stage for at least p_min_days, oldest first
+create or replace function stuck_applications(p_job_id uuid default null, p_min_days int default 14, p_limit int default 50)
+returns table (
+  application_id uuid,
+  job_id uuid,
+  job_title text,
+  candidate_name text,
+  stage application_stage,
+  stage_entered_at timestamptz,
+  days_in_stage double precision
+)
+language sql
+stable
+as $$
+  select
+    a.id,
+    a.job_id,
+    j.title,
+    c.full_name,
+    a.stage,
+    a.stage_entered_at,
+    extract(epoch from now() - a.stage_entered_at) / 86400.0
+  from applications a
+  join jobs j on j.id = a.job_id
+  join candidates c on c.id = a.candidate_id
+  where a.stage not in ('hired', 'rejected')
+    and a.stage_entered_at < now() - make_interval(days => p_min_days)
+    and (p_job_id is null or a.job_id = p_job_id)
+  order by a.stage_entered_at
+  limit p_limit
+$$;
@@ -0,0 +1,48 @@
+-- Admin user directory
+-- Role counts are aggregated in Postgres, and role changes from the admin grid are
+-- applied in one call. profiles only lets users update their own row, so the bulk
+-- update is a security definer function that checks the caller is an admin.
+-- Run after rls_performance_migration.sql. Safe to re-run.
+
+create extension if not exists pg_trgm;
+
+-- Directory search is `full_name ilike '%term%'`, ordered by created_at
+create index if not exists profiles_full_name_trgm_idx on profiles using gin (full_name gin_trgm_ops);
+create index if not exists profiles_created_at_idx on profiles(created_at desc);
+create index if not exists profiles_role_idx on profiles(role);
+
+create or replace function profile_role_counts()
+returns table (role user_role, users bigint)
+language sql
+stable
+as $$
+  select role, count(*) from profiles group by role order by role
+$$;
+
+-- p_changes: [{"id": "<uuid>", "role": "<user_role>"}, ...]
+-- Returns the ids whose role actually changed. Admins can't change their own role
+-- here, so a bulk edit can't lock the last admin out.
+create or replace function set_user_roles(p_changes jsonb)
+returns setof uuid
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+  if (select get_my_role()) is distinct from 'admin' then
+    raise exception 'Only admins can change user roles' using errcode = '42501';
+  end if;
+
+  return query
+  update profiles p
+  set role = c.role
+  from jsonb_to_recordset(p_changes) as c(id uuid, role user_role)
+  where p.id = c.id
+    and p.id <> auth.uid()
+    and p.role is distinct from c.role
+  returning p.id;
+end;
+$$;
+
+revoke execute on function set_user_roles(jsonb) from public, anon;
+grant execute on function set_user_roles(jsonb) to authenticated;
@@ -0,0 +1,123 @@
+"""
+Pipeline analytics over the Parquet snapshots written by src/export.py.
+
+Everything here is column-at-a-time pandas/pyarrow (groupby, crosstab, cut); no
+per-row Python, so it holds up on millions of applications. Tables are read through
+pyarrow.dataset with column projection and collapsed to the latest version of each
+id, since incremental exports append changed rows as new parts.
+"""
+from typing import Optional, List
+
+from src.constants import STAGES, PIPELINE_STAGES
+from src.export import EXPORT_TABLES, get_export_dir
+
+def load_table(table: str, export_dir: Optional[str] = None, columns: Optional[List[str]] = None):
+    """Latest row per id across all part files of `table`, as a DataFrame."""
+    import pandas as pd
+    import pyarrow.dataset as ds
+    from src.export import arrow_schema
+
+    wm_col = EXPORT_TABLES[table]["watermark"]
+    table_dir = get_export_dir(export_dir) / table
+    parts = sorted(table_dir.glob("part-*.parquet")) if table_dir.exists() else []
+    wanted = None
+    if columns:
+        wanted = list(dict.fromkeys(["id", wm_col] + list(columns)))
+    if not parts:
+        schema = arrow_schema(table)
+        return schema.empty_table().to_pandas()[wanted or schema.names]
+
+    dataset = ds.dataset([str(p) for p in parts], format="parquet", schema=arrow_schema(table))
+    df = dataset.to_table(columns=wanted).to_pandas()
+    # Part files are in export order, so a stable sort on the watermark keeps the newest copy last
+    df = df.sort_values(wm_col, kind="stable").drop_duplicates("id", keep="last")
+    return df.reset_index(drop=True)
+
+def _furthest_stage(stage):
+    """Index of each application's stage in PIPELINE_STAGES (-1 for rejected / unknown)."""
+    import pandas as pd
+    order = pd.CategoricalDtype(PIPELINE_STAGES, ordered=True)
+    return stage.astype(order).cat.codes
+
+def stage_counts(applications):
+    """Current number of applications per stage, in STAGES order."""
+    return applications["stage"].value_counts().reindex(STAGES, fill_value=0)
+
+def funnel(applications):
+    """
+    Applications that reached each pipeline stage, with step and overall conversion.
+
+    Based on current stage: an application now at 'offer' counts as having reached
+    new, screened, interview and offer. Rejected applications only count towards
+    'new', since the stage they were rejected from isn't in the snapshot.
+    """
+    import numpy as np
+    import pandas as pd
+    codes = _furthest_stage(applications["stage"]).to_numpy()
+    total = len(applications)
+    # reached[k] = applications whose furthest stage >= k; cumulative sum from the end
+    at_stage = np.bincount(codes[codes >= 0], minlength=len(PIPELINE_STAGES))
+    reached = at_stage[::-1].cumsum()[::-1]
+    reached[0] = total
+    df = pd.DataFrame({"stage": PIPELINE_STAGES, "reached": reached})
+    previous = df["reached"].shift(1).fillna(total)
+    df["step_conversion"] = np.where(previous > 0, df["reached"] / previous, 0.0)
+    df["overall_conversion"] = df["reached"] / total if total else 0.0
+    return df
+
+def funnel_by_job(applications, jobs):
+    """Per-job stage counts plus hire and interview rates, largest jobs first."""
+    import pandas as pd
+    counts = pd.crosstab(applications["job_id"], applications["stage"])
+    counts = counts.reindex(columns=STAGES, fill_value=0)
+    counts["total"] = counts.sum(axis=1)
+    reached_interview = counts[["interview", "offer", "hired"]].sum(axis=1)
+    counts["interview_rate"] = reached_interview / counts["total"]
+    counts["hire_rate"] = counts["hired"] / counts["total"]
+    titles = jobs.set_index("id")[["title", "status"]]
+    result = counts.join(titles, how="left").reset_index().rename(columns={"index": "job_id"})
+    return result.sort_values("total", ascending=False).reset_index(drop=True)
+
+def cohort_metrics(applications, freq: str = "W"):
+    """
+    Applications grouped into cohorts by creation period (`freq`: "W", "M", ...),
+    with the share of each cohort that has reached interview / been hired / rejected.
+    """
+    import pandas as pd
+    codes = _furthest_stage(applications["stage"])
+    # Naive UTC so to_period doesn't warn about dropping the timezone
+    created = applications["created_at"].dt.tz_convert("UTC").dt.tz_localize(None)
+    frame = pd.DataFrame({
+        "cohort": created.dt.to_period(freq).dt.start_time,
+        "reached_interview": codes >= PIPELINE_STAGES.index("interview"),
+        "hired": applications["stage"] == "hired",
+        "rejected": applications["stage"] == "rejected",
+        "overall_score": applications["overall_score"]
+    })
+    grouped = frame.groupby("cohort")
+    result = grouped.agg(
+        applications=("hired", "size"),
+        interview_rate=("reached_interview", "mean"),
+        hire_rate=("hired", "mean"),
+        rejection_rate=("rejected", "mean"),
+        avg_score=("overall_score", "mean")
+    )
+    return result.reset_index()
+
+def score_distribution(applications, bins: int = 10, by: str = "stage"):
+    """Histogram of overall_score (0-100) per `by` column; unscored applications are skipped."""
+    import numpy as np
+    import pandas as pd
+    scored = applications.dropna(subset=["overall_score"])
+    edges = np.linspace(0, 100, bins + 1)
+    buckets = pd.cut(scored["overall_score"], edges, include_lowest=True)
+    return pd.crosstab(buckets, scored[by])
+
+def load_pipeline(export_dir: Optional[str] = None):
+    """(applications, jobs) with just the columns the metrics above use."""
+    applications = load_table(
+        "applications", export_dir,
+        columns=["job_id", "candidate_id", "stage", "overall_score", "created_at"]
+    )
+    jobs = load_table("jobs", export_dir, columns=["title", "status"])
+    return applications, jobs
@@ -0,0 +1,203 @@
+import time
+import atexit
+import threading
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+import streamlit as st
+
+from src.constants import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_FLUSH_INTERVAL_SECONDS,
+    AUDIT_MAX_BUFFERED,
+    AUDIT_MAX_ATTEMPTS
+)
+
+# Audit trail writer.
+# log_event() only appends to an in-process buffer; a background thread inserts
+# buffered rows in batches (every AUDIT_FLUSH_INTERVAL_SECONDS or AUDIT_BATCH_SIZE
+# rows, whichever comes first), so a page action never waits on an audit insert.
+# Rows are timestamped when logged, not when flushed. Batches are written with the
+# service-role client when configured, since one batch can hold several users' events.
+# Without it, each row remembers the JWT of the session that logged it and batches
+# only group rows of the same session, written with that session's credentials;
+# retries are counted per session, so one session's failing batch doesn't hold up
+# the others, and events logged outside a session are rejected (and counted) up
+# front since RLS would refuse them.
+
+JOB_CREATED = "JOB_CREATED"
+STAGE_CHANGED = "APPLICATION_STAGE_CHANGED"
+CANDIDATE_EVALUATED = "CANDIDATE_EVALUATED"
+USER_ROLE_CHANGED = "USER_ROLE_CHANGED"
+
+AUDIT_ACTIONS = [JOB_CREATED, STAGE_CHANGED, CANDIDATE_EVALUATED, USER_ROLE_CHANGED]
+AUDIT_ENTITY_TYPES = ["job", "application", "profile"]
+
+class AuditWriter:
+    def __init__(self, batch_size: int = AUDIT_BATCH_SIZE, interval: float = AUDIT_FLUSH_INTERVAL_SECONDS):
+        self.batch_size = batch_size
+        self.interval = interval
+        self._buffer: List[Dict[str, Any]] = []
+        # Failed attempts per batch key (the session token; None with the service client)
+        self._attempts: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so a batch is never inserted twice
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"logged": 0, "written": 0, "dropped": 0, "rejected": 0, "batches": 0, "failures": 0}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def log(self, row: Dict[str, Any]):
+        with self._lock:
+            if len(self._buffer) >= AUDIT_MAX_BUFFERED:
+                # Database unreachable for a while: shed the oldest rather than grow without bound
+                self._buffer.pop(0)
+                self.stats["dropped"] += 1
+            self._buffer.append(row)
+            self.stats["logged"] += 1
+            full = len(self._buffer) >= self.batch_size
+        self._ensure_thread()
+        if full:
+            self._wake.set()
+
+    def reject(self):
+        with self._lock:
+            self.stats["rejected"] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def _next_batch(self, per_session: bool, skip: set) -> List[Dict[str, Any]]:
+        """Next batch to write; in per-session mode, of the oldest session not in `skip`."""
+        with self._lock:
+            if not per_session:
+                return self._buffer[:self.batch_size]
+            pending = [r for r in self._buffer if r.get(TOKEN_FIELD) not in skip]
+            if not pending:
+                return []
+            token = pending[0].get(TOKEN_FIELD)
+            return [r for r in pending if r.get(TOKEN_FIELD) == token][:self.batch_size]
+
+    def _remove(self, batch: List[Dict[str, Any]]):
+        ids = {id(r) for r in batch}
+        with self._lock:
+            self._buffer = [r for r in self._buffer if id(r) not in ids]
+
+    def flush(self) -> int:
+        """Write everything buffered so far. Returns rows written."""
+        from src.db import insert_audit_logs, create_session_client
+        written = 0
+        with self._flush_lock:
+            service = _service_client()
+            # Sessions whose batch failed this round; their rows wait for the next tick
+            skip = set()
+            while True:
+                batch = self._next_batch(per_session=service is None, skip=skip)
+                if not batch:
+                    return written
+                key = None if service else batch[0].get(TOKEN_FIELD)
+                client = service or create_session_client(key)
+                rows = [{k: v for k, v in r.items() if k != TOKEN_FIELD} for r in batch]
+                if not insert_audit_logs(rows, client=client):
+                    self.stats["failures"] += 1
+                    self._attempts[key] = self._attempts.get(key, 0) + 1
+                    if self._attempts[key] < AUDIT_MAX_ATTEMPTS:
+                        if service:
+                            return written  # keep the batch, retry on the next tick
+                        skip.add(key)
+                        continue
+                    self._remove(batch)
+                    self.stats["dropped"] += len(batch)
+                    self._attempts.pop(key, None)
+                    continue
+                self._remove(batch)
+                self._attempts.pop(key, None)
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+                written += len(batch)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+# Not persisted: the JWT a row is written with when there is no service-role client
+TOKEN_FIELD = "_token"
+
+_service = None
+_service_checked = False
+
+def _service_client():
+    """Service-role client if configured, else None (rows are written per session)."""
+    global _service, _service_checked
+    if not _service_checked:
+        from src.db import get_service_client
+        try:
+            _service = get_service_client()
+        except Exception:
+            _service = None
+        _service_checked = True
+    return _service
+
+@st.cache_resource
+def get_audit_writer() -> AuditWriter:
+    writer = AuditWriter()
+    atexit.register(writer.flush)
+    return writer
+
+def _current_actor_id() -> Optional[str]:
+    try:
+        user = st.session_state.get("user")
+    except Exception:
+        return None
+    return getattr(user, "id", None)
+
+def log_event(
+    action: str,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    actor_id: Optional[str] = None
+):
+    """Queue an audit row. Never raises and never blocks on the database."""
+    try:
+        from src.db import current_access_token
+        token = current_access_token()
+        if token is None and _service_client() is None:
+            # No session to write it as and no service key: RLS would refuse the insert
+            get_audit_writer().reject()
+            from src.metrics import record_error
+            record_error("Audit event rejected", ValueError(f"{action} logged without a session and no service key"))
+            return
+        get_audit_writer().log({
+            TOKEN_FIELD: token,
+            "actor_id": actor_id or _current_actor_id(),
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "metadata": metadata or {},
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+    except Exception as e:
+        from src.metrics import record_error
+        record_error("Error queueing audit event", e)
+
+def flush_audit_log(timeout: float = 5.0) -> bool:
+    """Flush synchronously (tests, scripts, before showing the audit viewer). True if the buffer drained."""
+    writer = get_audit_writer()
+    deadline = time.monotonic() + timeout
+    while writer.pending() and time.monotonic() < deadline:
+        if not writer.flush():
+            time.sleep(0.1)
+    return writer.pending() == 0
+
+def get_audit_writer_stats() -> Dict[str, int]:
+    writer = get_audit_writer()
+    return {**writer.stats, "pending": writer.pending()}
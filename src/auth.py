@@ -1,15 +1,17 @@
 import streamlit as st
 
-from src.db import get_supabase_client
+from src.db import create_session_client, set_session_auth, current_access_token
 
 def login_user(email, password):
     """
     Login with Supabase Auth.
     Returns the session object or None if failed.
+    The session's own client is authenticated with the new JWT; no other session sees it.
     """
-    supabase = get_supabase_client()
     try:
-        response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+        response = create_session_client().auth.sign_in_with_password({"email": email, "password": password})
+        if response.session:
+            set_session_auth(response.session)
         return response.session, response.user
     except Exception as e:
         st.error(f"Login Failed: {e}")
@@ -17,11 +19,13 @@ def login_user(email, password):
 
 def logout_user():
     """Sign out."""
-    supabase = get_supabase_client()
-    try:
-        supabase.auth.sign_out()
-    except Exception as e:
-        st.warning("One (1) issue signing out: " + str(e))
+    token = current_access_token()
+    if token:
+        try:
+            # Revokes this session's refresh token server-side
+            create_session_client(token).auth.admin.sign_out(token)
+        except Exception as e:
+            st.warning("One (1) issue signing out: " + str(e))
     
     # Clear session state
     for key in list(st.session_state.keys()):
@@ -20,3 +20,126 @@ SESSION_KEYS = {
     "PROFILE": "profile",
     "AUTH_EVENT": "auth_event"
 }
+
+# LLM pricing (USD per 1M tokens), used for telemetry cost estimates
+MODEL_PRICING = {
+    "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+    "gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40},
+    "gemini-2.5-pro": {"input": 1.25, "output": 10.00}
+}
+
+# Local store for telemetry (SQLite). Overridable via env for deployments.
+TELEMETRY_DB_PATH = "data/telemetry.sqlite3"
+
+# Resume storage
+RESUME_BUCKET = "resumes"
+# Supabase resumable uploads require 6 MB chunks; also the in-memory spool limit
+STORAGE_CHUNK_SIZE = 6 * 1024 * 1024
+
+# Uploads (resumes, job descriptions): rejected above this size before any parsing
+UPLOAD_MAX_BYTES = 20 * 1024 * 1024
+# Uploads larger than this are spooled to a temp file (and read via mmap)
+UPLOAD_SPOOL_BYTES = 1024 * 1024
+# Zip-based formats (DOCX/ODT): limit on total uncompressed size (zip bombs)
+UPLOAD_MAX_UNCOMPRESSED_BYTES = 100 * 1024 * 1024
+# Extensions offered by the upload widgets; the actual format is sniffed from content
+UPLOAD_EXTENSIONS = ["pdf", "docx", "odt", "rtf", "txt", "html", "htm"]
+
+# Candidate identity resolution (MinHash / LSH duplicate detection)
+MINHASH_PERMUTATIONS = 128
+# 16 bands x 8 rows: pairs above ~0.7 Jaccard very likely share a band
+LSH_BANDS = 16
+DUPLICATE_SIMILARITY_THRESHOLD = 0.8
+
+# STAGES without 'rejected', in pipeline order ('rejected' can happen from any stage)
+PIPELINE_STAGES = [s for s in STAGES if s != "rejected"]
+# Applications (and notes) of jobs closed at least this long are archived; pipeline
+# lists and re-scoring skip them unless asked to include archived rows
+ARCHIVE_AFTER_CLOSED_DAYS = 90
+
+# Analytics snapshot export (Parquet). Overridable via EXPORT_DIR env.
+EXPORT_DIR = "data/exports"
+# PostgREST's default max-rows; one keyset page per request
+EXPORT_PAGE_SIZE = 1000
+# Rows buffered per Parquet row group
+EXPORT_ROW_GROUP_SIZE = 100_000
+# Each incremental run re-reads this far behind the watermark, so rows committed
+# late by long transactions (updated_at = transaction start) are not missed
+EXPORT_OVERLAP_SECONDS = 300
+
+# Audit log writer: rows are buffered and inserted in batches by a background thread
+AUDIT_BATCH_SIZE = 50
+AUDIT_FLUSH_INTERVAL_SECONDS = 2.0
+AUDIT_MAX_BUFFERED = 10_000
+# Flush attempts before a failing batch is dropped
+AUDIT_MAX_ATTEMPTS = 5
+AUDIT_PAGE_SIZE = 50
+USER_PAGE_SIZE = 50
+NOTES_PAGE_SIZE = 20
+
+# Evaluation prompt version. Bump whenever build_evaluation_prompt changes in a way
+# that should invalidate stored scores; it is part of every evaluation fingerprint.
+PROMPT_VERSION = "1"
+# Re-scoring job defaults (LLM budget per run)
+RESCORE_MAX_CALLS = 25
+RESCORE_BATCH_SIZE = 50
+# Rough output size of one evaluation, for pre-call cost estimates
+EVALUATION_RESPONSE_TOKENS = 800
+# Evaluation cascade: rule-based pre-screen, then EVAL_FAST_MODEL, then MODEL_NAME
+# only for low-confidence or borderline results
+EVAL_CASCADE_ENABLED = True
+EVAL_FAST_MODEL = "gemini-2.5-flash-lite"
+# Pre-screen rejects without an LLM call when the job lists at least this many
+# must-have skills and the resume mentions fewer than this share of them
+EVAL_PRESCREEN_MIN_SKILLS = 3
+EVAL_PRESCREEN_MIN_COVERAGE = 0.34
+# Resumes shorter than this are never pre-screened (too little text to judge by keywords)
+EVAL_PRESCREEN_MIN_RESUME_CHARS = 300
+# Fast-model results are escalated below this confidence or inside this score band (inclusive)
+EVAL_ESCALATE_CONFIDENCE = 0.7
+EVAL_BORDERLINE_BAND = (50, 79)
+
+# Screening transcript analysis (map-reduce over token-sized chunks)
+SCREENING_CHUNK_TOKENS = 2000
+# Above this many tokens of chunk summaries, summaries are merged in groups before the final reduce
+SCREENING_REDUCE_TOKENS = 6000
+SCREENING_MAX_WORKERS = 4
+SCREENING_CHUNK_CACHE_SIZE = 2048
+
+# Outreach
+OUTREACH_COMPANY_NAME = "Acme Corp"
+# LLM templates per (job, tone); recipients are spread across variants
+OUTREACH_TEMPLATE_VARIANTS = 2
+OUTREACH_TEMPLATE_CACHE_SIZE = 256
+# Concurrent LLM calls for candidates flagged for deep personalization
+OUTREACH_MAX_WORKERS = 4
+
+# Session store: large per-session values live on disk, session_state keeps references.
+# Overridable via SESSION_STORE_DIR env.
+SESSION_STORE_DIR = "data/session_store"
+# Materialized values each session may keep in memory; least recently used are evicted
+SESSION_MEMORY_BUDGET_BYTES = 2 * 1024 * 1024
+# Blobs untouched for this long are deleted
+SESSION_STORE_TTL_SECONDS = 24 * 3600
+# Per-session footprint is re-measured at most this often, and forgotten after this much idle time
+SESSION_FOOTPRINT_INTERVAL_SECONDS = 30
+SESSION_FOOTPRINT_TTL_SECONDS = 3600
+
+# Supabase HTTP connection pool, shared by every session's client
+SUPABASE_POOL_MAX_CONNECTIONS = 100
+# Idle connections kept open; above this, connections opened for a burst are closed after use
+SUPABASE_POOL_MAX_KEEPALIVE = 50
+SUPABASE_POOL_KEEPALIVE_SECONDS = 30
+SUPABASE_HTTP_TIMEOUT_SECONDS = 60
+# Session access tokens are refreshed when they expire within this many seconds
+SUPABASE_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+# Process-wide LLM scheduler (Gemini quota shared by every session)
+LLM_REQUESTS_PER_MINUTE = 60
+LLM_TOKENS_PER_MINUTE = 250000
+# Response size reserved per call until the real usage is known
+LLM_RESPONSE_TOKENS_ESTIMATE = 1000
+# Calls waiting longer than this for a slot fail instead of hanging the page
+LLM_QUEUE_TIMEOUT_SECONDS = 120
+# Dispatch pause after the API answers 429 (quota exhausted)
+LLM_RATE_LIMIT_BACKOFF_SECONDS = 20
@@ -1,29 +1,165 @@
 import os
+import time
 import streamlit as st
-from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, TYPE_CHECKING
 from src.schemas import Job, Candidate, UserRole
+from src.metrics import instrumented, record_error
+from src import audit
+from src.constants import (
+    SUPABASE_POOL_MAX_CONNECTIONS,
+    SUPABASE_POOL_MAX_KEEPALIVE,
+    SUPABASE_POOL_KEEPALIVE_SECONDS,
+    SUPABASE_HTTP_TIMEOUT_SECONDS,
+    SUPABASE_TOKEN_REFRESH_MARGIN_SECONDS,
+    STAGES
+)
 
-# Initialize Supabase Client
-# We use a singleton pattern via st.cache_resource/cache_data isn't needed for the client object itself
-# if we just create it. But for connection pooling efficiency in Streamlit re-runs, caching is good.
+if TYPE_CHECKING:
+    from supabase import Client
 
-@st.cache_resource
-def get_supabase_client() -> Client:
+# Supabase clients.
+# Each browser session gets its own lightweight client carrying that user's JWT (or
+# the anon key before login), kept in st.session_state, so auth state and RLS context
+# are never shared between users. All of them send their requests through one
+# process-wide keep-alive httpx connection pool. Tokens are refreshed shortly before
+# they expire. Code running outside a session (scripts, background threads) gets an
+# anonymous client.
+
+SESSION_CLIENT_KEY = "supabase_client"
+SESSION_AUTH_KEY = "supabase_auth"
+
+def _supabase_settings() -> tuple:
     try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        return create_client(url, key)
-    except Exception as e:
+        return st.secrets["supabase"]["url"], st.secrets["supabase"]["key"]
+    except Exception:
         # Fallback to env vars if secrets not found (for local testing without streamlit run)
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_ANON_KEY")
         if not url or not key:
             raise ValueError("Supabase Response: Missing SUPABASE_URL or SUPABASE_ANON_KEY in secrets or env.")
-        return create_client(url, key)
+        return url, key
+
+@st.cache_resource
+def get_http_pool():
+    """Keep-alive connection pool shared by every session's Supabase client."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_POOL_KEEPALIVE_SECONDS
+        ),
+        timeout=httpx.Timeout(SUPABASE_HTTP_TIMEOUT_SECONDS, connect=10),
+        follow_redirects=True
+    )
+
+def create_session_client(access_token: Optional[str] = None) -> "Client":
+    """
+    New client over the shared pool, authenticated as `access_token` (anon key if None).
+    Clients are cheap; the pool, not the client, owns the connections.
+    """
+    # Imported lazily: supabase (httpx, realtime, gotrue...) costs ~0.4s and the
+    # login page only needs it once the form is submitted.
+    from supabase import create_client
+    from supabase.lib.client_options import SyncClientOptions
+    url, key = _supabase_settings()
+    options = SyncClientOptions(
+        headers={"Authorization": f"Bearer {access_token or key}"},
+        httpx_client=get_http_pool(),
+        # Sessions live in st.session_state, not in the client
+        auto_refresh_token=False,
+        persist_session=False
+    )
+    return create_client(url, key, options)
+
+@st.cache_resource
+def _anonymous_client() -> "Client":
+    return create_session_client()
+
+def _session_state():
+    # st.session_state is only usable from a page's script thread
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return st.session_state if get_script_run_ctx() is not None else None
+    except Exception:
+        return None
+
+def set_session_auth(session) -> "Client":
+    """Authenticate this browser session's client with a Supabase auth session (after login)."""
+    state = st.session_state
+    state[SESSION_AUTH_KEY] = {
+        "access_token": session.access_token,
+        "refresh_token": session.refresh_token,
+        "expires_at": session.expires_at
+    }
+    client = create_session_client(session.access_token)
+    state[SESSION_CLIENT_KEY] = client
+    return client
+
+def clear_session_auth():
+    st.session_state.pop(SESSION_AUTH_KEY, None)
+    st.session_state.pop(SESSION_CLIENT_KEY, None)
+
+def current_access_token() -> Optional[str]:
+    state = _session_state()
+    auth = state.get(SESSION_AUTH_KEY) if state is not None else None
+    return auth["access_token"] if auth else None
+
+def _refresh_session_auth(state, auth: Dict[str, Any]):
+    try:
+        response = create_session_client().auth.refresh_session(auth["refresh_token"])
+        if not response.session:
+            raise ValueError("no session returned")
+        set_session_auth(response.session)
+    except Exception as e:
+        # Refresh token revoked or expired: the user has to log in again
+        record_error("Error refreshing auth session", e)
+        clear_session_auth()
+        state.pop("user", None)
+
+def get_supabase_client() -> "Client":
+    """This browser session's client (anonymous until login)."""
+    state = _session_state()
+    if state is None:
+        return _anonymous_client()
+    auth = state.get(SESSION_AUTH_KEY)
+    if auth and auth.get("expires_at") and auth["expires_at"] - time.time() < SUPABASE_TOKEN_REFRESH_MARGIN_SECONDS:
+        _refresh_session_auth(state, auth)
+    client = state.get(SESSION_CLIENT_KEY)
+    if client is None:
+        auth = state.get(SESSION_AUTH_KEY)
+        client = create_session_client(auth["access_token"] if auth else None)
+        state[SESSION_CLIENT_KEY] = client
+    return client
+
+@st.cache_resource
+def get_service_client() -> "Client":
+    """Service-role client for offline jobs (exports, backfills). Bypasses RLS; never use it for page requests."""
+    from supabase import create_client
+    try:
+        url = st.secrets["supabase"]["url"]
+        key = st.secrets["supabase"]["service_key"]
+    except Exception:
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_KEY")
+    if not url or not key:
+        raise ValueError("Supabase Response: Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in secrets or env.")
+    return create_client(url, key)
+
+def _hot(query, include_archived: bool):
+    # Applications and notes of long-closed jobs are archived (sql/archive_migration.sql);
+    # list reads skip them unless the caller opts in
+    return query if include_archived else query.eq("archived", False)
+
+def _handle_error(message: str, error: Exception, show: bool = True):
+    """Record the error in db metrics (tagged with the calling function) and surface it."""
+    record_error(message, error)
+    if show:
+        st.error(f"{message}: {error}")
 
 # --- DB Operations ---
 
+@instrumented
 def get_user_role(user_id: str) -> Optional[str]:
     """Fetch user role from profiles table. Auto-create if missing."""
     supabase = get_supabase_client()
@@ -40,20 +176,25 @@ def get_user_role(user_id: str) -> Optional[str]:
             supabase.table("profiles").insert(data).execute()
             return "recruiter"
         except Exception as insert_error:
-            print(f"Error creating profile: {insert_error}")
+            _handle_error("Error creating profile", insert_error, show=False)
             
     return None
 
+@instrumented
 def create_job(job_data: Dict[str, Any]) -> Optional[Dict]:
     """Insert a new job"""
     supabase = get_supabase_client()
     try:
         response = supabase.table("jobs").insert(job_data).execute()
-        return response.data[0] if response.data else None
+        job = response.data[0] if response.data else None
+        if job:
+            audit.log_event(audit.JOB_CREATED, "job", job["id"], {"title": job.get("title")})
+        return job
     except Exception as e:
-        st.error(f"Error creating job: {e}")
+        _handle_error("Error creating job", e)
         return None
 
+@instrumented
 def get_jobs(user_role: str, user_id: str) -> List[Dict]:
     """
     Get jobs based on role.
@@ -68,9 +209,21 @@ def get_jobs(user_role: str, user_id: str) -> List[Dict]:
         response = query.execute()
         return response.data
     except Exception as e:
-        st.error(f"Error fetching jobs: {e}")
+        _handle_error("Error fetching jobs", e)
+        return []
+
+@instrumented
+def get_open_jobs() -> List[Dict]:
+    """Open jobs only (Candidate Portal job board)."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("jobs").select("*").eq("status", "open").execute()
+        return response.data
+    except Exception as e:
+        _handle_error("Error fetching jobs", e)
         return []
 
+@instrumented
 def get_job_by_id(job_id: str) -> Optional[Dict]:
     supabase = get_supabase_client()
     try:
@@ -79,15 +232,97 @@ def get_job_by_id(job_id: str) -> Optional[Dict]:
     except Exception:
         return None
 
+@instrumented
 def create_candidate(candidate_data: Dict[str, Any]) -> Optional[Dict]:
     supabase = get_supabase_client()
     try:
         response = supabase.table("candidates").insert(candidate_data).execute()
         return response.data[0] if response.data else None
     except Exception as e:
-        st.error(f"Error creating candidate: {e}")
+        _handle_error("Error creating candidate", e)
+        return None
+
+@instrumented
+def get_candidate_by_resume_hash(resume_sha256: str) -> Optional[Dict]:
+    """Existing candidate whose stored resume has this content hash, if any."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("candidates")\
+            .select("*")\
+            .eq("resume_sha256", resume_sha256)\
+            .order("created_at")\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        _handle_error("Error looking up resume", e, show=False)
         return None
 
+@instrumented
+def find_candidates_by_contact(email_key: Optional[str], phone_key: Optional[str]) -> List[Dict]:
+    """Candidates with the same normalized email or phone."""
+    conditions = []
+    if email_key:
+        conditions.append(f'email_key.eq."{email_key}"')
+    if phone_key:
+        conditions.append(f'phone_key.eq."{phone_key}"')
+    if not conditions:
+        return []
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("candidates")\
+            .select("id, full_name, email_key, phone_key")\
+            .or_(",".join(conditions))\
+            .order("created_at")\
+            .limit(10)\
+            .execute()
+        return response.data
+    except Exception as e:
+        _handle_error("Error matching candidate contacts", e, show=False)
+        return []
+
+@instrumented
+def find_candidates_by_lsh(band_keys: List[str]) -> List[str]:
+    """Candidate ids sharing at least one LSH band with the given keys."""
+    if not band_keys:
+        return []
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("candidate_lsh_bands")\
+            .select("candidate_id")\
+            .in_("band_key", band_keys)\
+            .limit(500)\
+            .execute()
+        return list(dict.fromkeys(r["candidate_id"] for r in response.data))
+    except Exception as e:
+        _handle_error("Error matching resume similarity", e, show=False)
+        return []
+
+@instrumented
+def get_candidate_signatures(candidate_ids: List[str]) -> List[Dict]:
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("candidates")\
+            .select("id, resume_minhash")\
+            .in_("id", candidate_ids)\
+            .execute()
+        return response.data
+    except Exception as e:
+        _handle_error("Error fetching resume signatures", e, show=False)
+        return []
+
+@instrumented
+def add_candidate_lsh_bands(candidate_id: str, band_keys: List[str]) -> bool:
+    supabase = get_supabase_client()
+    try:
+        rows = [{"band_key": k, "candidate_id": candidate_id} for k in band_keys]
+        supabase.table("candidate_lsh_bands").upsert(rows, ignore_duplicates=True).execute()
+        return True
+    except Exception as e:
+        _handle_error("Error indexing candidate", e, show=False)
+        return False
+
+@instrumented
 def create_application(application_data: Dict[str, Any]) -> Optional[Dict]:
     supabase = get_supabase_client()
     try:
@@ -100,73 +335,250 @@ def create_application(application_data: Dict[str, Any]) -> Optional[Dict]:
         if "duplicate key" in str(e):
              st.warning("Candidate already applied to this job.")
         else:
-             st.error(f"Error creating application: {e}")
+             _handle_error("Error creating application", e)
         return None
 
-def get_candidates_for_job(job_id: str) -> List[Dict]:
+@instrumented
+def get_candidates_for_job(job_id: str, include_archived: bool = False) -> List[Dict]:
     """
     Fetch candidates for a job, joining applications table.
+    Archived applications are only included with `include_archived`.
     """
     supabase = get_supabase_client()
     try:
         # Join applications and select candidate details
         # Supabase syntax for joins: select("*, candidates(*)")
         # We want info from applications (score, stage) AND candidates (name, etc)
-        response = supabase.table("applications")\
-            .select("*, candidates(*)")\
-            .eq("job_id", job_id)\
-            .order("overall_score", desc=True)\
-            .execute()
+        query = supabase.table("applications").select("*, candidates(*)").eq("job_id", job_id)
+        response = _hot(query, include_archived).order("overall_score", desc=True).execute()
         return response.data
     except Exception as e:
-        st.error(f"Error feching candidates: {e}")
+        _handle_error("Error feching candidates", e)
         return []
 
+@instrumented
 def update_application_stage(app_id: str, stage: str):
     supabase = get_supabase_client()
     try:
         supabase.table("applications").update({"stage": stage}).eq("id", app_id).execute()
+        audit.log_event(audit.STAGE_CHANGED, "application", app_id, {"stage": stage})
         return True
     except Exception as e:
-        st.error(f"Error updating stage: {e}")
+        _handle_error("Error updating stage", e)
         return False
 
-def add_note(app_id: str, author_id: str, note_text: str):
+@instrumented
+def add_note(app_id: str, author_id: str, note_text: str) -> Optional[Dict]:
+    """Insert a note and return the stored row (id, created_at) so callers can render it without refetching."""
     supabase = get_supabase_client()
     try:
         data = {"application_id": app_id, "author_id": author_id, "note": note_text}
-        supabase.table("notes").insert(data).execute()
-        return True
+        response = supabase.table("notes").insert(data).execute()
+        return response.data[0] if response.data else None
     except Exception as e:
-        st.error(f"Error adding note: {e}")
-        return False
+        _handle_error("Error adding note", e)
+        return None
 
-def get_notes(app_id: str) -> List[Dict]:
+@instrumented
+def get_notes(app_id: str, include_archived: bool = False) -> List[Dict]:
     supabase = get_supabase_client()
     try:
         # Join profiles to get author name
-        response = supabase.table("notes")\
-            .select("*, profiles(full_name)")\
-            .eq("application_id", app_id)\
-            .order("created_at", desc=True)\
-            .execute()
+        query = supabase.table("notes").select("*, profiles(full_name)").eq("application_id", app_id)
+        response = _hot(query, include_archived).order("created_at", desc=True).execute()
         return response.data
     except Exception as e:
-        st.error(f"Error fetching notes: {e}")
+        _handle_error("Error fetching notes", e)
         return []
 
+NOTE_COLUMNS = "id, application_id, author_id, note, created_at"
+
+@instrumented
+def get_notes_page(
+    app_id: str,
+    limit: int = 20,
+    before: Optional[Dict[str, str]] = None,
+    include_archived: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Newest-first page of notes older than the `before` {"created_at", "id"} cursor.
+    Author names are not joined; resolve them with get_profile_names (cached per session).
+    Only the hot notes partition is read unless `include_archived`.
+    Returns {"rows", "next_cursor"}; next_cursor is None when there are no older notes.
+    """
+    supabase = get_supabase_client()
+    try:
+        query = _hot(supabase.table("notes").select(NOTE_COLUMNS).eq("application_id", app_id), include_archived)
+        if before:
+            ts, last_id = before["created_at"], before["id"]
+            query = query.or_(f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt.{last_id})')
+        response = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+        rows = response.data or []
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+        return {"rows": rows, "next_cursor": next_cursor}
+    except Exception as e:
+        _handle_error("Error fetching notes", e)
+        return None
+
+@instrumented
+def get_notes_since(
+    app_id: str,
+    since: Dict[str, str],
+    limit: int = 100,
+    include_archived: bool = False
+) -> Optional[List[Dict]]:
+    """Notes newer than the `since` {"created_at", "id"} cursor, oldest first."""
+    supabase = get_supabase_client()
+    try:
+        ts, last_id = since["created_at"], since["id"]
+        query = _hot(supabase.table("notes").select(NOTE_COLUMNS).eq("application_id", app_id), include_archived)
+        response = query\
+            .or_(f'created_at.gt."{ts}",and(created_at.eq."{ts}",id.gt.{last_id})')\
+            .order("created_at")\
+            .order("id")\
+            .limit(limit)\
+            .execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error fetching new notes", e, show=False)
+        return None
+
+@instrumented
+def get_profile_names(user_ids: List[str]) -> Dict[str, str]:
+    """{user_id: full_name} for a batch of profiles, in one request."""
+    if not user_ids:
+        return {}
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("profiles").select("id, full_name").in_("id", list(user_ids)).execute()
+        return {r["id"]: r.get("full_name") for r in (response.data or [])}
+    except Exception as e:
+        _handle_error("Error fetching author names", e, show=False)
+        return {}
+
+@instrumented
 def update_application_evaluation(app_id: str, evaluation_data: Dict[str, Any]):
     """Update AI evaluation results"""
     supabase = get_supabase_client()
     try:
         supabase.table("applications").update(evaluation_data).eq("id", app_id).execute()
+        audit.log_event(
+            audit.CANDIDATE_EVALUATED, "application", app_id,
+            {"overall_score": evaluation_data.get("overall_score")}
+        )
         return True
     except Exception as e:
-        st.error(f"Error updating evaluation: {e}")
+        _handle_error("Error updating evaluation", e)
         return False
 
+@instrumented
+def get_evaluation(app_id: str, fingerprint: str) -> Optional[Dict]:
+    """Stored evaluation for exactly these inputs (see src.evaluations.input_fingerprint), if any."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("evaluations")\
+            .select("*")\
+            .eq("application_id", app_id)\
+            .eq("fingerprint", fingerprint)\
+            .limit(1)\
+            .execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        _handle_error("Error fetching evaluation", e, show=False)
+        return None
+
+@instrumented
+def save_evaluation(evaluation: Dict[str, Any]) -> Optional[Dict]:
+    """Insert (or replace, on the same input key) a full evaluation row."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("evaluations")\
+            .upsert(evaluation, on_conflict="application_id,fingerprint")\
+            .execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        _handle_error("Error saving evaluation", e)
+        return None
+
+@instrumented
+def get_evaluation_history(app_id: str) -> List[Dict]:
+    """Evaluation versions for an application, newest first (without the full result)."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("evaluations")\
+            .select("id, job_version, resume_hash, model, prompt_version, fingerprint, overall_score, created_at")\
+            .eq("application_id", app_id)\
+            .order("created_at", desc=True)\
+            .execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error fetching evaluation history", e, show=False)
+        return []
+
+STALE_APPLICATION_COLUMNS = (
+    "id, job_id, candidate_id, overall_score, eval_fingerprint, "
+    "jobs(id, version, title, team, location, employment_type, comp_range_min, comp_range_max, "
+    "must_have_skills, nice_to_have_skills, responsibilities, jd_text), "
+    "candidates(id, full_name, location, links, resume_text)"
+)
+
+@instrumented
+def get_stale_applications(
+    limit: int = 50,
+    offset: int = 0,
+    job_id: Optional[str] = None,
+    include_archived: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Applications flagged eval_stale, highest current score first, with the job and
+    candidate fields an evaluation needs. Archived applications are skipped unless
+    `include_archived`. Returns {"rows", "total"}.
+    """
+    supabase = get_supabase_client()
+    try:
+        query = supabase.table("applications").select(STALE_APPLICATION_COLUMNS, count="exact").eq("eval_stale", True)
+        query = _hot(query, include_archived)
+        if job_id:
+            query = query.eq("job_id", job_id)
+        response = query.order("overall_score", desc=True, nullsfirst=False)\
+            .order("id")\
+            .range(offset, offset + limit - 1)\
+            .execute()
+        return {"rows": response.data or [], "total": response.count or 0}
+    except Exception as e:
+        _handle_error("Error fetching stale evaluations", e)
+        return None
+
+@instrumented
+def count_stale_applications(job_id: Optional[str] = None, include_archived: bool = False) -> Optional[int]:
+    supabase = get_supabase_client()
+    try:
+        query = supabase.table("applications").select("id", count="exact", head=True).eq("eval_stale", True)
+        query = _hot(query, include_archived)
+        if job_id:
+            query = query.eq("job_id", job_id)
+        return query.execute().count or 0
+    except Exception as e:
+        _handle_error("Error counting stale evaluations", e, show=False)
+        return None
+
+@instrumented
+def mark_stale_evaluations(config: str) -> Optional[int]:
+    """Flag applications scored under another model / prompt version. Returns how many."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("mark_stale_evaluations", {"p_config": config}).execute()
+        return response.data if isinstance(response.data, int) else 0
+    except Exception as e:
+        _handle_error("Error flagging stale evaluations", e, show=False)
+        return None
+
+@instrumented
 def get_application_details(app_id: str) -> Optional[Dict]:
-    """Get full application details joined with job and candidate"""
+    """Get full application details joined with job and candidate (archived or not)"""
     supabase = get_supabase_client()
     try:
         # Join jobs and candidates
@@ -177,23 +589,120 @@ def get_application_details(app_id: str) -> Optional[Dict]:
             .execute()
         return response.data
     except Exception as e:
-        st.error(f"Error fetching application details: {e}")
+        _handle_error("Error fetching application details", e)
         return None
 
-def get_audit_logs() -> List[Dict]:
-    """Fetch audit logs (Admin only)"""
+@instrumented
+def get_job_options() -> List[Dict]:
+    """Lightweight job list (id, title) for selectors."""
     supabase = get_supabase_client()
     try:
-        # Join actor
-        response = supabase.table("audit_log")\
-            .select("*, profiles(full_name)")\
-            .order("created_at", desc=True)\
-            .execute()
+        response = supabase.table("jobs").select("id, title").order("created_at", desc=True).execute()
         return response.data
     except Exception as e:
-        st.error(f"Error fetching audit logs: {e}")
+        _handle_error("Error fetching jobs", e)
         return []
 
+@instrumented
+def get_application_options(job_id: str, include_archived: bool = False) -> Optional[List[Dict]]:
+    """
+    Lightweight application list for a job, used to build selector labels.
+    Only pulls the candidate name instead of full candidate rows (resume text etc).
+    Archived applications are only included with `include_archived`. None on error.
+    """
+    supabase = get_supabase_client()
+    try:
+        query = supabase.table("applications").select("id, overall_score, archived, candidates(full_name)").eq("job_id", job_id)
+        response = _hot(query, include_archived).order("overall_score", desc=True).execute()
+        return response.data
+    except Exception as e:
+        _handle_error("Error fetching candidates", e)
+        return None
+
+@instrumented
+def get_application_bundle(app_id: str) -> Optional[Dict]:
+    """
+    Application joined with job, candidate and its latest stored evaluation
+    (under "evaluations", a list of at most one) in a single query. Lookups by id
+    find archived applications too ("archived" tells which).
+    Notes are paged separately (get_notes_page / get_notes_since).
+    """
+    supabase = get_supabase_client()
+    try:
+        response = supabase.table("applications")\
+            .select("*, jobs(*), candidates(*), evaluations(*)")\
+            .eq("id", app_id)\
+            .order("created_at", desc=True, foreign_table="evaluations")\
+            .limit(1, foreign_table="evaluations")\
+            .single()\
+            .execute()
+        return response.data
+    except Exception as e:
+        _handle_error("Error fetching application details", e)
+        return None
+
+@instrumented
+def get_audit_logs(
+    limit: int = 50,
+    before: Optional[Dict[str, str]] = None,
+    actor_name: Optional[str] = None,
+    action: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    One page of audit logs (Admin only), newest first.
+    `before` is the {"created_at", "id"} cursor of the previous page's last row (keyset
+    pagination, so deep pages cost the same as the first). Returns
+    {"rows", "next_cursor"}; next_cursor is None on the last page.
+    """
+    supabase = get_supabase_client()
+    try:
+        # Inner join only when filtering on the actor, so system rows still show otherwise
+        actor = "profiles!inner(full_name)" if actor_name else "profiles(full_name)"
+        query = supabase.table("audit_log")\
+            .select(f"id, created_at, actor_id, action, entity_type, entity_id, metadata, {actor}")
+        if actor_name:
+            query = query.ilike("profiles.full_name", f"%{actor_name}%")
+        if action:
+            query = query.eq("action", action)
+        if entity_type:
+            query = query.eq("entity_type", entity_type)
+        if entity_id:
+            query = query.eq("entity_id", entity_id)
+        if since:
+            query = query.gte("created_at", since)
+        if until:
+            query = query.lt("created_at", until)
+        if before:
+            ts, last_id = before["created_at"], before["id"]
+            query = query.or_(f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt.{last_id})')
+        # One extra row tells us whether there is a next page
+        response = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+        rows = response.data or []
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = {"created_at": rows[-1]["created_at"], "id": rows[-1]["id"]}
+        return {"rows": rows, "next_cursor": next_cursor}
+    except Exception as e:
+        _handle_error("Error fetching audit logs", e)
+        return None
+
+@instrumented
+def insert_audit_logs(rows: List[Dict[str, Any]], client: "Client" = None) -> bool:
+    """Insert a batch of audit rows in one request (called by the audit writer thread)."""
+    supabase = client or get_supabase_client()
+    try:
+        supabase.table("audit_log").insert(rows).execute()
+        return True
+    except Exception as e:
+        _handle_error("Error writing audit logs", e, show=False)
+        return False
+
+@instrumented
 def get_all_users() -> List[Dict]:
     """Fetch all user profiles"""
     supabase = get_supabase_client()
@@ -201,67 +710,214 @@ def get_all_users() -> List[Dict]:
         response = supabase.table("profiles").select("*").order("created_at", desc=True).execute()
         return response.data
     except Exception as e:
-        st.error(f"Error fetching users: {e}")
+        _handle_error("Error fetching users", e)
         return []
 
+@instrumented
+def search_users(
+    query: Optional[str] = None,
+    role: Optional[str] = None,
+    page: int = 0,
+    page_size: int = 50
+) -> Optional[Dict[str, Any]]:
+    """
+    One page of the user directory (Admin only), newest first.
+    Returns {"rows", "total"} where total counts every match, not just this page.
+    """
+    supabase = get_supabase_client()
+    try:
+        q = supabase.table("profiles").select("id, full_name, role, created_at", count="exact")
+        if query:
+            q = q.ilike("full_name", f"%{query}%")
+        if role:
+            q = q.eq("role", role)
+        start = page * page_size
+        response = q.order("created_at", desc=True).order("id").range(start, start + page_size - 1).execute()
+        return {"rows": response.data or [], "total": response.count or 0}
+    except Exception as e:
+        _handle_error("Error searching users", e)
+        return None
+
+@instrumented
+def get_role_counts() -> Dict[str, int]:
+    """Users per role, counted in Postgres."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("profile_role_counts", {}).execute()
+        return {r["role"]: r["users"] for r in (response.data or [])}
+    except Exception as e:
+        _handle_error("Error counting users", e, show=False)
+        return {}
+
+@instrumented
+def get_dashboard_counters() -> Optional[Dict[str, Any]]:
+    """
+    Trigger-maintained counts (dashboard_counters RPC, see
+    sql/dashboard_counters_migration.sql): {"version", "jobs_by_status",
+    "applications_by_stage", "per_job": [{job_id, title, status, stage, applications}]}.
+    None if the RPC is unavailable.
+    """
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("dashboard_counters", {}).execute()
+        return response.data or None
+    except Exception as e:
+        _handle_error("Error fetching dashboard counters", e, show=False)
+        return None
+
+@instrumented
+def check_dashboard_counters(repair: bool = False) -> Optional[List[Dict]]:
+    """
+    Counters that differ from a full recount ({counter, key, stored, actual}); with
+    `repair` they are rebuilt and the rows returned are what was corrected. Admin only.
+    """
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("check_dashboard_counters", {"p_repair": repair}).execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error checking dashboard counters", e)
+        return None
+
+@instrumented
+def archive_closed_jobs(min_closed_days: int) -> Optional[Dict[str, int]]:
+    """
+    Archive applications and notes of jobs closed more than `min_closed_days` ago
+    (archive_closed_jobs RPC). Admin only. Returns {"archived_jobs",
+    "archived_applications", "archived_notes"}.
+    """
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("archive_closed_jobs", {"p_min_closed_days": min_closed_days}).execute()
+        rows = response.data or []
+        return rows[0] if rows else {"archived_jobs": 0, "archived_applications": 0, "archived_notes": 0}
+    except Exception as e:
+        _handle_error("Error archiving closed jobs", e)
+        return None
+
+def _recount_dashboard_stats(supabase, stats: Dict[str, Any]):
+    # Without the counter tables: count from the rows themselves
+    jobs = supabase.table("jobs").select("status").execute().data or []
+    stats["total_jobs"] = len(jobs)
+    stats["open_jobs"] = len([j for j in jobs if j["status"] == "open"])
+    for j in jobs:
+        stats["jobs_by_status"][j["status"]] = stats["jobs_by_status"].get(j["status"], 0) + 1
+
+    apps = supabase.table("applications").select("stage").execute().data or []
+    stats["total_candidates"] = len(apps)
+    for a in apps:
+        s = a.get("stage", "new")
+        if s in stats["funnel"]:
+            stats["funnel"][s] += 1
+
+@instrumented
 def get_dashboard_stats(user_id: str, role: str) -> Dict[str, Any]:
-    """Fetch aggregated stats for the dashboard"""
+    """
+    Fetch aggregated stats for the dashboard. Counts come from the trigger-maintained
+    counters in one RPC; "version" changes whenever any of them does (None when the
+    counters migration hasn't been run and the rows were counted instead).
+    """
     supabase = get_supabase_client()
     stats = {
+        "version": None,
         "total_jobs": 0,
         "open_jobs": 0,
         "total_candidates": 0,
-        "funnel": {},
+        "jobs_by_status": {},
+        "funnel": {s: 0 for s in STAGES},
+        "per_job": [],
         "recent_activity": []
     }
     
     try:
-        # 1. Jobs
-        # If admin/recruiter, get all. If manager, maybe filtered (but we do all for MVP)
-        jobs_query = supabase.table("jobs").select("id, status, title", count="exact")
-        if role == 'manager':
-             # simplified: manager sees all for now as per policy
-             pass
-        jobs_res = jobs_query.execute()
-        stats["total_jobs"] = len(jobs_res.data)
-        stats["open_jobs"] = len([j for j in jobs_res.data if j['status'] == 'open'])
-        
-        # 2. Applications (Funnel)
-        # We need all applications visible to this user
-        apps_query = supabase.table("applications").select("stage, created_at, candidates(full_name), jobs(title)")
-        apps_res = apps_query.order("created_at", desc=True).execute()
-        
-        all_apps = apps_res.data
-        stats["total_candidates"] = len(all_apps)
-        
-        # Group by stage
-        stages = ["new", "screened", "interview", "offer", "hired", "rejected"]
-        funnel_counts = {s: 0 for s in stages}
-        for a in all_apps:
-            s = a.get("stage", "new")
-            if s in funnel_counts:
-                funnel_counts[s] += 1
-        stats["funnel"] = funnel_counts
-        
+        counters = get_dashboard_counters()
+        if counters:
+            stats["version"] = counters["version"]
+            stats["jobs_by_status"] = counters["jobs_by_status"]
+            stats["total_jobs"] = sum(counters["jobs_by_status"].values())
+            stats["open_jobs"] = counters["jobs_by_status"].get("open", 0)
+            for stage, count in counters["applications_by_stage"].items():
+                stats["funnel"][stage] = count
+            stats["total_candidates"] = sum(counters["applications_by_stage"].values())
+            stats["per_job"] = counters["per_job"]
+        else:
+            _recount_dashboard_stats(supabase, stats)
+
         # Recent Activity (Last 5 apps)
-        stats["recent_activity"] = all_apps[:5]
+        recent = supabase.table("applications").select("stage, created_at, candidates(full_name), jobs(title)").eq("archived", False)
+        stats["recent_activity"] = recent.order("created_at", desc=True).limit(5).execute().data or []
         
     except Exception as e:
-        print(f"Error fetching dashboard stats: {e}")
+        _handle_error("Error fetching dashboard stats", e, show=False)
         
     return stats
 
+# --- Stage analytics (server-side aggregations, see sql/stage_history_migration.sql) ---
+
+@instrumented
+def get_stage_time_stats(job_id: Optional[str] = None, since_days: int = 90) -> Optional[List[Dict]]:
+    """Per-stage time-in-stage percentiles (hours) for stage entries in the last `since_days`."""
+    from datetime import datetime, timedelta, timezone
+    supabase = get_supabase_client()
+    since = datetime.now(timezone.utc) - timedelta(days=since_days)
+    try:
+        response = supabase.rpc("stage_time_stats", {"p_job_id": job_id, "p_since": since.isoformat()}).execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error fetching time-in-stage stats", e, show=False)
+        return None
+
+@instrumented
+def get_weekly_stage_flow(job_id: Optional[str] = None, weeks: int = 12) -> Optional[List[Dict]]:
+    """Applications entering each stage per week: [{"week", "stage", "entered"}]."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc("stage_weekly_flow", {"p_job_id": job_id, "p_weeks": weeks}).execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error fetching weekly stage flow", e, show=False)
+        return None
+
+@instrumented
+def get_stuck_applications(job_id: Optional[str] = None, min_days: int = 14, limit: int = 50) -> Optional[List[Dict]]:
+    """Open applications sitting in their current stage for at least `min_days`, oldest first."""
+    supabase = get_supabase_client()
+    try:
+        response = supabase.rpc(
+            "stuck_applications", {"p_job_id": job_id, "p_min_days": min_days, "p_limit": limit}
+        ).execute()
+        return response.data or []
+    except Exception as e:
+        _handle_error("Error fetching stuck applications", e, show=False)
+        return None
+
+# Not instrumented itself: the bulk call it wraps is
 def update_user_role(user_id: str, new_role: str):
+    return bool(bulk_update_user_roles({user_id: new_role}))
+
+@instrumented
+def bulk_update_user_roles(changes: Dict[str, str]) -> Optional[List[str]]:
+    """
+    Apply {user_id: role} in one call (set_user_roles RPC, admin only).
+    Returns the ids whose role actually changed, or None on error.
+    """
+    if not changes:
+        return []
     supabase = get_supabase_client()
     try:
-        supabase.table("profiles").update({"role": new_role}).eq("id", user_id).execute()
-        return True
+        payload = [{"id": uid, "role": role} for uid, role in changes.items()]
+        response = supabase.rpc("set_user_roles", {"p_changes": payload}).execute()
+        changed = [r if isinstance(r, str) else r.get("set_user_roles") for r in (response.data or [])]
+        for uid in changed:
+            audit.log_event(audit.USER_ROLE_CHANGED, "profile", uid, {"role": changes.get(uid)})
+        return changed
     except Exception as e:
-        print(f"Error updating user role: {e}")
-        return False
+        _handle_error("Error updating user roles", e, show=False)
+        return None
 
 # --- Candidate Portal Functions ---
 
+@instrumented
 def get_candidate_profile(user_id: str) -> Optional[Dict]:
     """Get the candidate record associated with this user_id"""
     supabase = get_supabase_client()
@@ -272,6 +928,7 @@ def get_candidate_profile(user_id: str) -> Optional[Dict]:
     except Exception:
         return None
 
+@instrumented
 def create_candidate_profile(user_id: str, data: Dict[str, Any]) -> Optional[Dict]:
     """Create a new candidate profile linked to the user"""
     supabase = get_supabase_client()
@@ -281,18 +938,20 @@ def create_candidate_profile(user_id: str, data: Dict[str, Any]) -> Optional[Dic
         res = supabase.table("candidates").insert(data).execute()
         return res.data[0] if res.data else None
     except Exception as e:
-        st.error(f"Error creating profile: {e}")
+        _handle_error("Error creating profile", e)
         return None
 
+@instrumented
 def update_candidate_profile(candidate_id: str, data: Dict[str, Any]) -> bool:
     supabase = get_supabase_client()
     try:
         supabase.table("candidates").update(data).eq("id", candidate_id).execute()
         return True
     except Exception as e:
-        st.error(f"Error updating profile: {e}")
+        _handle_error("Error updating profile", e)
         return False
 
+@instrumented
 def apply_for_job_as_candidate(job_id: str, candidate_id: str) -> bool:
     """Create an application record"""
     supabase = get_supabase_client()
@@ -309,16 +968,46 @@ def apply_for_job_as_candidate(job_id: str, candidate_id: str) -> bool:
         if "duplicate key" in str(e):
              st.warning("You have already applied for this job.")
         else:
-             st.error(f"Error applying: {e}")
+             _handle_error("Error applying", e)
         return False
 
-def get_my_applications(candidate_id: str) -> List[Dict]:
+@instrumented
+def get_my_applications(candidate_id: str, include_archived: bool = False) -> List[Dict]:
     """Fetch applications for this candidate"""
     supabase = get_supabase_client()
     try:
         # we want job details too
-        res = supabase.table("applications").select("*, jobs(title, location, status)").eq("candidate_id", candidate_id).execute()
+        query = supabase.table("applications").select("*, jobs(title, location, status)").eq("candidate_id", candidate_id)
+        res = _hot(query, include_archived).execute()
         return res.data
     except Exception as e:
-        st.error(f"Error fetching applications: {e}")
+        _handle_error("Error fetching applications", e)
         return []
+
+@instrumented
+def fetch_rows_after(
+    table: str,
+    columns: List[str],
+    watermark_column: str,
+    after: Optional[str] = None,
+    after_id: Optional[str] = None,
+    limit: int = 1000,
+    client: "Client" = None
+) -> List[Dict[str, Any]]:
+    """
+    One keyset page of `table` ordered by (watermark_column, id), strictly after
+    (after, after_id). Used by the snapshot export; raises instead of swallowing
+    errors so a failed page never advances a watermark.
+    """
+    supabase = client or get_supabase_client()
+    query = supabase.table(table).select(",".join(columns))
+    if after is not None:
+        if after_id is not None:
+            query = query.or_(
+                f'{watermark_column}.gt."{after}",'
+                f'and({watermark_column}.eq."{after}",id.gt.{after_id})'
+            )
+        else:
+            query = query.gt(watermark_column, after)
+    response = query.order(watermark_column).order("id").limit(limit).execute()
+    return response.data or []
@@ -0,0 +1,125 @@
+import json
+import hashlib
+from typing import Optional, Dict, Any, List
+
+from src.constants import MODEL_NAME, PROMPT_VERSION
+from src.db import get_evaluation, save_evaluation, update_application_evaluation
+from src.llm import evaluate_candidate_routed
+
+# Candidate evaluations, persisted in full and keyed by their inputs.
+# An evaluation is identified by its input fingerprint: a hash of the job and
+# candidate fields the prompt reads (JOB_FIELDS, CANDIDATE_FIELDS), the resume text,
+# PROMPT_VERSION and MODEL_NAME. Asking for an evaluation whose fingerprint already
+# has a stored row returns that row; the LLM is only called when one of the inputs
+# changed (or on an explicit force). The application keeps the fingerprint its
+# current score came from, and triggers flag it stale when any of those job or
+# candidate fields change (see src/rescoring.py).
+
+# Fields sent to the model. Everything else on the rows (timestamps, ids, identity
+# signatures, contact details) is left out of the prompt: it doesn't affect the
+# assessment and would only add tokens and PII.
+JOB_FIELDS = [
+    "title", "team", "location", "employment_type", "comp_range_min", "comp_range_max",
+    "must_have_skills", "nice_to_have_skills", "responsibilities", "jd_text"
+]
+# Keep in sync with the candidates_mark_evaluations_stale trigger's column list
+CANDIDATE_FIELDS = ["full_name", "location", "links"]
+
+def evaluation_inputs(job: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job": {k: job.get(k) for k in JOB_FIELDS},
+        "candidate": {k: candidate.get(k) for k in CANDIDATE_FIELDS},
+        "resume_text": candidate.get("resume_text") or ""
+    }
+
+def resume_hash(resume_text: str) -> str:
+    return hashlib.sha256((resume_text or "").encode("utf-8")).hexdigest()
+
+def evaluation_config() -> str:
+    """Model + prompt version; applications scored under another config are stale."""
+    return f"{MODEL_NAME}:{PROMPT_VERSION}"
+
+def input_fingerprint(job: Dict[str, Any], candidate: Dict[str, Any]) -> str:
+    inputs = evaluation_inputs(job, candidate)
+    payload = json.dumps({
+        "job": inputs["job"],
+        "candidate": inputs["candidate"],
+        "resume_hash": resume_hash(inputs["resume_text"]),
+        "prompt_version": PROMPT_VERSION,
+        "model": MODEL_NAME
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def evaluation_key(job: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "fingerprint": input_fingerprint(job, candidate),
+        "job_version": job.get("version") or 1,
+        "resume_hash": resume_hash(candidate.get("resume_text") or ""),
+        "model": MODEL_NAME,
+        "prompt_version": PROMPT_VERSION
+    }
+
+def is_current(evaluation: Optional[Dict[str, Any]], job: Dict[str, Any], candidate: Dict[str, Any]) -> bool:
+    """True if `evaluation` was produced from the job/resume/prompt/model as they are now."""
+    if not evaluation:
+        return False
+    return evaluation.get("fingerprint") == input_fingerprint(job, candidate)
+
+def latest_evaluation(app_details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The stored evaluation embedded in an application bundle (see get_application_bundle)."""
+    evaluations: List[Dict[str, Any]] = app_details.get("evaluations") or []
+    return evaluations[0] if evaluations else None
+
+def apply_evaluation(app_id: str, evaluation: Dict[str, Any]) -> bool:
+    """Make `evaluation` the application's current score and clear its stale flag."""
+    result = evaluation["result"]
+    return update_application_evaluation(app_id, {
+        "overall_score": result["overall_score"],
+        "score_breakdown": result.get("score_breakdown"),
+        "ai_summary": result.get("ai_summary"),
+        "risk_flags": result.get("risk_flags"),
+        "eval_fingerprint": evaluation["fingerprint"],
+        "eval_config": f"{evaluation['model']}:{evaluation['prompt_version']}",
+        "eval_stale": False
+    })
+
+def run_evaluation(
+    app_id: str,
+    job: Dict[str, Any],
+    candidate: Dict[str, Any],
+    actor_id: Optional[str] = None,
+    force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Stored evaluation for the current inputs, calling the LLM only if there is none
+    (or `force`). Either way it becomes the application's current score.
+    Returns the evaluation row, or None if the LLM call or save failed. Rows produced
+    by this call carry the cascade routing (calls made, estimated cost) in
+    result["routing"].
+    """
+    key = evaluation_key(job, candidate)
+    if not force:
+        existing = get_evaluation(app_id, key["fingerprint"])
+        if existing:
+            apply_evaluation(app_id, existing)
+            return existing
+
+    inputs = evaluation_inputs(job, candidate)
+    result, routing = evaluate_candidate_routed(inputs["job"], inputs["candidate"], inputs["resume_text"])
+    if result is None:
+        return None
+
+    # The row's model stays MODEL_NAME (the configuration the fingerprint covers);
+    # which cascade tier actually answered is kept with the result.
+    row = save_evaluation({
+        **key,
+        "application_id": app_id,
+        "job_id": job["id"],
+        "overall_score": result.overall_score,
+        "result": {**result.model_dump(), "routing": routing},
+        "created_by": actor_id
+    })
+    if not row:
+        return None
+    apply_evaluation(app_id, row)
+    return row
@@ -0,0 +1,299 @@
+"""
+Incremental Parquet snapshots of pipeline data for offline analytics.
+
+    python -m src.export                 # export rows changed since the last run
+    python -m src.export --full          # re-export everything (picks up deletes)
+    python -m src.export --compact       # merge part files, keeping the latest row per id
+
+Each table is read in keyset pages ordered by (watermark column, id) and streamed
+into a Parquet part file under <export dir>/<table>/, a row group at a time, so
+memory stays bounded by EXPORT_ROW_GROUP_SIZE regardless of table size. The last
+exported (watermark, id) per table is kept in <export dir>/_watermarks.json and only
+advanced once the part file is complete. Readers (src/analytics.py) keep the latest
+version of each id across parts.
+
+Runs with the service-role key (RLS would otherwise hide most rows).
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+from src.constants import (
+    EXPORT_DIR,
+    EXPORT_PAGE_SIZE,
+    EXPORT_ROW_GROUP_SIZE,
+    EXPORT_OVERLAP_SECONDS
+)
+from src.db import fetch_rows_after
+
+WATERMARKS_FILE = "_watermarks.json"
+
+# Column kinds: string, float, timestamp, string_list, json (stored as a JSON string).
+# Large free-text columns (jd_text, ai_summary, note bodies) are left out on purpose:
+# analytics doesn't need them and they would dominate the snapshot size.
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    "jobs": {
+        "watermark": "updated_at",
+        "columns": {
+            "id": "string",
+            "created_by": "string",
+            "title": "string",
+            "team": "string",
+            "location": "string",
+            "employment_type": "string",
+            "comp_range_min": "float",
+            "comp_range_max": "float",
+            "must_have_skills": "string_list",
+            "nice_to_have_skills": "string_list",
+            "status": "string",
+            "created_at": "timestamp",
+            "updated_at": "timestamp"
+        }
+    },
+    "applications": {
+        "watermark": "updated_at",
+        "columns": {
+            "id": "string",
+            "job_id": "string",
+            "candidate_id": "string",
+            "stage": "string",
+            "overall_score": "float",
+            "score_breakdown": "json",
+            "risk_flags": "string_list",
+            "created_at": "timestamp",
+            "updated_at": "timestamp"
+        }
+    },
+    "notes": {
+        "watermark": "created_at",
+        "columns": {
+            "id": "string",
+            "application_id": "string",
+            "author_id": "string",
+            "created_at": "timestamp"
+        }
+    },
+    "audit_log": {
+        "watermark": "created_at",
+        "columns": {
+            "id": "string",
+            "actor_id": "string",
+            "action": "string",
+            "entity_type": "string",
+            "entity_id": "string",
+            "metadata": "json",
+            "created_at": "timestamp"
+        }
+    }
+}
+
+def get_export_dir(export_dir: Optional[str] = None) -> Path:
+    return Path(export_dir or os.getenv("EXPORT_DIR") or EXPORT_DIR)
+
+def arrow_schema(table: str):
+    import pyarrow as pa
+    types = {
+        "string": pa.string(),
+        "float": pa.float64(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "string_list": pa.list_(pa.string()),
+        "json": pa.string()
+    }
+    columns = EXPORT_TABLES[table]["columns"]
+    return pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+def rows_to_batch(table: str, rows: List[Dict[str, Any]]):
+    """PostgREST JSON rows -> Arrow RecordBatch with the table's fixed schema."""
+    import pyarrow as pa
+    import pandas as pd
+    schema = arrow_schema(table)
+    arrays = []
+    for name, kind in EXPORT_TABLES[table]["columns"].items():
+        values = [row.get(name) for row in rows]
+        if kind == "timestamp":
+            parsed = pd.to_datetime(pd.Series(values, dtype="object"), utc=True, format="ISO8601")
+            arrays.append(pa.array(parsed, type=schema.field(name).type, from_pandas=True))
+        elif kind == "json":
+            arrays.append(pa.array([None if v is None else json.dumps(v) for v in values], pa.string()))
+        else:
+            arrays.append(pa.array(values, type=schema.field(name).type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+# --- Watermarks ---
+
+def load_watermarks(export_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    path = get_export_dir(export_dir) / WATERMARKS_FILE
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def _save_watermarks(export_dir: Path, watermarks: Dict[str, Dict[str, Any]]):
+    path = export_dir / WATERMARKS_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(watermarks, indent=2))
+    os.replace(tmp, path)
+
+def _resume_point(watermark: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Where an incremental run starts: the stored watermark minus the overlap window."""
+    if not watermark or not watermark.get("value"):
+        return None
+    value = datetime.fromisoformat(watermark["value"])
+    return (value - timedelta(seconds=EXPORT_OVERLAP_SECONDS)).isoformat()
+
+def _is_past(row: Dict[str, Any], wm_col: str, watermark: Optional[Dict[str, Any]]) -> bool:
+    """True if `row` sorts after the stored (watermark, id)."""
+    if not watermark or not watermark.get("value"):
+        return True
+    row_key = (datetime.fromisoformat(row[wm_col]), row["id"])
+    return row_key > (datetime.fromisoformat(watermark["value"]), watermark["id"])
+
+# --- Export ---
+
+def export_table(
+    table: str,
+    export_dir: Optional[str] = None,
+    full: bool = False,
+    client=None,
+    page_size: int = EXPORT_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    Stream rows of `table` changed since its watermark into a new Parquet part file.
+    Returns {"table", "rows", "file", "watermark"}; no file is written when nothing changed.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    spec = EXPORT_TABLES[table]
+    wm_col = spec["watermark"]
+    root = get_export_dir(export_dir)
+    table_dir = root / table
+    table_dir.mkdir(parents=True, exist_ok=True)
+
+    watermarks = load_watermarks(str(root))
+    after = None if full else _resume_point(watermarks.get(table))
+    after_id = None
+    run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    part = table_dir / f"part-{run_id}.parquet"
+    tmp = part.with_suffix(".parquet.tmp")
+
+    schema = arrow_schema(table)
+    writer = None
+    buffered: list = []
+    buffered_rows = 0
+    total = 0
+    last_row = None
+
+    def flush():
+        nonlocal writer, buffered, buffered_rows
+        if not buffered:
+            return
+        if writer is None:
+            writer = pq.ParquetWriter(tmp, schema, compression="zstd")
+        writer.write_table(pa.Table.from_batches(buffered, schema=schema))
+        buffered, buffered_rows = [], 0
+
+    try:
+        while True:
+            rows = fetch_rows_after(
+                table, list(spec["columns"]), wm_col,
+                after=after, after_id=after_id, limit=page_size, client=client
+            )
+            if not rows:
+                break
+            buffered.append(rows_to_batch(table, rows))
+            buffered_rows += len(rows)
+            total += len(rows)
+            last_row = rows[-1]
+            after, after_id = last_row[wm_col], last_row["id"]
+            if buffered_rows >= EXPORT_ROW_GROUP_SIZE:
+                flush()
+            if len(rows) < page_size:
+                break
+        flush()
+    except Exception:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+
+    if writer is not None:
+        writer.close()
+    if writer is None or (not full and not _is_past(last_row, wm_col, watermarks.get(table))):
+        # Nothing at all, or only rows from the overlap window that were already exported
+        tmp.unlink(missing_ok=True)
+        return {"table": table, "rows": 0, "file": None, "watermark": watermarks.get(table)}
+
+    os.replace(tmp, part)
+
+    if full:
+        # A full export supersedes every earlier part (and drops deleted rows)
+        for old in table_dir.glob("part-*.parquet"):
+            if old != part:
+                old.unlink()
+
+    watermark = {
+        "value": last_row[wm_col],
+        "id": last_row["id"],
+        "exported_at": datetime.now(timezone.utc).isoformat()
+    }
+    watermarks[table] = watermark
+    _save_watermarks(root, watermarks)
+    return {"table": table, "rows": total, "file": str(part), "watermark": watermark}
+
+def run_export(
+    tables: Optional[List[str]] = None,
+    export_dir: Optional[str] = None,
+    full: bool = False,
+    client=None
+) -> List[Dict[str, Any]]:
+    """Export each table in turn. Defaults to the service-role client."""
+    if client is None:
+        from src.db import get_service_client
+        client = get_service_client()
+    return [export_table(t, export_dir, full=full, client=client) for t in (tables or list(EXPORT_TABLES))]
+
+def compact_table(table: str, export_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Rewrite a table's part files as one file holding only the latest row per id."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from src.analytics import load_table
+
+    table_dir = get_export_dir(export_dir) / table
+    parts = sorted(table_dir.glob("part-*.parquet"))
+    if len(parts) <= 1:
+        return {"table": table, "parts": len(parts), "rows": None}
+
+    df = load_table(table, export_dir)
+    compacted = pa.Table.from_pandas(df, schema=arrow_schema(table), preserve_index=False)
+    # Named after the newest part so it sorts last, like a regular run's output
+    target = table_dir / f"{parts[-1].stem}-compacted.parquet"
+    tmp = target.with_suffix(".parquet.tmp")
+    pq.write_table(compacted, tmp, compression="zstd", row_group_size=EXPORT_ROW_GROUP_SIZE)
+    os.replace(tmp, target)
+    for old in parts:
+        old.unlink()
+    return {"table": table, "parts": len(parts), "rows": compacted.num_rows}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Export pipeline tables to Parquet snapshots")
+    parser.add_argument("--dir", help=f"Export directory (default: $EXPORT_DIR or {EXPORT_DIR})")
+    parser.add_argument("--tables", nargs="+", choices=list(EXPORT_TABLES), help="Subset of tables")
+    parser.add_argument("--full", action="store_true", help="Ignore watermarks and re-export everything")
+    parser.add_argument("--compact", action="store_true", help="Merge part files after exporting")
+    args = parser.parse_args(argv)
+
+    for result in run_export(args.tables, args.dir, full=args.full):
+        print(f"{result['table']:<14} {result['rows']:>9} rows  {result['file'] or '(no changes)'}")
+    if args.compact:
+        for table in args.tables or list(EXPORT_TABLES):
+            result = compact_table(table, args.dir)
+            if result["rows"] is not None:
+                print(f"{table:<14} compacted {result['parts']} parts -> {result['rows']} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
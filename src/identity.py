@@ -0,0 +1,170 @@
+import re
+import hashlib
+from typing import Optional, List, Dict, Any
+
+from src.constants import (
+    MINHASH_PERMUTATIONS,
+    LSH_BANDS,
+    DUPLICATE_SIMILARITY_THRESHOLD
+)
+from src.db import (
+    find_candidates_by_contact,
+    find_candidates_by_lsh,
+    get_candidate_signatures,
+    add_candidate_lsh_bands,
+    update_candidate_profile
+)
+
+# Candidate identity resolution.
+# Before creating a candidate we look for an existing one by exact contact keys
+# (normalized email / phone), then by MinHash over the resume text. The MinHash
+# signature is split into LSH bands stored in candidate_lsh_bands, so lookups are
+# index hits on a handful of band keys instead of a scan over every resume.
+# A phone number alone only matches when the emails don't disagree: agencies and
+# shared office lines put one number on many people's resumes.
+
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]\d{3}[-.\s]\d{4}")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SHINGLE_SIZE = 5
+ROWS_PER_BAND = MINHASH_PERMUTATIONS // LSH_BANDS
+_PRIME = (1 << 31) - 1
+
+def _hash_params():
+    # Fixed seeds: signatures must be comparable across processes and deploys
+    import numpy as np
+    rng = np.random.default_rng(20240101)
+    a = rng.integers(1, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+    b = rng.integers(0, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+    return a, b
+
+_params = None
+
+# --- Contact keys ---
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """Lowercase, drop +tags in the local part."""
+    if not email or "@" not in email:
+        return None
+    local, _, domain = email.strip().lower().partition("@")
+    local = local.split("+", 1)[0]
+    return f"{local}@{domain}" if local and domain else None
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits only, last 10 (drops country code / formatting)."""
+    if not phone:
+        return None
+    digits = re.sub(r"\D", "", phone)
+    return digits[-10:] if len(digits) >= 7 else None
+
+def extract_contact_keys(text: str) -> Dict[str, Optional[str]]:
+    """First email / phone found in raw resume text, normalized."""
+    email = EMAIL_RE.search(text or "")
+    phone = PHONE_RE.search(text or "")
+    return {
+        "email_key": normalize_email(email.group(0)) if email else None,
+        "phone_key": normalize_phone(phone.group(0)) if phone else None
+    }
+
+# --- MinHash / LSH ---
+
+def _shingle_hashes(text: str):
+    import numpy as np
+    tokens = TOKEN_RE.findall((text or "").lower())
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = {" ".join(tokens)} if tokens else set()
+    else:
+        shingles = {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+        for s in shingles
+    ]
+    return np.array(hashes, dtype=np.uint64)
+
+def minhash_signature(text: str) -> List[int]:
+    """MINHASH_PERMUTATIONS-long MinHash signature of the text's word 5-shingles."""
+    global _params
+    import numpy as np
+    if _params is None:
+        _params = _hash_params()
+    a, b = _params
+    x = _shingle_hashes(text)
+    if x.size == 0:
+        return [int(_PRIME)] * MINHASH_PERMUTATIONS
+    # (a * x + b) mod p stays below 2^63 with 31-bit a and 32-bit x
+    values = (np.outer(a, x) + b[:, None]) % _PRIME
+    return values.min(axis=1).astype(np.int64).tolist()
+
+def lsh_band_keys(signature: List[int]) -> List[str]:
+    """One key per band; two signatures sharing any key are duplicate candidates."""
+    keys = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode("ascii"), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+# --- Resolution ---
+
+def build_identity(resume_text: str, email: Optional[str] = None, phone: Optional[str] = None) -> Dict[str, Any]:
+    """Keys and signature for a resume. Explicit email/phone win over ones found in the text."""
+    found = extract_contact_keys(resume_text)
+    signature = minhash_signature(resume_text)
+    return {
+        "email_key": normalize_email(email) or found["email_key"],
+        "phone_key": normalize_phone(phone) or found["phone_key"],
+        "resume_minhash": signature,
+        "band_keys": lsh_band_keys(signature)
+    }
+
+def resolve_candidate(identity: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Find an existing candidate for this identity.
+    Returns {"candidate_id", "reason", "similarity"} or None.
+    """
+    # 1. Exact contact keys
+    if identity.get("email_key") or identity.get("phone_key"):
+        matches = find_candidates_by_contact(identity.get("email_key"), identity.get("phone_key"))
+        for m in matches:
+            if identity.get("email_key") and m.get("email_key") == identity["email_key"]:
+                return {"candidate_id": m["id"], "reason": "email", "similarity": 1.0}
+        for m in matches:
+            if not identity.get("email_key") or not m.get("email_key"):
+                return {"candidate_id": m["id"], "reason": "phone", "similarity": 1.0}
+
+    # 2. Near-duplicate resume text via LSH buckets, verified on the full signature
+    candidate_ids = find_candidates_by_lsh(identity["band_keys"])
+    if not candidate_ids:
+        return None
+    best = None
+    for row in get_candidate_signatures(candidate_ids):
+        similarity = estimate_similarity(identity["resume_minhash"], row.get("resume_minhash") or [])
+        if similarity >= DUPLICATE_SIMILARITY_THRESHOLD and (best is None or similarity > best["similarity"]):
+            best = {"candidate_id": row["id"], "reason": "resume_similarity", "similarity": round(similarity, 3)}
+    return best
+
+def identity_columns(identity: Dict[str, Any]) -> Dict[str, Any]:
+    """Columns to store on the candidate row."""
+    return {
+        "email_key": identity["email_key"],
+        "phone_key": identity["phone_key"],
+        "resume_minhash": identity["resume_minhash"]
+    }
+
+def index_candidate(candidate_id: str, identity: Dict[str, Any]) -> bool:
+    """Register a new candidate's LSH bands so later uploads can find it."""
+    return add_candidate_lsh_bands(candidate_id, identity["band_keys"])
+
+def backfill_candidate(candidate: Dict[str, Any]) -> bool:
+    """Compute and store identity data for a candidate created before the resolver existed."""
+    identity = build_identity(candidate.get("resume_text") or "", candidate.get("email"), candidate.get("phone"))
+    if not update_candidate_profile(candidate["id"], identity_columns(identity)):
+        return False
+    return index_candidate(candidate["id"], identity)
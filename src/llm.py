@@ -1,61 +1,181 @@
 import os
-import streamlit as st
+import re
+import time
 import json
-import google.generativeai as genai
-from typing import Optional, Dict, List, Type
-from pydantic import BaseModel
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import streamlit as st
+from typing import Optional, Dict, List, Tuple, Type
+from pydantic import BaseModel, create_model
 
-from src.constants import MODEL_NAME
+from src.constants import (
+    MODEL_NAME,
+    LLM_RESPONSE_TOKENS_ESTIMATE,
+    EVALUATION_RESPONSE_TOKENS,
+    EVAL_CASCADE_ENABLED,
+    EVAL_FAST_MODEL,
+    EVAL_PRESCREEN_MIN_SKILLS,
+    EVAL_PRESCREEN_MIN_COVERAGE,
+    EVAL_PRESCREEN_MIN_RESUME_CHARS,
+    EVAL_ESCALATE_CONFIDENCE,
+    EVAL_BORDERLINE_BAND
+)
+from src.telemetry import record_llm_call, estimate_cost
+from src.metrics import register_collector
+from src import llm_scheduler
 from src.schemas import (
     JobParsingSchema, 
     CandidateParsingSchema, 
     EvaluationResult, 
+    ScoreBreakdown,
     OutreachMessage, 
-    ScreeningResult
+    ScreeningResult,
+    ScreeningChunkSummary
 )
 
+def _genai():
+    # google.generativeai pulls in grpc/protobuf (~0.7s); import it on first LLM call
+    # instead of on every page load.
+    import google.generativeai as genai
+    return genai
+
 # Config GenAI
 def configure_genai():
-    api_key = st.secrets.get("google", {}).get("api_key") or os.getenv("GOOGLE_API_KEY")
+    try:
+        api_key = st.secrets.get("google", {}).get("api_key")
+    except Exception:
+        # No secrets.toml (e.g. scripts / benchmarks outside `streamlit run`)
+        api_key = None
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         st.error("Missing Google API Key.")
         return False
-    genai.configure(api_key=api_key)
+
+    # Optional endpoint override (proxy, local fake server for benchmarks)
+    genai = _genai()
+    endpoint = os.getenv("GEMINI_API_ENDPOINT")
+    if endpoint:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": endpoint})
+    else:
+        genai.configure(api_key=api_key)
     return True
 
-def get_model():
+def get_model(model_name: Optional[str] = None):
     # Use the requested model
-    return genai.GenerativeModel(MODEL_NAME)
+    return _genai().GenerativeModel(model_name or MODEL_NAME)
 
-def call_llm_json(prompt: str, schema_model: Type[BaseModel]) -> Optional[BaseModel]:
-    """
-    Calls Gemini with a prompt and forces JSON output matching the Pydantic schema.
-    Incorporates retry logic (manual, though Gemini mostly respects schema in prompt).
-    """
-    if not configure_genai():
-        return None
+# Process-wide cache of validated responses, keyed by model + schema + full prompt.
+# Identical requests (e.g. re-parsing the same JD) skip the API call entirely.
+RESPONSE_CACHE_SIZE = 256
+_response_cache: "OrderedDict[str, BaseModel]" = OrderedDict()
+_cache_lock = threading.Lock()
 
-    model = get_model()
-    
+def _cache_key(model_name: str, schema_model: Type[BaseModel], full_prompt: str) -> str:
+    raw = f"{model_name}|{schema_model.__name__}|{full_prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _cache_get(key: str) -> Optional[BaseModel]:
+    with _cache_lock:
+        obj = _response_cache.get(key)
+        if obj is not None:
+            _response_cache.move_to_end(key)
+            return obj.model_copy(deep=True)
+    return None
+
+def clear_response_cache():
+    with _cache_lock:
+        _response_cache.clear()
+
+def _cache_put(key: str, obj: BaseModel):
+    with _cache_lock:
+        _response_cache[key] = obj.model_copy(deep=True)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+@lru_cache(maxsize=32)
+def _schema_json(schema_model: Type[BaseModel]) -> str:
+    # Schemas are static, so dump each one once per process
+    return json.dumps(schema_model.model_json_schema(), indent=2)
+
+def build_json_prompt(prompt: str, schema_model: Type[BaseModel]) -> str:
+    """Wrap a task prompt with the JSON schema instruction sent to Gemini."""
     # Construct the system instruction for JSON enforcement
     # We use valid JSON schema dump from pydantic Model
-    schema_json = schema_model.model_json_schema()
-    
-    full_prompt = f"""
+    return f"""
     You are an expert AI recruitment assistant.
     System Instruction: You MUST return a valid JSON object matching the following schema. 
     Do not wrap in markdown code blocks. Return ONLY the JSON string.
     
     Schema:
-    {json.dumps(schema_json, indent=2)}
+    {_schema_json(schema_model)}
     
     Task:
     {prompt}
     """
 
+def _is_rate_limited(e: Exception) -> bool:
+    # google.api_core.exceptions.ResourceExhausted over gRPC, a plain 429 over REST
+    return type(e).__name__ == "ResourceExhausted" or "429" in str(e)
+
+def call_llm_json(
+    prompt: str,
+    schema_model: Type[BaseModel],
+    task: str = "generic",
+    priority: Optional[int] = None,
+    model_name: Optional[str] = None
+) -> Optional[BaseModel]:
+    """
+    Calls Gemini with a prompt and forces JSON output matching the Pydantic schema.
+    Incorporates retry logic (manual, though Gemini mostly respects schema in prompt).
+    Every attempt waits for a slot from the process-wide LLM scheduler, under
+    `priority` (default: the llm_context() in effect, else interactive).
+    `model_name` defaults to MODEL_NAME.
+    Every call is recorded in LLM telemetry under `task`.
+    """
+    model_name = model_name or MODEL_NAME
+    full_prompt = build_json_prompt(prompt, schema_model)
+
+    cache_key = _cache_key(model_name, schema_model, full_prompt)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        record_llm_call(task, model_name, cache_hit=True)
+        return cached
+
+    if not configure_genai():
+        return None
+
+    model = get_model(model_name)
+    scheduler = llm_scheduler.get_scheduler()
+    if priority is None:
+        priority = llm_scheduler.current_priority()
+    user = llm_scheduler.current_user()
+    reserved = len(full_prompt) // 4 + LLM_RESPONSE_TOKENS_ESTIMATE
+
+    # Telemetry accumulated across attempts
+    start = time.perf_counter()
+    prompt_tokens = 0
+    response_tokens = 0
+    validation_failures = 0
+
     # Retry loop
     max_retries = 2
     for attempt in range(max_retries + 1):
+        try:
+            scheduler.acquire(priority, user, reserved)
+        except llm_scheduler.SchedulerTimeout as e:
+            record_llm_call(
+                task, model_name, prompt_tokens, response_tokens,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                attempts=attempt,
+                validation_failures=validation_failures,
+                success=False
+            )
+            st.error(f"LLM is busy, please try again shortly ({e}).")
+            return None
+
         try:
             # Using generation_config to encourage JSON (if supported by model version)
             # gemini-1.5-flash and later support response_mime_type="application/json"
@@ -63,6 +183,14 @@ def call_llm_json(prompt: str, schema_model: Type[BaseModel]) -> Optional[BaseMo
                 full_prompt,
                 generation_config={"response_mime_type": "application/json"}
             )
+
+            usage = getattr(response, "usage_metadata", None)
+            if usage:
+                used_prompt = getattr(usage, "prompt_token_count", 0) or 0
+                used_response = getattr(usage, "candidates_token_count", 0) or 0
+                prompt_tokens += used_prompt
+                response_tokens += used_response
+                scheduler.reconcile(reserved, used_prompt + used_response)
             
             # Clean response text just in case (remove backticks)
             text = response.text.strip()
@@ -73,43 +201,95 @@ def call_llm_json(prompt: str, schema_model: Type[BaseModel]) -> Optional[BaseMo
             text = text.strip()
 
             # Validate with Pydantic
-            data_dict = json.loads(text)
-            validated_obj = schema_model(**data_dict)
+            try:
+                data_dict = json.loads(text)
+                validated_obj = schema_model(**data_dict)
+            except (ValueError, TypeError):
+                # json.JSONDecodeError and pydantic.ValidationError are both ValueErrors
+                validation_failures += 1
+                raise
+
+            record_llm_call(
+                task, model_name, prompt_tokens, response_tokens,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                attempts=attempt + 1,
+                validation_failures=validation_failures
+            )
+            _cache_put(cache_key, validated_obj)
             return validated_obj
             
         except Exception as e:
+            if _is_rate_limited(e):
+                # Quota exhausted: hold every queued call, not just this retry
+                scheduler.backoff()
             if attempt < max_retries:
                 print(f"LLM Parsing Error (Attempt {attempt+1}): {e}. Retrying...")
                 continue
             else:
+                record_llm_call(
+                    task, model_name, prompt_tokens, response_tokens,
+                    latency_ms=(time.perf_counter() - start) * 1000,
+                    attempts=attempt + 1,
+                    validation_failures=validation_failures,
+                    success=False
+                )
                 st.error(f"LLM Error after retries: {e}")
                 return None
     return None
 
 # --- Specific Tasks ---
+# Prompt builders are separate from the calls so they can be benchmarked/reused.
 
-def parse_job_description(text: str) -> Optional[JobParsingSchema]:
-    prompt = f"""
+def build_job_description_prompt(text: str) -> str:
+    return f"""
     Extract structured job details from the following Job Description text.
     If a field is missing, leave it null or empty list.
     
     Job Description:
     {text}
     """
-    return call_llm_json(prompt, JobParsingSchema)
 
-def parse_resume(text: str) -> Optional[CandidateParsingSchema]:
-    prompt = f"""
+def parse_job_description(text: str) -> Optional[JobParsingSchema]:
+    return call_llm_json(build_job_description_prompt(text), JobParsingSchema, task="parse_job_description")
+
+def build_resume_prompt(text: str) -> str:
+    return f"""
     Extract structured candidate details from the following Resume text.
     Analyze carefully.
     
     Resume Text:
     {text}
     """
-    return call_llm_json(prompt, CandidateParsingSchema)
 
-def evaluate_candidate(job_json: Dict, candidate_json: Dict, resume_text: str) -> Optional[EvaluationResult]:
-    prompt = f"""
+def parse_resume(text: str) -> Optional[CandidateParsingSchema]:
+    return call_llm_json(build_resume_prompt(text), CandidateParsingSchema, task="parse_resume")
+
+@lru_cache(maxsize=64)
+def _resume_fields_schema(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    # CandidateParsingSchema restricted to `fields`; one model per field set, so its
+    # schema dump is cached by _schema_json as well
+    model_fields = CandidateParsingSchema.model_fields
+    return create_model(
+        "CandidateResidualFields",
+        **{name: (model_fields[name].annotation, model_fields[name]) for name in fields}
+    )
+
+def build_resume_fields_prompt(text: str, fields: List[str]) -> str:
+    return f"""
+    Extract only these candidate details from the following Resume text: {", ".join(fields)}.
+    If a field is missing, leave it null or empty list.
+    
+    Resume Text:
+    {text}
+    """
+
+def parse_resume_fields(text: str, fields: List[str]) -> Optional[BaseModel]:
+    """LLM extraction of a subset of CandidateParsingSchema fields (see src/resume_parser.py)."""
+    schema = _resume_fields_schema(tuple(f for f in CandidateParsingSchema.model_fields if f in fields))
+    return call_llm_json(build_resume_fields_prompt(text, fields), schema, task="parse_resume_fields")
+
+def build_evaluation_prompt(job_json: Dict, candidate_json: Dict, resume_text: str) -> str:
+    return f"""
     Evaluate the candidate against the job description.
     
     Job Details:
@@ -125,11 +305,172 @@ def evaluate_candidate(job_json: Dict, candidate_json: Dict, resume_text: str) -
     - strict scoring: 0-100.
     - provide evidence based on text.
     - identify risk flags (e.g. gaps, job hopping without reason).
+    - confidence: 0-1, lower when the resume is thin, vague or ambiguous for this role.
     """
-    return call_llm_json(prompt, EvaluationResult)
 
-def generate_outreach(candidate_first_name: str, job_title: str, company_name: str, tone: str) -> Optional[OutreachMessage]:
-    prompt = f"""
+# --- Evaluation cascade ---
+# Most evaluations don't need the strongest model. A rule-based pre-screen rejects
+# resumes that mention few of the job's must-have skills without any LLM call; the
+# rest go to EVAL_FAST_MODEL first, and only results with low confidence or a score
+# inside EVAL_BORDERLINE_BAND (where a few points change the decision) are evaluated
+# again by MODEL_NAME. Routing counts, latency and estimated cost per tier are kept
+# process-wide; the fast pass is logged in LLM telemetry as "evaluate_candidate_fast".
+
+CASCADE_TIERS = ["prescreen", "fast", "escalated", "strong"]
+ESCALATION_REASONS = ["low_confidence", "borderline", "fast_failed"]
+
+_cascade_lock = threading.Lock()
+
+def _new_cascade_stats() -> Dict:
+    return {
+        "tiers": {t: {"evaluations": 0, "llm_calls": 0, "latency_ms": 0.0, "cost_usd": 0.0} for t in CASCADE_TIERS},
+        "escalations": {r: 0 for r in ESCALATION_REASONS}
+    }
+
+_cascade_stats = _new_cascade_stats()
+
+def _record_route(tier: str, latency_ms: float, llm_calls: int = 0, cost_usd: float = 0.0, reason: Optional[str] = None):
+    with _cascade_lock:
+        stats = _cascade_stats["tiers"][tier]
+        stats["evaluations"] += 1
+        stats["llm_calls"] += llm_calls
+        stats["latency_ms"] += latency_ms
+        stats["cost_usd"] += cost_usd
+        if reason:
+            _cascade_stats["escalations"][reason] += 1
+
+def get_cascade_stats() -> Dict:
+    """Evaluations routed to each tier since start, with average latency and estimated cost."""
+    with _cascade_lock:
+        tiers = {t: dict(v) for t, v in _cascade_stats["tiers"].items()}
+        escalations = dict(_cascade_stats["escalations"])
+    total = sum(t["evaluations"] for t in tiers.values())
+    for t in tiers.values():
+        n = t["evaluations"]
+        t["share"] = round(n / total, 3) if total else 0.0
+        t["avg_latency_ms"] = round(t["latency_ms"] / n, 1) if n else 0.0
+        t["avg_cost_usd"] = round(t["cost_usd"] / n, 6) if n else 0.0
+        t["latency_ms"] = round(t["latency_ms"], 1)
+        t["cost_usd"] = round(t["cost_usd"], 4)
+    return {"evaluations": total, "tiers": tiers, "escalations": escalations}
+
+def reset_cascade_stats():
+    global _cascade_stats
+    with _cascade_lock:
+        _cascade_stats = _new_cascade_stats()
+
+def cascade_prometheus_lines() -> List[str]:
+    cascade = get_cascade_stats()
+    lines = [
+        "# HELP llm_evaluations_total Candidate evaluations by the cascade tier that produced them.",
+        "# TYPE llm_evaluations_total counter"
+    ]
+    lines += [f'llm_evaluations_total{{tier="{tier}"}} {t["evaluations"]}' for tier, t in cascade["tiers"].items()]
+    lines += [
+        "# HELP llm_evaluation_escalations_total Fast-model evaluations re-run on the stronger model.",
+        "# TYPE llm_evaluation_escalations_total counter"
+    ]
+    lines += [f'llm_evaluation_escalations_total{{reason="{r}"}} {n}' for r, n in cascade["escalations"].items()]
+    return lines
+
+register_collector(cascade_prometheus_lines)
+
+def skill_mentioned(skill: str, text: str) -> bool:
+    # `text` must be lowercased. "Node.js" also matches "nodejs", "CI-CD" also matches "ci cd"; whole words only
+    skill = skill.lower().strip()
+    variants = {skill, skill.replace(".", ""), skill.replace("-", " ")}
+    return any(
+        re.search(r"(?<![a-z0-9])" + re.escape(v) + r"(?![a-z0-9])", text)
+        for v in variants if v
+    )
+
+def prescreen_evaluation(job_json: Dict, resume_text: str) -> Optional[EvaluationResult]:
+    """
+    Deterministic reject for resumes that mention fewer than EVAL_PRESCREEN_MIN_COVERAGE
+    of the job's must-have skills. None when the candidate needs a model evaluation.
+    """
+    skills = [s for s in (job_json.get("must_have_skills") or []) if s and s.strip()]
+    if len(skills) < EVAL_PRESCREEN_MIN_SKILLS or len(resume_text or "") < EVAL_PRESCREEN_MIN_RESUME_CHARS:
+        return None
+    text = resume_text.lower()
+    missing = [s for s in skills if not skill_mentioned(s, text)]
+    coverage = 1 - len(missing) / len(skills)
+    if coverage >= EVAL_PRESCREEN_MIN_COVERAGE:
+        return None
+
+    score = round(coverage * 100)
+    return EvaluationResult(
+        overall_score=score,
+        score_breakdown=ScoreBreakdown(
+            skills_match=score, experience_relevance=score, impact=score,
+            communication=score, seniority_fit=score
+        ),
+        ai_summary=(
+            f"Rule-based pre-screen: the resume mentions {len(skills) - len(missing)} of "
+            f"{len(skills)} must-have skills, so it was not sent for a full AI evaluation. "
+            "Re-run the evaluation after the resume is updated if this looks wrong."
+        ),
+        strengths=[],
+        concerns=[f"Missing must-have skill: {s}" for s in missing],
+        missing_must_haves=missing,
+        risk_flags=["Pre-screened: most must-have skills not found in resume"],
+        suggested_interview_questions=[],
+        confidence=1.0
+    )
+
+def _escalation_reason(result: EvaluationResult) -> Optional[str]:
+    if result.confidence is None or result.confidence < EVAL_ESCALATE_CONFIDENCE:
+        return "low_confidence"
+    low, high = EVAL_BORDERLINE_BAND
+    if low <= result.overall_score <= high:
+        return "borderline"
+    return None
+
+def _estimated_cost(model_name: str, prompt: str) -> float:
+    return estimate_cost(model_name, len(prompt) // 4, EVALUATION_RESPONSE_TOKENS)
+
+def evaluate_candidate_routed(job_json: Dict, candidate_json: Dict, resume_text: str) -> Tuple[Optional[EvaluationResult], Dict]:
+    """
+    Evaluate through the cascade. Returns (result, routing), where routing is
+    {"tier", "model", "reason", "calls", "cost_usd"}: the tier that produced the
+    result, its model (None for the pre-screen), why the fast result was escalated (if
+    it was), and the LLM calls made and their estimated cost.
+    """
+    start = time.perf_counter()
+    if not EVAL_CASCADE_ENABLED:
+        prompt = build_evaluation_prompt(job_json, candidate_json, resume_text)
+        result = call_llm_json(prompt, EvaluationResult, task="evaluate_candidate")
+        cost = _estimated_cost(MODEL_NAME, prompt)
+        _record_route("strong", (time.perf_counter() - start) * 1000, 1, cost)
+        return result, {"tier": "strong", "model": MODEL_NAME, "reason": None, "calls": 1, "cost_usd": cost}
+
+    result = prescreen_evaluation(job_json, resume_text)
+    if result is not None:
+        _record_route("prescreen", (time.perf_counter() - start) * 1000)
+        return result, {"tier": "prescreen", "model": None, "reason": None, "calls": 0, "cost_usd": 0.0}
+
+    prompt = build_evaluation_prompt(job_json, candidate_json, resume_text)
+    fast = call_llm_json(prompt, EvaluationResult, task="evaluate_candidate_fast", model_name=EVAL_FAST_MODEL)
+    cost = _estimated_cost(EVAL_FAST_MODEL, prompt)
+    reason = "fast_failed" if fast is None else _escalation_reason(fast)
+    if reason is None:
+        _record_route("fast", (time.perf_counter() - start) * 1000, 1, cost)
+        return fast, {"tier": "fast", "model": EVAL_FAST_MODEL, "reason": None, "calls": 1, "cost_usd": cost}
+
+    strong = call_llm_json(prompt, EvaluationResult, task="evaluate_candidate")
+    cost += _estimated_cost(MODEL_NAME, prompt)
+    if strong is None and fast is not None:
+        # Stronger model unavailable: the fast result beats no result
+        _record_route("fast", (time.perf_counter() - start) * 1000, 2, cost)
+        return fast, {"tier": "fast", "model": EVAL_FAST_MODEL, "reason": None, "calls": 2, "cost_usd": cost}
+    _record_route("escalated", (time.perf_counter() - start) * 1000, 2, cost, reason)
+    return strong, {"tier": "escalated", "model": MODEL_NAME, "reason": reason, "calls": 2, "cost_usd": cost}
+
+def evaluate_candidate(job_json: Dict, candidate_json: Dict, resume_text: str) -> Optional[EvaluationResult]:
+    return evaluate_candidate_routed(job_json, candidate_json, resume_text)[0]
+
+def build_outreach_prompt(candidate_first_name: str, job_title: str, company_name: str, tone: str) -> str:
+    return f"""
     Write a recruitment outreach email.
     Candidate: {candidate_first_name}
     Job: {job_title}
@@ -138,14 +479,99 @@ def generate_outreach(candidate_first_name: str, job_title: str, company_name: s
     
     Return JSON with 'subject' and 'body'.
     """
-    return call_llm_json(prompt, OutreachMessage)
 
-def summarize_screening(chat_history: str) -> Optional[ScreeningResult]:
-    prompt = f"""
+def generate_outreach(candidate_first_name: str, job_title: str, company_name: str, tone: str) -> Optional[OutreachMessage]:
+    prompt = build_outreach_prompt(candidate_first_name, job_title, company_name, tone)
+    return call_llm_json(prompt, OutreachMessage, task="generate_outreach")
+
+def build_outreach_template_prompt(job_title: str, company_name: str, tone: str, placeholders: List[str], variant: int = 0) -> str:
+    return f"""
+    Write a reusable recruitment outreach email template, sent to many candidates.
+    Job: {job_title}
+    Company: {company_name or 'Our Company'}
+    Tone: {tone} (options: friendly, formal, concise)
+    Variant: {variant + 1} (make each variant's wording distinct)
+
+    Don't write any candidate-specific details. Where the candidate's details belong,
+    use these placeholders exactly as written: {', '.join('$' + p for p in placeholders)}.
+    Don't use any other $ placeholders and don't write a literal $ sign.
+
+    Return JSON with 'subject' and 'body'.
+    """
+
+def generate_outreach_template(job_title: str, company_name: str, tone: str, placeholders: List[str], variant: int = 0) -> Optional[OutreachMessage]:
+    prompt = build_outreach_template_prompt(job_title, company_name, tone, placeholders, variant)
+    return call_llm_json(prompt, OutreachMessage, task="outreach_template")
+
+def build_personalized_outreach_prompt(candidate: Dict, job: Dict, company_name: str, tone: str) -> str:
+    return f"""
+    Write a recruitment outreach email tailored to this candidate's background.
+    Refer to specific, relevant experience or skills from their profile.
+    Company: {company_name or 'Our Company'}
+    Tone: {tone} (options: friendly, formal, concise)
+
+    Job:
+    {json.dumps(job, indent=2, default=str)}
+
+    Candidate:
+    {json.dumps(candidate, indent=2, default=str)}
+
+    Return JSON with 'subject' and 'body'.
+    """
+
+def generate_personalized_outreach(candidate: Dict, job: Dict, company_name: str, tone: str) -> Optional[OutreachMessage]:
+    prompt = build_personalized_outreach_prompt(candidate, job, company_name, tone)
+    return call_llm_json(prompt, OutreachMessage, task="personalized_outreach")
+
+def build_screening_prompt(chat_history: str) -> str:
+    return f"""
     Analyze the following screening chat history between a recruiter and candidate.
     Update the rubric notes. suggest stage.
     
     Chat Limit:
     {chat_history}
     """
-    return call_llm_json(prompt, ScreeningResult)
+
+def summarize_screening(chat_history: str) -> Optional[ScreeningResult]:
+    return call_llm_json(build_screening_prompt(chat_history), ScreeningResult, task="summarize_screening")
+
+def build_screening_chunk_prompt(chunk: str) -> str:
+    # No position / total in the prompt: a chunk's summary must not change when the
+    # transcript grows, so it can be cached by the chunk's content alone.
+    return f"""
+    The following is one consecutive part of a longer screening interview transcript
+    between a recruiter and a candidate. Summarize only this part.
+    List concrete evidence of skills and experience, concerns, and unresolved topics.
+
+    Transcript Part:
+    {chunk}
+    """
+
+def summarize_screening_chunk(chunk: str) -> Optional[ScreeningChunkSummary]:
+    return call_llm_json(build_screening_chunk_prompt(chunk), ScreeningChunkSummary, task="screening_chunk")
+
+def build_screening_reduce_prompt(chunk_summaries: List[Dict]) -> str:
+    return f"""
+    Below are summaries of consecutive parts of one screening interview, in order.
+    Combine them into a single assessment of the candidate: an overall summary,
+    a recommended next stage, and updated rubric notes.
+
+    Part Summaries:
+    {json.dumps(chunk_summaries, indent=2)}
+    """
+
+def reduce_screening(chunk_summaries: List[Dict]) -> Optional[ScreeningResult]:
+    return call_llm_json(build_screening_reduce_prompt(chunk_summaries), ScreeningResult, task="screening_reduce")
+
+def build_screening_merge_prompt(chunk_summaries: List[Dict]) -> str:
+    return f"""
+    Below are summaries of consecutive parts of one screening interview, in order.
+    Merge them into one summary of the same shape, keeping the most important
+    evidence, concerns and unresolved topics.
+
+    Part Summaries:
+    {json.dumps(chunk_summaries, indent=2)}
+    """
+
+def merge_screening_summaries(chunk_summaries: List[Dict]) -> Optional[ScreeningChunkSummary]:
+    return call_llm_json(build_screening_merge_prompt(chunk_summaries), ScreeningChunkSummary, task="screening_merge")
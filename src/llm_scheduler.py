@@ -0,0 +1,271 @@
+import time
+import threading
+import contextlib
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Callable, Deque
+
+from src.metrics import register_collector
+from src.constants import (
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    LLM_QUEUE_TIMEOUT_SECONDS,
+    LLM_RATE_LIMIT_BACKOFF_SECONDS
+)
+
+# Process-wide Gemini quota manager.
+# Every live LLM call (cache hits don't count) takes a slot from the scheduler first.
+# Slots are granted within a requests/minute and a tokens/minute token bucket; tokens
+# are reserved from an estimate and reconciled with the reported usage afterwards.
+# Waiting calls are served strictly by priority class (interactive, then candidate
+# portal, then batch) and round-robin across users within a class, so one user's bulk
+# action can neither starve another user's click nor another user's batch. A 429 from
+# the API pauses all dispatch for LLM_RATE_LIMIT_BACKOFF_SECONDS.
+# The priority and user of a call come from llm_context(); pages default to
+# interactive for the signed-in user. Work fanned out to thread pools must be wrapped
+# with bind_context() to keep them.
+
+INTERACTIVE = 0
+PORTAL = 1
+BATCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PORTAL: "portal", BATCH: "batch"}
+
+WAIT_SAMPLES = 500
+
+_priority: ContextVar[Optional[int]] = ContextVar("llm_priority", default=None)
+_user: ContextVar[Optional[str]] = ContextVar("llm_user", default=None)
+
+class SchedulerTimeout(Exception):
+    """No LLM slot was granted within the queue timeout."""
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (amounts above capacity wait for a full bucket)."""
+        needed = min(amount, self.capacity) - self.level
+        return 0.0 if needed <= 0 else needed / self.rate
+
+class _Ticket:
+    __slots__ = ("priority", "user", "tokens", "enqueued")
+
+    def __init__(self, priority: int, user: str, tokens: int):
+        self.priority = priority
+        self.user = user
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+
+class LLMScheduler:
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        # Per priority: user -> their waiting tickets; user order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._paused_until = 0.0
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLES) for p in PRIORITY_NAMES}
+        self.stats = {p: {"granted": 0, "timeouts": 0, "wait_s_total": 0.0, "wait_s_max": 0.0} for p in PRIORITY_NAMES}
+        self.rate_limited = 0
+
+    def _head(self) -> Optional[_Ticket]:
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            if users:
+                return users[next(iter(users))][0]
+        return None
+
+    def _enqueue(self, ticket: _Ticket):
+        users = self._queues[ticket.priority]
+        users.setdefault(ticket.user, deque()).append(ticket)
+
+    def _dequeue(self, ticket: _Ticket):
+        users = self._queues[ticket.priority]
+        queue = users.get(ticket.user)
+        if not queue:
+            return
+        try:
+            queue.remove(ticket)
+        except ValueError:
+            return
+        if queue:
+            # Served (or gave up): this user goes to the back of the round-robin
+            users.move_to_end(ticket.user)
+        else:
+            del users[ticket.user]
+
+    def acquire(self, priority: int, user: str, tokens: int, timeout: float = LLM_QUEUE_TIMEOUT_SECONDS) -> float:
+        """Block until the call may proceed. Returns seconds waited; raises SchedulerTimeout."""
+        ticket = _Ticket(priority, user, tokens)
+        deadline = ticket.enqueued + timeout
+        with self._cond:
+            self._enqueue(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= deadline:
+                        self.stats[priority]["timeouts"] += 1
+                        raise SchedulerTimeout(f"No LLM capacity within {timeout:.0f}s")
+                    if self._head() is ticket:
+                        self.requests.refill(now)
+                        self.tokens.refill(now)
+                        wait = max(
+                            self._paused_until - now,
+                            self.requests.wait_for(1),
+                            self.tokens.wait_for(tokens)
+                        )
+                        if wait <= 0:
+                            self.requests.level -= 1
+                            self.tokens.level -= tokens
+                            break
+                        self._cond.wait(min(wait, deadline - now))
+                    else:
+                        self._cond.wait(deadline - now)
+            finally:
+                self._dequeue(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - ticket.enqueued
+            stats = self.stats[priority]
+            stats["granted"] += 1
+            stats["wait_s_total"] += waited
+            stats["wait_s_max"] = max(stats["wait_s_max"], waited)
+            self._waits[priority].append(waited)
+        return waited
+
+    def reconcile(self, reserved: int, used: int):
+        """Correct the token bucket once the real usage of a call is known."""
+        if not used:
+            return
+        with self._cond:
+            self.tokens.level += reserved - used
+            self._cond.notify_all()
+
+    def backoff(self, seconds: float = LLM_RATE_LIMIT_BACKOFF_SECONDS):
+        """Pause all dispatch (after a 429 from the API)."""
+        with self._cond:
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            classes = []
+            for priority, name in PRIORITY_NAMES.items():
+                users = self._queues[priority]
+                waits = sorted(self._waits[priority])
+                stats = self.stats[priority]
+                classes.append({
+                    "priority": name,
+                    "queued": sum(len(q) for q in users.values()),
+                    "queued_users": len(users),
+                    "oldest_wait_s": round(max((now - q[0].enqueued for q in users.values()), default=0.0), 2),
+                    "granted": stats["granted"],
+                    "timeouts": stats["timeouts"],
+                    "avg_wait_s": round(stats["wait_s_total"] / stats["granted"], 3) if stats["granted"] else 0.0,
+                    "p95_wait_s": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3) if waits else 0.0,
+                    "max_wait_s": round(stats["wait_s_max"], 3)
+                })
+            return {
+                "classes": classes,
+                "requests_available": round(self.requests.level, 1),
+                "requests_per_minute": self.requests.capacity,
+                "tokens_available": int(self.tokens.level),
+                "tokens_per_minute": int(self.tokens.capacity),
+                "paused_s": round(max(0.0, self._paused_until - now), 1),
+                "rate_limited": self.rate_limited
+            }
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> LLMScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
+
+def configure_scheduler(requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE) -> LLMScheduler:
+    """Replace the process-wide scheduler (new quota, empty queues and stats)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = LLMScheduler(requests_per_minute, tokens_per_minute)
+        return _scheduler
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    return get_scheduler().snapshot()
+
+def prometheus_lines() -> List[str]:
+    sched = get_scheduler_stats()
+    lines = []
+    for name, kind, help_text, field in [
+        ("llm_queue_depth", "gauge", "LLM calls waiting for a scheduler slot.", "queued"),
+        ("llm_queue_oldest_wait_seconds", "gauge", "Wait so far of the oldest queued LLM call.", "oldest_wait_s"),
+        ("llm_granted_total", "counter", "LLM calls granted a scheduler slot.", "granted"),
+        ("llm_queue_timeouts_total", "counter", "LLM calls that gave up waiting for a slot.", "timeouts"),
+        ("llm_queue_wait_seconds_p95", "gauge", "p95 queue wait of recently granted LLM calls.", "p95_wait_s")
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{priority="{c["priority"]}"}} {c[field]}' for c in sched["classes"]]
+    lines += [
+        "# HELP llm_rate_limited_total Dispatch pauses after a 429 from the LLM API.",
+        "# TYPE llm_rate_limited_total counter",
+        f"llm_rate_limited_total {sched['rate_limited']}"
+    ]
+    return lines
+
+register_collector(prometheus_lines)
+
+# --- Call context ---
+
+def _session_user() -> Optional[str]:
+    try:
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        if get_script_run_ctx(suppress_warning=True) is None:
+            return None
+        user = st.session_state.get("user")
+        return getattr(user, "id", None)
+    except Exception:
+        return None
+
+def current_priority() -> int:
+    priority = _priority.get()
+    return INTERACTIVE if priority is None else priority
+
+def current_user() -> str:
+    return _user.get() or _session_user() or "system"
+
+@contextlib.contextmanager
+def llm_context(priority: Optional[int] = None, user: Optional[str] = None):
+    """Run LLM calls in this block with the given priority class and/or user."""
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if user is not None:
+        tokens.append((_user, _user.set(user)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+def bind_context(fn: Callable) -> Callable:
+    """Wrap `fn` so worker threads run it with the caller's priority and user."""
+    priority, user = current_priority(), current_user()
+
+    def run(*args, **kwargs):
+        with llm_context(priority, user):
+            return fn(*args, **kwargs)
+    return run
@@ -0,0 +1,98 @@
+import time
+import streamlit as st
+from typing import Optional, List, Dict, Any, Callable
+
+from src.db import (
+    get_user_role,
+    get_job_options,
+    get_application_options,
+    get_application_bundle,
+    get_stage_time_stats,
+    get_weekly_stage_flow,
+    get_stuck_applications
+)
+from src.telemetry import get_llm_calls
+
+# Page data loaders.
+# Each page rerun re-executes the whole script, so anything fetched from Supabase
+# is memoized in st.session_state and only refetched when its version is bumped
+# (after a mutation) or its TTL expires. Query counts are recorded by src.metrics.
+
+CACHE_KEY = "page_data_cache"
+VERSIONS_KEY = "page_data_versions"
+
+ROLE_TTL_SECONDS = 300
+JOBS_TTL_SECONDS = 60
+# Other users' stage moves, evaluations and new candidates show up within this long
+APPLICATIONS_TTL_SECONDS = 30
+STAGE_ANALYTICS_TTL_SECONDS = 300
+LLM_CALLS_TTL_SECONDS = 60
+
+# --- Memoization ---
+
+def _version(kind: str, key: str) -> int:
+    return st.session_state.setdefault(VERSIONS_KEY, {}).get((kind, key), 0)
+
+def _memoized(kind: str, key: str, loader: Callable, *args, ttl: Optional[int] = None) -> Any:
+    """
+    Return the cached value for (kind, key, version), loading it on a miss.
+    Only the latest version of each entry is kept.
+    """
+    cache = st.session_state.setdefault(CACHE_KEY, {})
+    version = _version(kind, key)
+    entry = cache.get((kind, key))
+    if entry and entry["version"] == version:
+        if ttl is None or time.time() - entry["loaded_at"] < ttl:
+            return entry["data"]
+
+    data = loader(*args)
+    # Don't memoize failures, the next rerun should retry
+    if data is not None:
+        cache[(kind, key)] = {"version": version, "loaded_at": time.time(), "data": data}
+    return data
+
+def invalidate(kind: str, key: str):
+    """Bump the version of a cached entry so the next load refetches it."""
+    versions = st.session_state.setdefault(VERSIONS_KEY, {})
+    versions[(kind, key)] = versions.get((kind, key), 0) + 1
+
+# --- Loaders ---
+
+def load_user_role(user_id: str) -> Optional[str]:
+    return _memoized("role", user_id, get_user_role, user_id, ttl=ROLE_TTL_SECONDS)
+
+def load_job_options() -> List[Dict]:
+    return _memoized("jobs", "all", get_job_options, ttl=JOBS_TTL_SECONDS) or []
+
+def load_application_options(job_id: str, include_archived: bool = False) -> List[Dict]:
+    kind = "job_apps_all" if include_archived else "job_apps"
+    return _memoized(
+        kind, job_id, get_application_options, job_id, include_archived, ttl=APPLICATIONS_TTL_SECONDS
+    ) or []
+
+def load_application(app_id: str) -> Optional[Dict]:
+    """Application + job + candidate, fetched in one composed query (notes: src.notes)."""
+    return _memoized("application", app_id, get_application_bundle, app_id, ttl=APPLICATIONS_TTL_SECONDS)
+
+def load_stage_analytics(job_id: Optional[str], stuck_days: int) -> Dict[str, Any]:
+    """Time-in-stage, weekly flow and stuck lists for the Dashboard (None entries on error)."""
+    key = job_id or "all"
+    return {
+        "time_in_stage": _memoized("stage_time", key, get_stage_time_stats, job_id, ttl=STAGE_ANALYTICS_TTL_SECONDS),
+        "weekly_flow": _memoized("stage_flow", key, get_weekly_stage_flow, job_id, ttl=STAGE_ANALYTICS_TTL_SECONDS),
+        "stuck": _memoized(
+            "stage_stuck", f"{key}:{stuck_days}", get_stuck_applications, job_id, stuck_days,
+            ttl=STAGE_ANALYTICS_TTL_SECONDS
+        )
+    }
+
+def load_llm_calls(days: int) -> List[Dict]:
+    """LLM telemetry rows for the Admin usage charts (local SQLite, re-read at most once a minute)."""
+    return _memoized("llm_calls", str(days), get_llm_calls, days, ttl=LLM_CALLS_TTL_SECONDS) or []
+
+def invalidate_application(app_id: str, job_id: Optional[str] = None):
+    """Call after mutating an application (stage, evaluation)."""
+    invalidate("application", app_id)
+    if job_id:
+        invalidate("job_apps", job_id)
+        invalidate("job_apps_all", job_id)
@@ -0,0 +1,224 @@
+import json
+import time
+import logging
+import threading
+import functools
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Callable
+
+import streamlit as st
+
+# DB instrumentation.
+# Every function in src/db.py is wrapped with @instrumented, which records call count,
+# latency histogram, payload bytes and errors per (page, function) in a process-wide
+# store shared by all sessions. Pages tag themselves with begin_rerun(page).
+# Other subsystems (LLM scheduler, evaluation cascade, resume parser) add their own
+# series to the Prometheus export with register_collector(), so this module doesn't
+# depend on them.
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+_lock = threading.Lock()
+_series: Dict[tuple, Dict[str, Any]] = {}
+_collectors: List[Callable[[], List[str]]] = []
+
+# Context of the running script thread (each Streamlit session reruns in its own thread)
+_current_page: ContextVar[str] = ContextVar("current_page", default="unknown")
+_current_function: ContextVar[Optional[str]] = ContextVar("current_function", default=None)
+_rerun_stats: ContextVar[Optional[Dict[str, Any]]] = ContextVar("rerun_stats", default=None)
+
+def _new_series() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "total_ms": 0.0,
+        "max_ms": 0.0,
+        "payload_bytes": 0,
+        "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),  # last bucket is +Inf
+        "last_error": None
+    }
+
+def _payload_size(result: Any) -> int:
+    if isinstance(result, (list, dict)):
+        try:
+            return len(json.dumps(result, default=str))
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+def _record(page: str, function: str, elapsed_ms: float, payload_bytes: int):
+    bucket = len(LATENCY_BUCKETS_MS)
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            bucket = i
+            break
+    with _lock:
+        s = _series.setdefault((page, function), _new_series())
+        s["calls"] += 1
+        s["total_ms"] += elapsed_ms
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        s["payload_bytes"] += payload_bytes
+        s["buckets"][bucket] += 1
+
+    stats = _rerun_stats.get()
+    if stats is not None:
+        stats["queries"] += 1
+        stats["query_ms"] += elapsed_ms
+
+def record_error(message: str, error: Exception):
+    """Count an error against the db function currently executing and log it."""
+    page = _current_page.get()
+    function = _current_function.get() or "unknown"
+    with _lock:
+        s = _series.setdefault((page, function), _new_series())
+        s["errors"] += 1
+        s["last_error"] = f"{message}: {error}"
+    logger.warning("%s [%s/%s]: %s", message, page, function, error)
+
+def instrumented(func: Callable) -> Callable:
+    """Decorator recording latency, payload size and errors of a db function."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_function.set(func.__name__)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except Exception as e:
+            record_error("Unhandled error", e)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _current_function.reset(token)
+            _record(_current_page.get(), func.__name__, elapsed_ms, _payload_size(result))
+    return wrapper
+
+# --- Per-rerun stats ---
+
+def begin_rerun(page: str):
+    """Tag subsequent db calls with this page and reset the per-rerun counters.
+    Call once at the top of each page script."""
+    _current_page.set(page)
+    _rerun_stats.set({"page": page, "queries": 0, "query_ms": 0.0, "started": time.perf_counter()})
+    # Every page calls this first, so it's also where session footprints get sampled
+    from src.session_store import track_session
+    track_session(page)
+
+def get_rerun_stats() -> Dict[str, Any]:
+    """Queries issued and wall time (ms) for the current rerun so far."""
+    stats = _rerun_stats.get()
+    if not stats:
+        return {"page": None, "queries": 0, "query_ms": 0.0, "wall_ms": 0.0}
+    return {
+        "page": stats["page"],
+        "queries": stats["queries"],
+        "query_ms": round(stats["query_ms"], 1),
+        "wall_ms": round((time.perf_counter() - stats["started"]) * 1000, 1)
+    }
+
+def render_rerun_stats():
+    """Small sidebar caption so query regressions are visible while using the page."""
+    stats = get_rerun_stats()
+    st.sidebar.caption(f"⏱️ {stats['queries']} queries · {stats['query_ms']} ms db · {stats['wall_ms']} ms total")
+
+# --- Reporting / Export ---
+
+def _quantile_ms(buckets: List[int], q: float) -> Optional[float]:
+    """Approximate quantile as the upper bound of the bucket containing it."""
+    total = sum(buckets)
+    if total == 0:
+        return None
+    target = q * total
+    running = 0
+    for i, count in enumerate(buckets):
+        running += count
+        if running >= target:
+            return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else float("inf")
+    return float("inf")
+
+def get_metrics_snapshot() -> List[Dict[str, Any]]:
+    """One row per (page, function), sorted by total time spent."""
+    with _lock:
+        items = [(k, dict(v, buckets=list(v["buckets"]))) for k, v in _series.items()]
+
+    rows = []
+    for (page, function), s in items:
+        rows.append({
+            "page": page,
+            "function": function,
+            "calls": s["calls"],
+            "errors": s["errors"],
+            "total_ms": round(s["total_ms"], 1),
+            "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0.0,
+            "p50_ms": _quantile_ms(s["buckets"], 0.5),
+            "p95_ms": _quantile_ms(s["buckets"], 0.95),
+            "max_ms": round(s["max_ms"], 1),
+            "payload_bytes": s["payload_bytes"],
+            "buckets": s["buckets"],
+            "last_error": s["last_error"]
+        })
+    rows.sort(key=lambda r: r["total_ms"], reverse=True)
+    return rows
+
+def reset_metrics():
+    with _lock:
+        _series.clear()
+
+def export_json() -> str:
+    return json.dumps({
+        "generated_at": time.time(),
+        "latency_buckets_ms": LATENCY_BUCKETS_MS,
+        "series": get_metrics_snapshot()
+    }, indent=2, default=str)
+
+def register_collector(collector: Callable[[], List[str]]):
+    """Add a function returning Prometheus exposition lines to export_prometheus()."""
+    with _lock:
+        if collector not in _collectors:
+            _collectors.append(collector)
+
+def _labels(page: str, function: str, **extra) -> str:
+    pairs = {"page": page, "function": function, **extra}
+    return ",".join(f'{k}="{v}"' for k, v in pairs.items())
+
+def export_prometheus() -> str:
+    """Prometheus text exposition format (v0.0.4)."""
+    rows = get_metrics_snapshot()
+    lines = [
+        "# HELP db_calls_total Number of db layer calls.",
+        "# TYPE db_calls_total counter"
+    ]
+    lines += [f"db_calls_total{{{_labels(r['page'], r['function'])}}} {r['calls']}" for r in rows]
+    lines += [
+        "# HELP db_errors_total Number of db layer errors.",
+        "# TYPE db_errors_total counter"
+    ]
+    lines += [f"db_errors_total{{{_labels(r['page'], r['function'])}}} {r['errors']}" for r in rows]
+    lines += [
+        "# HELP db_payload_bytes_total Serialized size of db layer results.",
+        "# TYPE db_payload_bytes_total counter"
+    ]
+    lines += [f"db_payload_bytes_total{{{_labels(r['page'], r['function'])}}} {r['payload_bytes']}" for r in rows]
+    lines += [
+        "# HELP db_call_duration_seconds Latency of db layer calls.",
+        "# TYPE db_call_duration_seconds histogram"
+    ]
+    for r in rows:
+        running = 0
+        for i, count in enumerate(r["buckets"]):
+            running += count
+            le = f"{LATENCY_BUCKETS_MS[i] / 1000:g}" if i < len(LATENCY_BUCKETS_MS) else "+Inf"
+            lines.append(f"db_call_duration_seconds_bucket{{{_labels(r['page'], r['function'], le=le)}}} {running}")
+        lines.append(f"db_call_duration_seconds_sum{{{_labels(r['page'], r['function'])}}} {r['total_ms'] / 1000:g}")
+        lines.append(f"db_call_duration_seconds_count{{{_labels(r['page'], r['function'])}}} {r['calls']}")
+
+    for collector in list(_collectors):
+        try:
+            lines += collector()
+        except Exception as e:
+            logger.warning("Metrics collector %s failed: %s", getattr(collector, "__name__", collector), e)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,112 @@
+from typing import Optional, List, Dict, Any
+
+import streamlit as st
+
+from src.constants import NOTES_PAGE_SIZE
+from src.db import add_note, get_notes_page, get_notes_since, get_profile_names
+
+# Application notes, loaded incrementally per session.
+# A thread keeps the notes fetched so far (newest first) with two cursors: the oldest
+# loaded note, for "show older" pages, and the newest one fetched from the server, for
+# picking up notes posted by others since. Posting adds the returned row locally
+# instead of refetching the thread; it doesn't move the "since" cursor, so notes
+# others posted just before ours are still picked up by the next refresh().
+# Author names are resolved in batches and cached for the session.
+# Threads of archived applications are opened with include_archived, which sticks to
+# the thread; otherwise only the hot notes partition is read.
+
+THREADS_KEY = "note_threads"
+AUTHORS_KEY = "note_authors"
+
+def _cursor(note: Dict[str, Any]) -> Dict[str, str]:
+    return {"created_at": note["created_at"], "id": note["id"]}
+
+def _threads() -> Dict[str, Dict[str, Any]]:
+    return st.session_state.setdefault(THREADS_KEY, {})
+
+def author_names() -> Dict[str, Optional[str]]:
+    return st.session_state.setdefault(AUTHORS_KEY, {})
+
+def _resolve_authors(notes: List[Dict[str, Any]]):
+    cache = author_names()
+    missing = {n["author_id"] for n in notes if n.get("author_id") and n["author_id"] not in cache}
+    if missing:
+        names = get_profile_names(sorted(missing))
+        # Cache misses too (deleted profiles), so they aren't looked up again every rerun
+        for uid in missing:
+            cache[uid] = names.get(uid)
+
+def get_thread(app_id: str, include_archived: bool = False) -> Optional[Dict[str, Any]]:
+    """Notes for an application, loading the newest page on first access."""
+    threads = _threads()
+    if app_id not in threads:
+        page = get_notes_page(app_id, limit=NOTES_PAGE_SIZE, include_archived=include_archived)
+        if page is None:
+            return None
+        _resolve_authors(page["rows"])
+        threads[app_id] = {
+            "notes": page["rows"],
+            "older_cursor": page["next_cursor"],
+            "since_cursor": _cursor(page["rows"][0]) if page["rows"] else None,
+            "include_archived": include_archived
+        }
+    return threads[app_id]
+
+def load_older(app_id: str) -> int:
+    """Append the next page of older notes. Returns how many were added."""
+    thread = get_thread(app_id)
+    if not thread or not thread["older_cursor"]:
+        return 0
+    page = get_notes_page(
+        app_id, limit=NOTES_PAGE_SIZE, before=thread["older_cursor"], include_archived=thread["include_archived"]
+    )
+    if page is None:
+        return 0
+    _resolve_authors(page["rows"])
+    thread["notes"].extend(page["rows"])
+    thread["older_cursor"] = page["next_cursor"]
+    return len(page["rows"])
+
+def refresh(app_id: str) -> int:
+    """Merge in notes posted since the last fetch. Returns how many were added."""
+    thread = get_thread(app_id)
+    if not thread:
+        return 0
+    if not thread["since_cursor"]:
+        # Thread was empty when loaded: start over from the newest page
+        _threads().pop(app_id, None)
+        thread = get_thread(app_id, thread["include_archived"])
+        return len(thread["notes"]) if thread else 0
+    fetched = get_notes_since(app_id, thread["since_cursor"], include_archived=thread["include_archived"])
+    if not fetched:
+        return 0
+    thread["since_cursor"] = _cursor(fetched[-1])
+    known = {n["id"] for n in thread["notes"]}
+    new = [n for n in fetched if n["id"] not in known]
+    if new:
+        _resolve_authors(new)
+        thread["notes"] = sorted(thread["notes"] + new, key=lambda n: (n["created_at"], n["id"]), reverse=True)
+    return len(new)
+
+def post_note(
+    app_id: str,
+    author_id: str,
+    text: str,
+    author_name: Optional[str] = None,
+    include_archived: bool = False
+) -> Optional[Dict[str, Any]]:
+    """Insert a note and add it to the local thread without refetching."""
+    note = add_note(app_id, author_id, text)
+    if not note:
+        return None
+    if author_name is not None:
+        author_names().setdefault(author_id, author_name)
+    else:
+        _resolve_authors([note])
+    thread = get_thread(app_id, include_archived)
+    if thread is not None and all(n["id"] != note["id"] for n in thread["notes"]):
+        thread["notes"].insert(0, note)
+    return note
+
+def forget_thread(app_id: str):
+    _threads().pop(app_id, None)
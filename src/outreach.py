@@ -0,0 +1,171 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
+from typing import Optional, List, Dict, Any, Iterable
+
+from src.constants import (
+    MODEL_NAME,
+    OUTREACH_TEMPLATE_VARIANTS,
+    OUTREACH_TEMPLATE_CACHE_SIZE,
+    OUTREACH_MAX_WORKERS
+)
+from src.llm import generate_outreach_template, generate_personalized_outreach, skill_mentioned
+from src.llm_scheduler import BATCH, llm_context, bind_context
+
+# Bulk outreach: template, then personalize.
+# For one job and tone the emails only differ in a few candidate details, so the LLM
+# writes OUTREACH_TEMPLATE_VARIANTS templates per (job, tone) with $placeholders,
+# cached process-wide, and each recipient gets one filled in locally with
+# string.Template. Recipients are spread across variants by a stable hash of their
+# candidate id. Only candidates flagged for deep personalization get their own LLM
+# call, concurrently; if that call fails they fall back to the template.
+# Candidate rows carry no skills list: $skills are the job's skills their resume
+# mentions (must-haves first).
+
+PLACEHOLDERS = ["first_name", "full_name", "job_title", "company_name", "location", "skills"]
+
+# Profile fields sent for deep personalization, plus the matched skills and the AI
+# fit summary. Contact details and the resume text stay out of the prompt: they don't
+# help the email and would only add tokens and PII.
+PERSONALIZATION_CANDIDATE_FIELDS = ["full_name", "location"]
+PERSONALIZATION_JOB_FIELDS = ["title", "team", "location", "must_have_skills", "responsibilities"]
+
+_templates: "OrderedDict[tuple, List[Dict[str, str]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+# A "$" not starting one of our placeholders would make substitute() raise (or leave
+# "$budget" in an email): escape it so it comes out as a literal "$".
+_STRAY_DOLLAR = re.compile(r"\$(?!(?:\{(?:%s)\}|(?:%s)\b))" % ("|".join(PLACEHOLDERS), "|".join(PLACEHOLDERS)))
+
+def _sanitize(text: str) -> str:
+    return _STRAY_DOLLAR.sub("$$", text)
+
+def _template_key(job: Dict[str, Any], tone: str, company_name: str) -> tuple:
+    # Job version is bumped whenever the title (or another evaluated field) changes
+    return (job["id"], job.get("version") or 1, job.get("title"), tone, company_name, MODEL_NAME)
+
+def get_templates(job: Dict[str, Any], tone: str, company_name: str) -> List[Dict[str, str]]:
+    """Outreach templates for a job and tone, generating (and caching) them on first use."""
+    key = _template_key(job, tone, company_name)
+    with _cache_lock:
+        if key in _templates:
+            _templates.move_to_end(key)
+            return _templates[key]
+
+    templates = []
+    for variant in range(OUTREACH_TEMPLATE_VARIANTS):
+        result = generate_outreach_template(job.get("title"), company_name, tone, PLACEHOLDERS, variant)
+        if result is not None:
+            templates.append({"subject": _sanitize(result.subject), "body": _sanitize(result.body)})
+    if not templates:
+        return []
+
+    with _cache_lock:
+        _templates[key] = templates
+        _templates.move_to_end(key)
+        while len(_templates) > OUTREACH_TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+    return templates
+
+def clear_template_cache():
+    with _cache_lock:
+        _templates.clear()
+
+def _matching_skills(candidate: Dict[str, Any], job: Dict[str, Any], limit: Optional[int] = 2) -> List[str]:
+    resume = (candidate.get("resume_text") or "").lower()
+    if not resume:
+        return []
+    matched = []
+    for skill in (job.get("must_have_skills") or []) + (job.get("nice_to_have_skills") or []):
+        if skill and skill not in matched and skill_mentioned(skill, resume):
+            matched.append(skill)
+            if limit and len(matched) >= limit:
+                break
+    return matched
+
+def template_fields(candidate: Dict[str, Any], job: Dict[str, Any], company_name: str) -> Dict[str, str]:
+    full_name = (candidate.get("full_name") or "").strip()
+    skills = _matching_skills(candidate, job)
+    return {
+        "first_name": full_name.split(" ")[0] if full_name else "there",
+        "full_name": full_name or "there",
+        "job_title": job.get("title") or "this role",
+        "company_name": company_name or "our company",
+        "location": candidate.get("location") or "your area",
+        "skills": " and ".join(skills) if skills else "your experience"
+    }
+
+def _variant(candidate_id: str, count: int) -> int:
+    digest = hashlib.sha256((candidate_id or "").encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % count
+
+def personalize(template: Dict[str, str], fields: Dict[str, str]) -> Dict[str, str]:
+    return {
+        "subject": Template(template["subject"]).safe_substitute(fields),
+        "body": Template(template["body"]).safe_substitute(fields)
+    }
+
+def _personalized(app: Dict[str, Any], job: Dict[str, Any], tone: str, company_name: str) -> Optional[Dict[str, str]]:
+    candidate = app.get("candidates") or {}
+    profile = {k: candidate.get(k) for k in PERSONALIZATION_CANDIDATE_FIELDS}
+    profile["matching_skills"] = _matching_skills(candidate, job, limit=None)
+    profile["fit_summary"] = app.get("ai_summary")
+    result = generate_personalized_outreach(
+        profile, {k: job.get(k) for k in PERSONALIZATION_JOB_FIELDS}, company_name, tone
+    )
+    return {"subject": result.subject, "body": result.body} if result is not None else None
+
+def bulk_outreach(
+    job: Dict[str, Any],
+    applications: List[Dict[str, Any]],
+    tone: str,
+    company_name: str,
+    deep_ids: Iterable[str] = ()
+) -> Dict[str, Any]:
+    """
+    Outreach emails for `applications` (rows from get_candidates_for_job). Applications
+    whose id is in `deep_ids` get an individually written email. Returns {"messages":
+    [...], "templates", "llm_calls", "fallbacks"}; messages is empty if no template
+    could be generated.
+    """
+    report = {"messages": [], "templates": 0, "llm_calls": 0, "fallbacks": 0}
+    templates = get_templates(job, tone, company_name)
+    if not templates:
+        return report
+    report["templates"] = len(templates)
+
+    deep_ids = set(deep_ids)
+    deep_apps = [a for a in applications if a["id"] in deep_ids]
+    personalized: Dict[str, Optional[Dict[str, str]]] = {}
+    if deep_apps:
+        workers = max(1, min(OUTREACH_MAX_WORKERS, len(deep_apps)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="outreach") as pool:
+            # One-off personalization is bulk work: it queues behind interactive calls
+            with llm_context(BATCH):
+                personalize_one = bind_context(lambda a: _personalized(a, job, tone, company_name))
+            results = pool.map(personalize_one, deep_apps)
+            personalized = dict(zip((a["id"] for a in deep_apps), results))
+        report["llm_calls"] = len(deep_apps)
+
+    for app in applications:
+        candidate = app.get("candidates") or {}
+        message = personalized.get(app["id"])
+        source = "personalized"
+        if message is None:
+            if app["id"] in deep_ids:
+                report["fallbacks"] += 1
+            variant = _variant(app.get("candidate_id") or app["id"], len(templates))
+            message = personalize(templates[variant], template_fields(candidate, job, company_name))
+            source = f"template {variant + 1}"
+        report["messages"].append({
+            "application_id": app["id"],
+            "candidate_id": app.get("candidate_id"),
+            "full_name": candidate.get("full_name"),
+            "email": candidate.get("email"),
+            "source": source,
+            **message
+        })
+    return report
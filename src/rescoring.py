@@ -0,0 +1,162 @@
+import threading
+from typing import Optional, Dict, Any, Callable, Tuple
+
+from src.constants import (
+    MODEL_NAME,
+    EVAL_CASCADE_ENABLED,
+    EVAL_FAST_MODEL,
+    RESCORE_MAX_CALLS,
+    RESCORE_BATCH_SIZE,
+    EVALUATION_RESPONSE_TOKENS
+)
+from src.db import get_stale_applications, mark_stale_evaluations, get_evaluation
+from src.evaluations import (
+    evaluation_config,
+    evaluation_inputs,
+    input_fingerprint,
+    apply_evaluation,
+    run_evaluation
+)
+from src.llm import build_evaluation_prompt
+from src.llm_scheduler import BATCH, llm_context
+from src.telemetry import estimate_cost
+
+# Incremental re-scoring.
+# Applications flagged eval_stale (by trigger when a job's evaluated fields or a
+# resume change, or by mark_stale_evaluations() after a model / prompt bump) are
+# re-evaluated highest current score first, so the candidates most likely to matter
+# are fixed first when the budget runs out. Applications whose fingerprint turns out
+# unchanged, or that already have a stored evaluation for the new fingerprint, are
+# settled without an LLM call and don't count against the budget. Before each
+# evaluation the budget is checked against its worst case (fast model, then escalation
+# to MODEL_NAME); what is then charged is what the cascade actually did (no call for a
+# pre-screen, one cheap call, or two). Dry runs charge the worst case.
+# Config staleness is flagged once per model / prompt config and process, before
+# anything counts or lists stale rows (flag_config_staleness).
+
+_flagged_configs = set()
+_flag_lock = threading.Lock()
+
+def flag_config_staleness() -> int:
+    """
+    Flag applications scored under another model / prompt version, once per config
+    per process. Returns how many were flagged by this call.
+    """
+    config = evaluation_config()
+    with _flag_lock:
+        if config in _flagged_configs:
+            return 0
+        flagged = mark_stale_evaluations(config)
+        # Failures (e.g. RPC missing) are retried on the next call
+        if flagged is not None:
+            _flagged_configs.add(config)
+        return flagged or 0
+
+def estimate_evaluation_cost(job: Dict[str, Any], candidate: Dict[str, Any]) -> Tuple[int, float]:
+    """
+    Worst case for one evaluation: (LLM calls, approximate USD at ~4 characters per
+    prompt token). With the cascade that is the fast model plus escalation.
+    """
+    inputs = evaluation_inputs(job, candidate)
+    prompt_tokens = len(build_evaluation_prompt(inputs["job"], inputs["candidate"], inputs["resume_text"])) // 4
+    cost = estimate_cost(MODEL_NAME, prompt_tokens, EVALUATION_RESPONSE_TOKENS)
+    if not EVAL_CASCADE_ENABLED:
+        return 1, cost
+    return 2, cost + estimate_cost(EVAL_FAST_MODEL, prompt_tokens, EVALUATION_RESPONSE_TOKENS)
+
+def rescore_stale(
+    max_calls: int = RESCORE_MAX_CALLS,
+    max_cost_usd: Optional[float] = None,
+    job_id: Optional[str] = None,
+    actor_id: Optional[str] = None,
+    dry_run: bool = False,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    Re-evaluate stale applications within a budget of `max_calls` LLM calls and,
+    optionally, `max_cost_usd` estimated spend. With `dry_run` nothing is written and
+    the counts say what would happen. Returns a report dict.
+    """
+    report = {
+        "flagged_by_config": 0,
+        "stale_before": 0,
+        "reevaluated": 0,
+        "reused": 0,
+        "unchanged": 0,
+        "failed": 0,
+        "estimated_cost_usd": 0.0,
+        "budget_exhausted": False,
+        "remaining": 0
+    }
+    # Flagging only marks rows stale, so dry runs do it too (their counts need it)
+    report["flagged_by_config"] = flag_config_staleness()
+
+    # Settled applications drop out of the stale set, so each page starts after the
+    # ones that are still stale (failures, or everything in a dry run).
+    skipped = 0
+    calls = 0
+    first = True
+    while not report["budget_exhausted"]:
+        page = get_stale_applications(limit=RESCORE_BATCH_SIZE, offset=skipped, job_id=job_id)
+        if not page or not page["rows"]:
+            break
+        if first:
+            report["stale_before"] = page["total"]
+            first = False
+
+        for app in page["rows"]:
+            job, candidate = app.get("jobs"), app.get("candidates")
+            if not job or not candidate:
+                skipped += 1
+                continue
+
+            fingerprint = input_fingerprint(job, candidate)
+            existing = get_evaluation(app["id"], fingerprint)
+            if existing:
+                # Nothing the prompt reads changed, or these inputs were evaluated before
+                outcome = "unchanged" if fingerprint == app.get("eval_fingerprint") else "reused"
+                if dry_run:
+                    report[outcome] += 1
+                    skipped += 1
+                elif apply_evaluation(app["id"], existing):
+                    report[outcome] += 1
+                else:
+                    report["failed"] += 1
+                    skipped += 1
+                continue
+
+            worst_calls, worst_cost = estimate_evaluation_cost(job, candidate)
+            if calls + worst_calls > max_calls or (
+                max_cost_usd is not None and report["estimated_cost_usd"] + worst_cost > max_cost_usd
+            ):
+                report["budget_exhausted"] = True
+                break
+
+            if dry_run:
+                evaluated = True
+                calls += worst_calls
+                report["estimated_cost_usd"] += worst_cost
+            else:
+                # Bulk re-scoring queues behind interactive and candidate portal calls
+                with llm_context(BATCH):
+                    evaluated = run_evaluation(app["id"], job, candidate, actor_id=actor_id, force=True)
+                # A failed evaluation made an unknown number of calls: charge the worst case
+                routing = ((evaluated or {}).get("result") or {}).get("routing") or {}
+                calls += routing.get("calls", worst_calls)
+                report["estimated_cost_usd"] += routing.get("cost_usd", worst_cost)
+            if evaluated:
+                report["reevaluated"] += 1
+            if not evaluated:
+                report["failed"] += 1
+            if dry_run or not evaluated:
+                skipped += 1
+            if on_progress:
+                on_progress(report)
+
+        if len(page["rows"]) < RESCORE_BATCH_SIZE:
+            break
+
+    settled = 0 if dry_run else report["reevaluated"] + report["reused"] + report["unchanged"]
+    report["remaining"] = max(0, report["stale_before"] - settled)
+    report["estimated_cost_usd"] = round(report["estimated_cost_usd"], 4)
+    return report
@@ -0,0 +1,321 @@
+import re
+import threading
+from datetime import date
+from typing import Optional, List, Dict, Any, Tuple
+
+from src.metrics import register_collector
+from src.schemas import CandidateParsingSchema
+from src.llm import parse_resume_fields
+
+# Resume parsing, rules first.
+# The resume is split into sections by heading detection (a short line naming a known
+# section, optionally with inline content after a colon). Contact details and links
+# come from precompiled patterns, preferring the header (the lines before the first
+# heading) so references further down don't win. Name and location come from the
+# header, skills and education from their sections, and years of experience from an
+# "N years of experience" claim or the date ranges in the experience section.
+# Email, phone and links are pattern data: if no pattern matches, the resume doesn't
+# have them. Any other field the rules can't fill is requested from Gemini, alone and
+# with the sections already parsed left out of the prompt. Fast-path statistics are
+# kept process-wide (get_parser_stats).
+
+# Fields the LLM is asked for when the rules come up empty
+RESIDUAL_FIELDS = ["full_name", "location", "experience_years", "skills", "education"]
+
+SECTION_HEADINGS = {
+    "summary": [
+        "summary", "profile", "professional summary", "career summary", "about", "about me",
+        "objective", "career objective", "professional profile"
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "relevant experience",
+        "employment", "employment history", "work history", "career history"
+    ],
+    "education": [
+        "education", "education and training", "academic background", "academic qualifications",
+        "qualifications", "education and certifications"
+    ],
+    "skills": [
+        "skills", "technical skills", "core skills", "key skills", "skills and tools",
+        "core competencies", "competencies", "technologies", "tech stack", "tools"
+    ],
+    "projects": ["projects", "personal projects", "selected projects", "side projects"],
+    "certifications": ["certifications", "certificates", "licenses and certifications", "courses"],
+    "other": [
+        "awards", "honors", "achievements", "publications", "languages", "interests",
+        "hobbies", "volunteering", "volunteer experience", "references", "additional information"
+    ]
+}
+_HEADINGS = {name: section for section, names in SECTION_HEADINGS.items() for name in names}
+# Words of section headings, never part of a name ("Experience Summary")
+_HEADING_WORDS = {word for name in _HEADINGS for word in name.split()} - {"and", "me"}
+
+HEADING_RE = re.compile(r"^\s*#*\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*:?\s*$")
+INLINE_HEADING_RE = re.compile(r"^\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*:\s+(\S.*)$")
+BULLET_RE = re.compile(r"^\s*(?:[-*•·▪◦‣>]|\d{1,2}[.)])\s+")
+
+EMAIL_RE = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]\d{3}[-.\s]\d{4}")
+LINKEDIN_RE = re.compile(r"(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/in/[A-Za-z0-9_%-]+/?", re.I)
+GITHUB_RE = re.compile(r"(?:https?://)?(?:www\.)?github\.com/[A-Za-z0-9_-]+/?", re.I)
+URL_RE = re.compile(r"\b(?:https?://|www\.)[^\s|,;<>()]+", re.I)
+NAME_RE = re.compile(r"^[A-Z][A-Za-z'’.-]*(?:\s+[A-Z][A-Za-z'’.-]*){1,3}$")
+LOCATION_RE = re.compile(r"^(?:(?i:location):\s*)?([A-Z][A-Za-z.'-]*(?:\s[A-Z][A-Za-z.'-]*){0,2},\s*[A-Z][A-Za-z.'-]*(?:\s[A-Z][A-Za-z.'-]*){0,2})$")
+# "Senior Engineer, Platform" looks like "City, Region" too
+ROLE_WORDS_RE = re.compile(
+    r"\b(?:engineer|developer|manager|designer|analyst|scientist|lead|director|consultant|"
+    r"architect|specialist|intern|officer|head|founder|administrator|recruiter)\b", re.I
+)
+YEARS_CLAIM_RE = re.compile(r"\b(\d{1,2}(?:\.\d)?)\+?\s*(?:years?|yrs?)\b(?:\s+of)?(?:\s+[\w-]+){0,3}?\s+experience", re.I)
+MONTHS = {m: i for i, m in enumerate(["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+_MONTH = r"(?:(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+)?"
+DATE_RANGE_RE = re.compile(
+    _MONTH + r"((?:19|20)\d{2})\s*(?:-|–|—|to)\s*(?:" + _MONTH + r"((?:19|20)\d{2})|(present|current|now|today))\b",
+    re.I
+)
+SEPARATOR_RE = re.compile(r"\s*[|•·]\s*")
+SKILL_SPLIT_RE = re.compile(r"\s*[,;|•·]\s*")
+
+_stats_lock = threading.Lock()
+
+def _new_stats() -> Dict[str, Any]:
+    return {
+        "parses": 0,
+        "fast_path": 0,
+        "llm_fallback": 0,
+        "llm_failed": 0,
+        "rule_fields": {f: 0 for f in CandidateParsingSchema.model_fields},
+        "llm_fields": {f: 0 for f in RESIDUAL_FIELDS}
+    }
+
+_stats = _new_stats()
+
+# --- Segmentation ---
+
+def _heading(line: str) -> Optional[str]:
+    match = HEADING_RE.match(line)
+    if not match:
+        return None
+    name = re.sub(r"\s+", " ", match.group(1).replace("&", " and ").replace("/", " and ")).strip().lower()
+    return _HEADINGS.get(name)
+
+def segment(text: str) -> Dict[str, List[str]]:
+    """Non-empty lines per section; lines before the first heading are the "header"."""
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        section = _heading(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        inline = INLINE_HEADING_RE.match(line)
+        if inline and _heading(inline.group(1)) and current != "skills":
+            # "Skills: Python, SQL" (inside the skills section "Tools: ..." is a sub-list)
+            current = _heading(inline.group(1))
+            sections.setdefault(current, []).append(inline.group(2))
+            continue
+        sections.setdefault(current, []).append(line)
+    return sections
+
+def _strip_bullet(line: str) -> str:
+    return BULLET_RE.sub("", line).strip()
+
+# --- Field rules ---
+
+def _first_match(pattern: re.Pattern, lines: List[str], text: str) -> Optional[str]:
+    # Header first; the rest of the resume may list references' contact details
+    match = pattern.search("\n".join(lines)) or pattern.search(text)
+    return match.group(0).strip() if match else None
+
+def _links(header: List[str], text: str) -> Optional[Dict[str, str]]:
+    links = {}
+    # Keys as documented for candidates.links (sql/schema.sql)
+    for label, pattern in (("linkedin", LINKEDIN_RE), ("github", GITHUB_RE)):
+        found = _first_match(pattern, header, text)
+        if found:
+            links[label] = found if found.lower().startswith("http") else f"https://{found}"
+    for match in URL_RE.finditer("\n".join(header)):
+        url = match.group(0).rstrip(".")
+        if "linkedin.com" not in url.lower() and "github.com" not in url.lower():
+            links["portfolio"] = url if url.lower().startswith("http") else f"https://{url}"
+            break
+    return links or None
+
+def _full_name(header: List[str]) -> Optional[str]:
+    for line in header[:3]:
+        part = SEPARATOR_RE.split(line)[0].strip()
+        if not NAME_RE.match(part) or re.search(r"resume|curriculum|vitae", part, re.I):
+            continue
+        # A job title ("Software Engineer") or heading above the name matches NAME_RE too
+        if ROLE_WORDS_RE.search(part) or _HEADING_WORDS & set(part.lower().split()):
+            continue
+        return part.title() if part.isupper() else part
+    return None
+
+def _location(header: List[str]) -> Optional[str]:
+    for line in header[:6]:
+        for part in SEPARATOR_RE.split(line):
+            part = part.strip()
+            if "@" in part or any(ch.isdigit() for ch in part) or ROLE_WORDS_RE.search(part):
+                continue
+            match = LOCATION_RE.match(part)
+            if match:
+                return match.group(1)
+    return None
+
+def _skills(lines: List[str]) -> List[str]:
+    skills, seen = [], set()
+    for line in lines:
+        line = _strip_bullet(line)
+        if ":" in line:
+            # "Languages: Python, Go"
+            line = line.split(":", 1)[1]
+        items = SKILL_SPLIT_RE.split(line)
+        if len(items) == 1 and len(line.split()) > 4:
+            continue  # a sentence, not a list
+        for item in items:
+            item = item.strip().rstrip(".")
+            if item and len(item) <= 40 and len(item.split()) <= 4 and item.lower() not in seen:
+                seen.add(item.lower())
+                skills.append(item)
+    return skills
+
+def _education(lines: List[str]) -> List[str]:
+    entries = []
+    for line in lines:
+        line = _strip_bullet(line)
+        if line and len(line) <= 200 and not DATE_RANGE_RE.fullmatch(line) and re.search(r"[A-Za-z]{3}", line):
+            entries.append(line)
+    return entries[:10]
+
+def _month_index(month: Optional[str], year: str) -> int:
+    # Year-only dates count from January: "2016 - 2019" is three years
+    m = MONTHS.get((month or "")[:3].lower()) or 1
+    return int(year) * 12 + m - 1
+
+def _experience_years(sections: Dict[str, List[str]]) -> Optional[float]:
+    claim_lines = sections.get("summary", []) + sections.get("header", [])
+    for line in claim_lines:
+        match = YEARS_CLAIM_RE.search(line)
+        if match:
+            return float(match.group(1))
+
+    today = date.today()
+    spans = []
+    for match in DATE_RANGE_RE.finditer("\n".join(sections.get("experience", []))):
+        start = _month_index(match.group(1), match.group(2))
+        if match.group(5):
+            end = today.year * 12 + today.month - 1
+        else:
+            end = _month_index(match.group(3), match.group(4))
+        if end >= start:
+            spans.append((start, end))
+    if not spans:
+        return None
+    # Union of the ranges: overlapping jobs count once
+    spans.sort()
+    months, (cur_start, cur_end) = 0, spans[0]
+    for start, end in spans[1:]:
+        if start > cur_end:
+            months += cur_end - cur_start
+            cur_start, cur_end = start, end
+        else:
+            cur_end = max(cur_end, end)
+    months += cur_end - cur_start
+    return round(months / 12, 1)
+
+def extract_fields(text: str) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+    """Rule-based fields (None / [] where not found) and the sections they came from."""
+    sections = segment(text)
+    header = sections["header"]
+    email = _first_match(EMAIL_RE, header, text)
+    phone = _first_match(PHONE_RE, header, text)
+    fields = {
+        "full_name": _full_name(header),
+        "email": email,
+        "phone": phone,
+        "location": _location(header),
+        "links": _links(header, text),
+        "experience_years": _experience_years(sections),
+        "skills": _skills(sections.get("skills", [])),
+        "education": _education(sections.get("education", []))
+    }
+    return fields, sections
+
+# --- Parsing with LLM fallback ---
+
+def _residual_text(sections: Dict[str, List[str]], missing: List[str]) -> str:
+    """Resume text for the fallback prompt, without sections whose fields are already filled."""
+    if set(missing) <= {"full_name", "location"}:
+        return "\n".join(sections["header"])
+    skip = {s for s in ("skills", "education") if s not in missing}
+    parts = []
+    for section, lines in sections.items():
+        if section in skip or not lines:
+            continue
+        parts.append(("" if section == "header" else f"{section.upper()}\n") + "\n".join(lines))
+    return "\n\n".join(parts)
+
+def parse_resume(text: str) -> Optional[CandidateParsingSchema]:
+    """
+    Parse a resume into CandidateParsingSchema, with Gemini only for the fields the
+    rules couldn't fill. None if no name could be found either way.
+    """
+    fields, sections = extract_fields(text)
+    missing = [f for f in RESIDUAL_FIELDS if fields[f] in (None, [])]
+
+    llm_result = None
+    if missing and (text or "").strip():
+        llm_result = parse_resume_fields(_residual_text(sections, missing), missing)
+        if llm_result is not None:
+            for name in missing:
+                value = getattr(llm_result, name, None)
+                if value not in (None, []):
+                    fields[name] = value
+
+    with _stats_lock:
+        _stats["parses"] += 1
+        for name, value in fields.items():
+            if value not in (None, []) and name not in missing:
+                _stats["rule_fields"][name] += 1
+        if not missing:
+            _stats["fast_path"] += 1
+        elif llm_result is None:
+            _stats["llm_failed"] += 1
+        else:
+            _stats["llm_fallback"] += 1
+            for name in missing:
+                if fields[name] not in (None, []):
+                    _stats["llm_fields"][name] += 1
+
+    if not fields["full_name"]:
+        return None
+    fields["skills"] = fields["skills"] or []
+    fields["education"] = fields["education"] or []
+    return CandidateParsingSchema(**fields)
+
+def get_parser_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        stats = {k: (dict(v) if isinstance(v, dict) else v) for k, v in _stats.items()}
+    stats["fast_path_rate"] = round(stats["fast_path"] / stats["parses"], 3) if stats["parses"] else 0.0
+    return stats
+
+def reset_parser_stats():
+    global _stats
+    with _stats_lock:
+        _stats = _new_stats()
+
+def prometheus_lines() -> List[str]:
+    parser = get_parser_stats()
+    lines = [
+        "# HELP resume_parses_total Resumes parsed, by how far the rule-based fast path got.",
+        "# TYPE resume_parses_total counter"
+    ]
+    lines += [f'resume_parses_total{{path="{path}"}} {parser[path]}' for path in ("fast_path", "llm_fallback", "llm_failed")]
+    return lines
+
+register_collector(prometheus_lines)
@@ -64,6 +64,7 @@ class EvaluationResult(BaseModel):
     missing_must_haves: List[str] = Field(description="Critical skills missing from the resume")
     risk_flags: List[str] = Field(description="Red flags like short tenures without explanation")
     suggested_interview_questions: List[str] = Field(description="Tailored questions for the interview")
+    confidence: Optional[float] = Field(default=None, description="0-1 confidence in the score, given how much evidence the resume offers")
 
 class ScreeningResult(BaseModel):
     """Output from screening Q&A summarization"""
@@ -71,6 +72,13 @@ class ScreeningResult(BaseModel):
     recommended_stage: Literal['screened', 'interview', 'rejected']
     updated_rubric_notes: str
 
+class ScreeningChunkSummary(BaseModel):
+    """Map-step output for one chunk of a long screening transcript"""
+    summary: str = Field(description="What was discussed in this part of the interview")
+    evidence: List[str] = Field(description="Concrete answers or claims showing skills or experience")
+    concerns: List[str] = Field(description="Weak answers, inconsistencies or red flags")
+    open_questions: List[str] = Field(description="Topics raised but not resolved in this part")
+
 # --- Outreach ---
 class OutreachMessage(BaseModel):
     subject: str
@@ -0,0 +1,199 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Dict, Any
+
+from src.constants import (
+    MODEL_NAME,
+    PROMPT_VERSION,
+    SCREENING_CHUNK_TOKENS,
+    SCREENING_REDUCE_TOKENS,
+    SCREENING_MAX_WORKERS,
+    SCREENING_CHUNK_CACHE_SIZE
+)
+from src.llm import (
+    summarize_screening,
+    summarize_screening_chunk,
+    merge_screening_summaries,
+    reduce_screening
+)
+from src.schemas import ScreeningResult
+from src.llm_scheduler import bind_context
+
+# Screening transcript analysis, map-reduce over token-sized chunks.
+# Transcripts are split on line boundaries into chunks of up to SCREENING_CHUNK_TOKENS,
+# packed greedily from the start, so appending to a transcript leaves every earlier
+# chunk byte-for-byte identical and only the last (now longer) chunk and the new ones
+# change. Chunk summaries are cached process-wide by a hash of the chunk text, model
+# and prompt version; uncached chunks are summarized concurrently, and the summaries
+# are reduced into a single ScreeningResult. A transcript that fits in one chunk goes
+# straight to summarize_screening, as before.
+
+_chunk_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # tiktoken fetches its BPE files on first use; without network access (or the
+    # package) fall back to the ~4 characters per token estimate used elsewhere.
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text: str) -> int:
+    enc = _encoding()
+    if enc is None:
+        return (len(text) + 3) // 4
+    return len(enc.encode(text, disallowed_special=()))
+
+def _split_long_line(line: str, max_tokens: int) -> List[str]:
+    # A single turn longer than a chunk (pasted essay, no newlines): cut on word boundaries
+    pieces, current, size = [], [], 0
+    for word in line.split(" "):
+        tokens = count_tokens(word + " ")
+        if current and size + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def chunk_transcript(transcript: str, max_tokens: int = SCREENING_CHUNK_TOKENS) -> List[str]:
+    """Split a transcript into consecutive chunks of at most ~`max_tokens`, on line boundaries."""
+    chunks, current, size = [], [], 0
+    for line in transcript.strip().splitlines():
+        tokens = count_tokens(line + "\n")
+        parts = [line] if tokens <= max_tokens else _split_long_line(line, max_tokens)
+        for part in parts:
+            part_tokens = tokens if len(parts) == 1 else count_tokens(part + "\n")
+            if current and size + part_tokens > max_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(part)
+            size += part_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _chunk_key(chunk: str) -> str:
+    raw = f"{MODEL_NAME}|{PROMPT_VERSION}|{chunk}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        summary = _chunk_cache.get(key)
+        if summary is not None:
+            _chunk_cache.move_to_end(key)
+        return summary
+
+def _cache_put(key: str, summary: Dict[str, Any]):
+    with _cache_lock:
+        _chunk_cache[key] = summary
+        _chunk_cache.move_to_end(key)
+        while len(_chunk_cache) > SCREENING_CHUNK_CACHE_SIZE:
+            _chunk_cache.popitem(last=False)
+
+def clear_chunk_cache():
+    with _cache_lock:
+        _chunk_cache.clear()
+
+def _summarize_chunk(chunk: str) -> Optional[Dict[str, Any]]:
+    result = summarize_screening_chunk(chunk)
+    return result.model_dump() if result is not None else None
+
+def summarize_chunks(chunks: List[str]) -> Dict[str, Any]:
+    """
+    Summaries for `chunks` in order, from the cache where possible and concurrently
+    otherwise. "summaries" is None if any chunk failed (successful ones stay cached,
+    so a retry only redoes the failures).
+    """
+    keys = [_chunk_key(c) for c in chunks]
+    summaries: List[Optional[Dict[str, Any]]] = [_cache_get(k) for k in keys]
+    # Identical chunks (repeated boilerplate) are only summarized once
+    pending: Dict[str, str] = {}
+    for key, chunk, summary in zip(keys, chunks, summaries):
+        if summary is None:
+            pending.setdefault(key, chunk)
+
+    if pending:
+        workers = max(1, min(SCREENING_MAX_WORKERS, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screening") as pool:
+            results = dict(zip(pending, pool.map(bind_context(_summarize_chunk), pending.values())))
+        for key, summary in results.items():
+            if summary is not None:
+                _cache_put(key, summary)
+        summaries = [s if s is not None else results.get(k) for k, s in zip(keys, summaries)]
+
+    failed = sum(1 for s in summaries if s is None)
+    return {
+        "summaries": None if failed else summaries,
+        "cached": len(chunks) - len(pending),
+        "processed": len(pending),
+        "failed": failed
+    }
+
+def _reduce_levels(summaries: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    # Many chunks: merge neighbouring summaries in groups until the final reduce fits
+    while len(summaries) > 1 and count_tokens(str(summaries)) > SCREENING_REDUCE_TOKENS:
+        groups, current, size = [], [], 0
+        for summary in summaries:
+            tokens = count_tokens(str(summary))
+            if current and size + tokens > SCREENING_REDUCE_TOKENS:
+                groups.append(current)
+                current, size = [], 0
+            current.append(summary)
+            size += tokens
+        groups.append(current)
+        if len(groups) == len(summaries):
+            break  # every summary is too large on its own; reduce what we have
+
+        def merge(group: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+            if len(group) == 1:
+                return group[0]
+            merged = merge_screening_summaries(group)
+            return merged.model_dump() if merged is not None else None
+
+        workers = max(1, min(SCREENING_MAX_WORKERS, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="screening") as pool:
+            merged = list(pool.map(bind_context(merge), groups))
+        if any(m is None for m in merged):
+            return None
+        summaries = merged
+    return summaries
+
+def analyze_transcript(transcript: str) -> Dict[str, Any]:
+    """
+    Analyze a screening transcript. Returns {"result": ScreeningResult or None,
+    "chunks", "cached", "processed", "failed"}; `processed` counts chunk summaries
+    computed by this call (the LLM response cache may still have served some).
+    """
+    stats = {"result": None, "chunks": 0, "cached": 0, "processed": 0, "failed": 0}
+    transcript = (transcript or "").strip()
+    if not transcript:
+        return stats
+
+    chunks = chunk_transcript(transcript)
+    stats["chunks"] = len(chunks)
+    if len(chunks) == 1:
+        stats["processed"] = 1
+        result: Optional[ScreeningResult] = summarize_screening(transcript)
+        stats["result"] = result
+        stats["failed"] = int(result is None)
+        return stats
+
+    mapped = summarize_chunks(chunks)
+    stats.update({k: mapped[k] for k in ("cached", "processed", "failed")})
+    if mapped["summaries"] is None:
+        return stats
+
+    summaries = _reduce_levels(mapped["summaries"])
+    if summaries is None:
+        return stats
+    stats["result"] = reduce_screening(summaries)
+    return stats
@@ -0,0 +1,271 @@
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+import streamlit as st
+from pydantic import BaseModel
+
+from src import schemas
+from src.constants import (
+    SESSION_STORE_DIR,
+    SESSION_MEMORY_BUDGET_BYTES,
+    SESSION_STORE_TTL_SECONDS,
+    SESSION_FOOTPRINT_INTERVAL_SECONDS,
+    SESSION_FOOTPRINT_TTL_SECONDS
+)
+
+# Session storage for large per-session values (parsed documents, raw text).
+# st.session_state only holds a reference per name: the sha256 of the value's
+# serialized form, which lives gzip-compressed in a shared on-disk store (identical
+# values from different sessions are stored once). Materialized values are kept in a
+# small per-session LRU capped at SESSION_MEMORY_BUDGET_BYTES; evicted values are
+# reloaded from disk on the next get(). Values must be JSON-serializable or Pydantic
+# models from src.schemas, and are immutable once stored: put() again after changing one.
+# Each session's footprint (its whole session_state, estimated) is recorded
+# process-wide for the Admin console.
+
+REFS_KEY = "session_store_refs"
+HOT_KEY = "session_store_hot"
+
+_footprints: Dict[str, Dict[str, Any]] = {}
+_footprint_lock = threading.Lock()
+_last_prune = 0.0
+
+def _store_dir() -> Path:
+    return Path(os.getenv("SESSION_STORE_DIR", SESSION_STORE_DIR))
+
+def _blob_path(key: str) -> Path:
+    return _store_dir() / key[:2] / f"{key}.json.gz"
+
+# --- Serialization ---
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, BaseModel):
+        payload = {"model": type(value).__name__, "data": value.model_dump(mode="json")}
+    else:
+        payload = {"model": None, "data": value}
+    return json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def _decode(raw: bytes) -> Any:
+    payload = json.loads(raw)
+    if payload["model"]:
+        model = getattr(schemas, payload["model"], None)
+        if isinstance(model, type) and issubclass(model, BaseModel):
+            return model.model_validate(payload["data"])
+    return payload["data"]
+
+def _write_blob(key: str, raw: bytes):
+    path = _blob_path(key)
+    if path.exists():
+        os.utime(path)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Temp file + rename: concurrent sessions storing the same value never see a partial blob
+    fd, tmp = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(fd, "wb") as out:
+        out.write(gzip.compress(raw, compresslevel=6))
+    os.replace(tmp, path)
+
+def _read_blob(key: str) -> Optional[bytes]:
+    path = _blob_path(key)
+    try:
+        raw = gzip.decompress(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    os.utime(path)  # keeps in-use blobs from being pruned
+    return raw
+
+def prune_store(max_age_seconds: int = SESSION_STORE_TTL_SECONDS) -> int:
+    """Delete blobs no session has touched for `max_age_seconds`. Returns how many were removed."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    root = _store_dir()
+    if not root.exists():
+        return 0
+    for path in root.glob("*/*.json.gz"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def _maybe_prune():
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < SESSION_STORE_TTL_SECONDS / 4:
+        return
+    _last_prune = now
+    try:
+        prune_store()
+    except OSError:
+        pass
+
+# --- Per-session references and hot values ---
+
+def _refs() -> Dict[str, Dict[str, Any]]:
+    return st.session_state.setdefault(REFS_KEY, {})
+
+def _hot() -> "OrderedDict[str, Dict[str, Any]]":
+    if HOT_KEY not in st.session_state:
+        st.session_state[HOT_KEY] = OrderedDict()
+    return st.session_state[HOT_KEY]
+
+def _hot_bytes() -> int:
+    return sum(entry["bytes"] for entry in _hot().values())
+
+def _keep_hot(key: str, value: Any, size: int):
+    hot = _hot()
+    if size > SESSION_MEMORY_BUDGET_BYTES:
+        # Larger than the whole budget: always served from disk
+        hot.pop(key, None)
+        return
+    hot[key] = {"value": value, "bytes": size}
+    hot.move_to_end(key)
+    while _hot_bytes() > SESSION_MEMORY_BUDGET_BYTES:
+        hot.popitem(last=False)
+
+def put(name: str, value: Any) -> str:
+    """Store `value` under `name` for this session. Returns its content key."""
+    if value is None:
+        drop(name)
+        return ""
+    raw = _encode(value)
+    key = hashlib.sha256(raw).hexdigest()
+    _write_blob(key, raw)
+    _refs()[name] = {"key": key, "bytes": len(raw)}
+    _keep_hot(key, value, len(raw))
+    _maybe_prune()
+    return key
+
+def get(name: str, default: Any = None) -> Any:
+    ref = _refs().get(name)
+    if not ref:
+        return default
+    hot = _hot()
+    entry = hot.get(ref["key"])
+    if entry is not None:
+        hot.move_to_end(ref["key"])
+        return entry["value"]
+    raw = _read_blob(ref["key"])
+    if raw is None:
+        # Pruned while the session was idle
+        _refs().pop(name, None)
+        return default
+    value = _decode(raw)
+    _keep_hot(ref["key"], value, len(raw))
+    return value
+
+def has(name: str) -> bool:
+    return name in _refs()
+
+def drop(name: str):
+    ref = _refs().pop(name, None)
+    if ref and all(r["key"] != ref["key"] for r in _refs().values()):
+        _hot().pop(ref["key"], None)
+
+# --- Footprint reporting ---
+
+# Objects from these packages reference process-wide state (a session's Supabase client
+# reaches the shared httpx pool); walking them would charge every session for it.
+SHARED_MODULES = {
+    "supabase", "supabase_auth", "gotrue", "postgrest", "storage3", "realtime", "supafunc",
+    "httpx", "httpcore", "ssl", "socket", "threading", "google", "grpc"
+}
+
+def _shared(obj: Any) -> bool:
+    # Functions, methods and classes hold module globals, not session data
+    return type(obj).__module__.split(".", 1)[0] in SHARED_MODULES or callable(obj)
+
+def _deep_size(obj: Any, seen: set, depth: int = 0) -> int:
+    if id(obj) in seen or depth > 12 or _shared(obj):
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        # pandas DataFrame
+        try:
+            return int(obj.memory_usage(deep=True).sum())
+        except Exception:
+            pass
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(k, seen, depth + 1) + _deep_size(v, seen, depth + 1) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen, depth + 1) for v in obj)
+    elif isinstance(obj, BaseModel):
+        size += _deep_size(obj.__dict__, seen, depth + 1)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += _deep_size(vars(obj), seen, depth + 1)
+    return size
+
+def _session_id() -> Optional[str]:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx else None
+    except Exception:
+        return None
+
+def track_session(page: Optional[str] = None, force: bool = False):
+    """Record this session's memory footprint (throttled). Called once per rerun."""
+    session_id = _session_id()
+    if not session_id:
+        return
+    now = time.time()
+    with _footprint_lock:
+        previous = _footprints.get(session_id)
+        if previous and not force and now - previous["measured_at"] < SESSION_FOOTPRINT_INTERVAL_SECONDS:
+            previous["last_seen"] = now
+            if page:
+                previous["page"] = page
+            return
+
+    seen: set = set()
+    by_key = {}
+    for k in list(st.session_state.keys()):
+        by_key[str(k)] = _deep_size(st.session_state[k], seen)
+    user = st.session_state.get("user")
+    footprint = {
+        "session_id": session_id,
+        "user": getattr(user, "email", None),
+        "page": page or (previous or {}).get("page"),
+        "state_bytes": sum(by_key.values()),
+        "largest_keys": sorted(by_key.items(), key=lambda kv: kv[1], reverse=True)[:5],
+        "store_refs": len(_refs()),
+        "store_bytes": sum(r["bytes"] for r in _refs().values()),
+        "hot_bytes": _hot_bytes(),
+        "measured_at": now,
+        "last_seen": now
+    }
+    with _footprint_lock:
+        _footprints[session_id] = footprint
+
+def get_session_footprints() -> List[Dict[str, Any]]:
+    """Recently active sessions, largest first. Sessions idle past the TTL are dropped."""
+    cutoff = time.time() - SESSION_FOOTPRINT_TTL_SECONDS
+    with _footprint_lock:
+        for session_id in [s for s, f in _footprints.items() if f["last_seen"] < cutoff]:
+            del _footprints[session_id]
+        rows = [dict(f) for f in _footprints.values()]
+    return sorted(rows, key=lambda f: f["state_bytes"], reverse=True)
+
+def get_store_stats() -> Dict[str, Any]:
+    blobs, size = 0, 0
+    root = _store_dir()
+    if root.exists():
+        for path in root.glob("*/*.json.gz"):
+            try:
+                size += path.stat().st_size
+                blobs += 1
+            except FileNotFoundError:
+                pass
+    return {"blobs": blobs, "disk_bytes": size, "path": str(root)}
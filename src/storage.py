@@ -0,0 +1,221 @@
+import os
+import base64
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, BinaryIO
+
+import streamlit as st
+
+from src.constants import RESUME_BUCKET, STORAGE_CHUNK_SIZE
+
+# Resume file storage.
+# Originals are stored content-addressed (sha256) so the same file uploaded twice
+# is stored once and can be matched to its already-parsed candidate. Uploads go up
+# in STORAGE_CHUNK_SIZE pieces (Supabase resumable/TUS upload for large files);
+# downloads are streamed in chunks or served via signed URL, never read whole.
+
+def hash_file(file_obj: BinaryIO, chunk_size: int = STORAGE_CHUNK_SIZE) -> Dict[str, Any]:
+    """sha256 + size of a file-like object, read in chunks. Rewinds the file."""
+    file_obj.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    file_obj.seek(0)
+    return {"sha256": digest.hexdigest(), "size": size}
+
+def resume_object_path(sha256: str, file_name: str) -> str:
+    ext = Path(file_name).suffix.lower()
+    return f"{sha256[:2]}/{sha256}{ext}"
+
+def _iter_chunks(file_obj: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    file_obj.seek(0)
+    for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+        yield chunk
+
+class LocalResumeStorage:
+    """Filesystem stand-in for the Supabase bucket (local dev and scripts)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _full_path(self, path: str) -> Path:
+        full = (self.root / path).resolve()
+        if self.root.resolve() not in full.parents:
+            raise ValueError(f"Invalid storage path: {path}")
+        return full
+
+    def exists(self, path: str) -> bool:
+        return self._full_path(path).exists()
+
+    def upload(self, path: str, file_obj: BinaryIO, size: int, content_type: str):
+        full = self._full_path(path)
+        full.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file then rename, so a partial upload never looks complete
+        fd, tmp = tempfile.mkstemp(dir=full.parent)
+        with os.fdopen(fd, "wb") as out:
+            for chunk in _iter_chunks(file_obj, STORAGE_CHUNK_SIZE):
+                out.write(chunk)
+        os.replace(tmp, full)
+
+    def remove(self, path: str):
+        self._full_path(path).unlink(missing_ok=True)
+
+    def stream(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        with open(self._full_path(path), "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                yield chunk
+
+    def signed_url(self, path: str, expires_in: int) -> Optional[str]:
+        return None
+
+class SupabaseResumeStorage:
+    """Private Supabase Storage bucket. Large files use the resumable (TUS) endpoint."""
+
+    def __init__(self, client, bucket: str = RESUME_BUCKET):
+        self.client = client
+        self.bucket = bucket
+        self.base_url = str(client.storage_url).rstrip("/")
+
+    def _headers(self) -> Dict[str, str]:
+        # The session client carries the signed-in user's JWT, so storage policies apply
+        authorization = self.client.options.headers.get("Authorization") or f"Bearer {self.client.supabase_key}"
+        return {"apikey": self.client.supabase_key, "Authorization": authorization}
+
+    def _http(self):
+        import httpx
+        return httpx.Client(timeout=60)
+
+    def exists(self, path: str) -> bool:
+        return self.client.storage.from_(self.bucket).exists(path)
+
+    def remove(self, path: str):
+        self.client.storage.from_(self.bucket).remove([path])
+
+    def upload(self, path: str, file_obj: BinaryIO, size: int, content_type: str):
+        if size <= STORAGE_CHUNK_SIZE:
+            file_obj.seek(0)
+            self.client.storage.from_(self.bucket).upload(
+                path, file_obj.read(), {"content-type": content_type, "upsert": "false"}
+            )
+            return
+        self._upload_resumable(path, file_obj, size, content_type)
+
+    def _upload_resumable(self, path: str, file_obj: BinaryIO, size: int, content_type: str):
+        """TUS 1.0 upload: create the upload, then PATCH one chunk at a time."""
+        def b64(value: str) -> str:
+            return base64.b64encode(value.encode("utf-8")).decode("ascii")
+
+        headers = {**self._headers(), "Tus-Resumable": "1.0.0"}
+        with self._http() as http:
+            created = http.post(
+                f"{self.base_url}/upload/resumable",
+                headers={
+                    **headers,
+                    "Upload-Length": str(size),
+                    "Upload-Metadata": ",".join([
+                        f"bucketName {b64(self.bucket)}",
+                        f"objectName {b64(path)}",
+                        f"contentType {b64(content_type)}"
+                    ]),
+                    "x-upsert": "false"
+                }
+            )
+            created.raise_for_status()
+            upload_url = created.headers["Location"]
+
+            offset = 0
+            for chunk in _iter_chunks(file_obj, STORAGE_CHUNK_SIZE):
+                res = http.patch(
+                    upload_url,
+                    content=chunk,
+                    headers={
+                        **headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream"
+                    }
+                )
+                res.raise_for_status()
+                offset = int(res.headers.get("Upload-Offset", offset + len(chunk)))
+
+    def stream(self, path: str, chunk_size: int) -> Iterator[bytes]:
+        url = f"{self.base_url}/object/authenticated/{self.bucket}/{path}"
+        with self._http() as http:
+            with http.stream("GET", url, headers=self._headers()) as res:
+                res.raise_for_status()
+                for chunk in res.iter_bytes(chunk_size):
+                    yield chunk
+
+    def signed_url(self, path: str, expires_in: int) -> Optional[str]:
+        res = self.client.storage.from_(self.bucket).create_signed_url(path, expires_in)
+        return res.get("signedURL") or res.get("signedUrl")
+
+@st.cache_resource
+def _local_storage(local_dir: str) -> LocalResumeStorage:
+    return LocalResumeStorage(local_dir)
+
+def get_resume_storage():
+    """Local storage when RESUME_STORAGE_DIR is set, otherwise the Supabase bucket (as this session's user)."""
+    local_dir = os.getenv("RESUME_STORAGE_DIR")
+    if local_dir:
+        return _local_storage(local_dir)
+    from src.db import get_supabase_client
+    return SupabaseResumeStorage(get_supabase_client())
+
+def store_resume(file_obj: BinaryIO, file_name: str, content_type: str = "application/octet-stream") -> Optional[Dict[str, Any]]:
+    """
+    Store an uploaded resume, deduplicated by content hash.
+    Returns {"path", "sha256", "size", "deduplicated"} or None on failure.
+    """
+    info = hash_file(file_obj)
+    path = resume_object_path(info["sha256"], file_name)
+    storage = get_resume_storage()
+    try:
+        if storage.exists(path):
+            return {**info, "path": path, "deduplicated": True}
+        storage.upload(path, file_obj, info["size"], content_type)
+        return {**info, "path": path, "deduplicated": False}
+    except Exception as e:
+        st.error(f"Error storing resume: {e}")
+        return None
+    finally:
+        file_obj.seek(0)
+
+def discard_resume(stored: Optional[Dict[str, Any]]) -> bool:
+    """
+    Delete a file store_resume() just uploaded that no candidate ended up using.
+    Deduplicated files already belonged to someone and are kept.
+    """
+    if not stored or stored.get("deduplicated"):
+        return False
+    try:
+        get_resume_storage().remove(stored["path"])
+        return True
+    except Exception as e:
+        st.warning(f"Could not remove unused resume file: {e}")
+        return False
+
+def iter_resume(path: str, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+    """Stream a stored resume in chunks."""
+    return get_resume_storage().stream(path, chunk_size)
+
+def get_resume_url(path: str, expires_in: int = 3600) -> Optional[str]:
+    """Short-lived URL the browser can download from directly (None for local storage)."""
+    try:
+        return get_resume_storage().signed_url(path, expires_in)
+    except Exception as e:
+        st.error(f"Error creating resume link: {e}")
+        return None
+
+def open_stored_resume(path: str) -> BinaryIO:
+    """
+    Stored resume as a seekable file for re-extraction. Spools to disk above
+    STORAGE_CHUNK_SIZE instead of holding the whole file in memory.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=STORAGE_CHUNK_SIZE)
+    for chunk in iter_resume(path):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,115 @@
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any
+
+from src.constants import MODEL_PRICING, TELEMETRY_DB_PATH
+
+# LLM telemetry.
+# One row per call_llm_json invocation, persisted to a local SQLite file so usage
+# survives restarts and can be charted in the Admin console.
+
+_lock = threading.Lock()
+_initialized = False
+
+SCHEMA = """
+create table if not exists llm_calls (
+    id integer primary key autoincrement,
+    ts real not null,
+    day text not null,
+    task text not null,
+    model text not null,
+    prompt_tokens integer default 0,
+    response_tokens integer default 0,
+    latency_ms real default 0,
+    attempts integer default 1,
+    validation_failures integer default 0,
+    cache_hit integer default 0,
+    success integer default 1,
+    cost_usd real default 0
+);
+create index if not exists llm_calls_day_task on llm_calls(day, task);
+"""
+
+def _db_path() -> str:
+    return os.getenv("TELEMETRY_DB_PATH", TELEMETRY_DB_PATH)
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+    path = _db_path()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    if not _initialized:
+        conn.executescript(SCHEMA)
+        _initialized = True
+    return conn
+
+def estimate_cost(model: str, prompt_tokens: int, response_tokens: int) -> float:
+    pricing = MODEL_PRICING.get(model)
+    if not pricing:
+        return 0.0
+    return (prompt_tokens * pricing["input"] + response_tokens * pricing["output"]) / 1_000_000
+
+def record_llm_call(
+    task: str,
+    model: str,
+    prompt_tokens: int = 0,
+    response_tokens: int = 0,
+    latency_ms: float = 0.0,
+    attempts: int = 1,
+    validation_failures: int = 0,
+    cache_hit: bool = False,
+    success: bool = True
+):
+    """Persist one LLM call. Telemetry must never break the calling task."""
+    now = time.time()
+    row = (
+        now,
+        datetime.fromtimestamp(now, tz=timezone.utc).strftime("%Y-%m-%d"),
+        task,
+        model,
+        prompt_tokens,
+        response_tokens,
+        latency_ms,
+        attempts,
+        validation_failures,
+        int(cache_hit),
+        int(success),
+        0.0 if cache_hit else estimate_cost(model, prompt_tokens, response_tokens)
+    )
+    try:
+        with _lock:
+            conn = _connect()
+            with conn:
+                conn.execute(
+                    """insert into llm_calls (ts, day, task, model, prompt_tokens, response_tokens, latency_ms,
+                       attempts, validation_failures, cache_hit, success, cost_usd)
+                       values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    row
+                )
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Error recording LLM telemetry: {e}")
+
+def get_llm_calls(days: int = 30) -> List[Dict[str, Any]]:
+    """Raw call rows for the last `days` days (for charting)."""
+    since = time.time() - days * 86400
+    try:
+        with _lock:
+            conn = _connect()
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("select * from llm_calls where ts >= ? order by ts", (since,)).fetchall()
+            conn.close()
+        return [dict(r) for r in rows]
+    except sqlite3.Error as e:
+        print(f"Error reading LLM telemetry: {e}")
+        return []
+
+def clear_llm_calls():
+    with _lock:
+        conn = _connect()
+        with conn:
+            conn.execute("delete from llm_calls")
+        conn.close()
@@ -0,0 +1,448 @@
+import io
+import re
+import mmap
+import codecs
+import zipfile
+import tempfile
+from html.parser import HTMLParser
+from typing import Optional, List, Iterator, BinaryIO
+
+from src.constants import (
+    UPLOAD_MAX_BYTES,
+    UPLOAD_SPOOL_BYTES,
+    UPLOAD_MAX_UNCOMPRESSED_BYTES
+)
+
+# Upload handling.
+# Formats are sniffed from the first bytes of the file, not taken from its extension,
+# and uploads are checked (size, binary junk, zip bombs) before any parser runs.
+# The content is copied into a SpooledTemporaryFile: small uploads stay in memory,
+# larger ones roll over to a temp file that text handlers read through mmap.
+# Text-like formats (TXT, HTML, RTF, ODT) are extracted by streaming handlers that
+# decode chunk by chunk instead of materializing the whole file as one string first;
+# PDF and DOCX go through PyPDF2 / python-docx on the seekable spool.
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 8192
+# Leading doctype, comment or HTML tag
+HTML_START_RE = re.compile(
+    rb"<(?:!doctype\s+html|!--|(?:html|head|body|meta|title|link|style|div|p|h[1-6]|table|section|article|"
+    rb"header|main|span|ul|ol|br)(?:[\s/>]|$))", re.I
+)
+
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "odt": "application/vnd.oasis.opendocument.text",
+    "rtf": "application/rtf",
+    "html": "text/html",
+    "txt": "text/plain"
+}
+
+class UploadRejected(ValueError):
+    """The upload is too large, not a supported format, or not a document at all."""
+
+# --- Sniffing ---
+
+def _looks_binary(sample: bytes) -> bool:
+    # NUL bytes or a high share of control characters: not text in any encoding we read
+    if not sample:
+        return False
+    if b"\x00" in sample:
+        return True
+    controls = sum(1 for b in sample if b < 32 and b not in (9, 10, 12, 13))
+    return controls / len(sample) > 0.05
+
+def _is_utf8(sample: bytes) -> bool:
+    # final=False: the sample may end in the middle of a multi-byte character
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def _sniff_zip(file_obj: BinaryIO) -> str:
+    try:
+        with zipfile.ZipFile(file_obj) as archive:
+            infos = archive.infolist()
+            names = {i.filename for i in infos}
+            if sum(i.file_size for i in infos) > UPLOAD_MAX_UNCOMPRESSED_BYTES:
+                raise UploadRejected("Archive expands to more than the allowed size.")
+            if "word/document.xml" in names:
+                return "docx"
+            if "mimetype" in names and "content.xml" in names:
+                if archive.read("mimetype").strip() == CONTENT_TYPES["odt"].encode("ascii"):
+                    return "odt"
+    except zipfile.BadZipFile:
+        raise UploadRejected("File is a damaged or truncated archive.")
+    finally:
+        file_obj.seek(0)
+    raise UploadRejected("Archive is not a Word (.docx) or OpenDocument (.odt) document.")
+
+def sniff_format(file_obj: BinaryIO) -> str:
+    """Document format from the file's content. Raises UploadRejected for anything else."""
+    file_obj.seek(0)
+    head = file_obj.read(SNIFF_BYTES)
+    file_obj.seek(0)
+
+    if not head.strip():
+        raise UploadRejected("File is empty.")
+    # PDF readers accept the header anywhere in the first 1 KB
+    if b"%PDF-" in head[:1024]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return _sniff_zip(file_obj)
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        raise UploadRejected("Legacy Word (.doc) files are not supported; save as .docx or PDF.")
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        raise UploadRejected("UTF-16 text is not supported; save as UTF-8.")
+
+    text_head = head[3:] if head.startswith(codecs.BOM_UTF8) else head
+    if text_head.lstrip().startswith(b"{\\rtf"):
+        return "rtf"
+    if _looks_binary(text_head):
+        raise UploadRejected("File is not a text document (binary content).")
+    # Only markup that starts like a document: text merely mentioning <body> or
+    # <script> stays text (the HTML handler would drop what follows)
+    if HTML_START_RE.match(text_head.lstrip()):
+        return "html"
+    if not _is_utf8(text_head):
+        raise UploadRejected("Text is not valid UTF-8.")
+    return "txt"
+
+# --- Streaming text handlers ---
+
+def _decode_chunks(chunks: Iterator[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    first = True
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if first:
+            text = text.lstrip("\ufeff")
+            first = False
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+class _HTMLText(HTMLParser):
+    BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer", "table", "ul", "ol"}
+    SKIP_TAGS = {"script", "style", "head", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+def html_to_text(chunks: Iterator[bytes]) -> str:
+    parser = _HTMLText()
+    for text in _decode_chunks(chunks):
+        parser.feed(text)
+    parser.close()
+    return _collapse_lines("".join(parser.parts))
+
+class _RTFText:
+    """Minimal streaming RTF reader: paragraphs, tabs, hex and unicode escapes; skips destinations."""
+
+    SKIP_DESTINATIONS = {
+        "fonttbl", "colortbl", "stylesheet", "info", "pict", "header", "footer", "headerl", "headerr",
+        "footerl", "footerr", "listtable", "listoverridetable", "rsidtbl", "generator", "xmlnstbl",
+        "themedata", "colorschememapping", "latentstyles", "datastore", "object", "fldinst"
+    }
+    NEWLINE_WORDS = {"par", "line", "sect", "page", "row"}
+
+    def __init__(self):
+        self.parts: List[str] = []
+        # Per group: (skipping, unicode skip count)
+        self.stack = [(False, 1)]
+        self.skipping = False
+        self.uc = 1
+        self.pending_skip = 0  # fallback characters still to drop after a \uN
+        self.state = "text"   # text | escape | word | param | hex
+        self.word = ""
+        self.param = ""
+        self.hex = ""
+        self.star = False
+
+    def feed(self, data: str):
+        for ch in data:
+            self._char(ch)
+
+    def _emit(self, text: str):
+        if self.skipping:
+            return
+        if self.pending_skip:
+            self.pending_skip -= 1
+            return
+        self.parts.append(text)
+
+    def _char(self, ch: str):
+        state = self.state
+        if state == "hex":
+            self.hex += ch
+            if len(self.hex) == 2:
+                self.state = "text"
+                try:
+                    self._emit(bytes([int(self.hex, 16)]).decode("cp1252"))
+                except (ValueError, UnicodeDecodeError):
+                    pass
+            return
+        if state == "escape":
+            if ch.isalpha():
+                self.word, self.param, self.state = ch, "", "word"
+            elif ch == "'":
+                self.hex, self.state = "", "hex"
+            elif ch == "*":
+                self.star = True
+                self.state = "text"
+            elif ch in "\n\r":
+                self.state = "text"
+                self._emit("\n")
+            else:
+                # Escaped literal: \\ \{ \} and symbols like \~ (non-breaking space)
+                self.state = "text"
+                self._emit({"~": " ", "_": "-", "-": ""}.get(ch, ch))
+            return
+        if state == "word":
+            if ch.isalpha():
+                self.word += ch
+                return
+            if ch.isdigit() or (ch == "-" and not self.param):
+                self.param += ch
+                self.state = "param"
+                return
+            self._end_word()
+            if ch != " ":
+                self._char(ch)
+            return
+        if state == "param":
+            if ch.isdigit():
+                self.param += ch
+                return
+            self._end_word()
+            if ch != " ":
+                self._char(ch)
+            return
+
+        if ch == "\\":
+            self.state = "escape"
+        elif ch == "{":
+            self.stack.append((self.skipping, self.uc))
+            self.star = False
+        elif ch == "}":
+            self.skipping, self.uc = self.stack.pop() if len(self.stack) > 1 else (False, 1)
+            self.star = False
+        elif ch in "\r\n":
+            pass  # raw line breaks are formatting only; \par marks paragraphs
+        else:
+            self._emit(ch)
+
+    def _end_word(self):
+        self.state = "text"
+        word, param = self.word, self.param
+        if param == "-":
+            # Malformed \u- / \uc- (a sign without digits): ignore the parameter
+            param = ""
+        if self.star or word in self.SKIP_DESTINATIONS:
+            # \*\destination and known non-text destinations: skip the whole group
+            self.skipping = True
+            self.star = False
+        if word in self.NEWLINE_WORDS:
+            self._emit("\n")
+        elif word == "tab":
+            self._emit("\t")
+        elif word == "uc" and param:
+            self.uc = int(param)
+        elif word == "u" and param:
+            code = int(param)
+            if code < 0:
+                code += 65536
+            self.pending_skip = 0
+            self._emit(chr(code))
+            self.pending_skip = self.uc
+
+def rtf_to_text(chunks: Iterator[bytes]) -> str:
+    reader = _RTFText()
+    # RTF is 7-bit; 8-bit text arrives as \'hh escapes, so latin-1 maps bytes 1:1
+    for text in _decode_chunks(chunks, "latin-1"):
+        reader.feed(text)
+    return _collapse_lines("".join(reader.parts))
+
+def odt_to_text(file_obj: BinaryIO) -> str:
+    import xml.sax
+    from xml.sax.handler import ContentHandler, feature_namespaces
+
+    text_ns = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+    class Handler(ContentHandler):
+        def __init__(self):
+            super().__init__()
+            self.parts: List[str] = []
+            self.depth = 0  # inside text:p / text:h
+
+        def startElementNS(self, name, qname, attrs):
+            ns, local = name
+            if ns != text_ns:
+                return
+            if local in ("p", "h"):
+                self.depth += 1
+            elif local == "s":
+                self.parts.append(" " * int(attrs.get((text_ns, "c"), 1)))
+            elif local == "tab":
+                self.parts.append("\t")
+            elif local == "line-break":
+                self.parts.append("\n")
+
+        def endElementNS(self, name, qname):
+            ns, local = name
+            if ns == text_ns and local in ("p", "h"):
+                self.depth -= 1
+                self.parts.append("\n")
+
+        def characters(self, content):
+            if self.depth:
+                self.parts.append(content)
+
+    handler = Handler()
+    parser = xml.sax.make_parser()
+    parser.setFeature(feature_namespaces, True)
+    parser.setContentHandler(handler)
+    with zipfile.ZipFile(file_obj) as archive, archive.open("content.xml") as content:
+        for chunk in iter(lambda: content.read(CHUNK_SIZE), b""):
+            parser.feed(chunk)
+    parser.close()
+    file_obj.seek(0)
+    return _collapse_lines("".join(handler.parts))
+
+def _collapse_lines(text: str) -> str:
+    lines = [line.strip() for line in text.splitlines()]
+    out, blank = [], False
+    for line in lines:
+        if line:
+            out.append(line)
+            blank = False
+        elif not blank and out:
+            out.append("")
+            blank = True
+    return "\n".join(out).strip()
+
+# --- Upload ---
+
+class Upload:
+    """A checked upload: sniffed format plus a seekable spool of its content."""
+
+    def __init__(self, name: str, spool: BinaryIO, size: int, fmt: str, on_disk: bool = False):
+        self.name = name
+        self.file = spool
+        self.size = size
+        # Whether the spool has rolled over to its temp file (open_upload knows from the size)
+        self.on_disk = on_disk
+        self.format = fmt
+        self.content_type = CONTENT_TYPES[fmt]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def iter_bytes(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Content in chunks; through mmap once the spool has rolled over to disk."""
+        if self.on_disk and self.size:
+            with mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                for start in range(0, self.size, chunk_size):
+                    yield view[start:start + chunk_size]
+            return
+        self.file.seek(0)
+        for chunk in iter(lambda: self.file.read(chunk_size), b""):
+            yield chunk
+        self.file.seek(0)
+
+    def text(self) -> str:
+        """Extracted text. Raises UploadRejected if the document can't be parsed."""
+        try:
+            if self.format == "pdf":
+                import PyPDF2
+                reader = PyPDF2.PdfReader(self.file)
+                text = "\n".join((page.extract_text() or "") for page in reader.pages)
+            elif self.format == "docx":
+                from docx import Document
+                text = "\n".join(p.text for p in Document(self.file).paragraphs)
+            elif self.format == "odt":
+                text = odt_to_text(self.file)
+            elif self.format == "rtf":
+                text = rtf_to_text(self.iter_bytes())
+            elif self.format == "html":
+                text = html_to_text(self.iter_bytes())
+            else:
+                text = "".join(_decode_chunks(self.iter_bytes()))
+        except UploadRejected:
+            raise
+        except Exception as e:
+            # Truncated / malformed documents: parser errors differ per library
+            raise UploadRejected(f"Could not read this {self.format.upper()} file ({type(e).__name__}).") from e
+        finally:
+            self.file.seek(0)
+        return text.strip()
+
+def _declared_size(file_obj) -> Optional[int]:
+    # Streamlit's UploadedFile knows its size; plain files can be measured by seeking
+    size = getattr(file_obj, "size", None)
+    if isinstance(size, int):
+        return size
+    try:
+        pos = file_obj.tell()
+        file_obj.seek(0, io.SEEK_END)
+        end = file_obj.tell()
+        file_obj.seek(pos)
+        return end
+    except (AttributeError, OSError):
+        return None
+
+def open_upload(file_obj: BinaryIO, file_name: str, max_bytes: int = UPLOAD_MAX_BYTES) -> Upload:
+    """
+    Check an uploaded file and copy it into a spool (memory below UPLOAD_SPOOL_BYTES,
+    temp file above). Raises UploadRejected before any parsing if the file is too
+    large, empty, binary junk or not a supported document format.
+    """
+    declared = _declared_size(file_obj)
+    if declared is not None and declared > max_bytes:
+        raise UploadRejected(f"File is larger than {max_bytes // (1024 * 1024)} MB.")
+
+    spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES)
+    try:
+        file_obj.seek(0)
+        size = 0
+        for chunk in iter(lambda: file_obj.read(CHUNK_SIZE), b""):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadRejected(f"File is larger than {max_bytes // (1024 * 1024)} MB.")
+            spool.write(chunk)
+        file_obj.seek(0)
+        spool.seek(0)
+        fmt = sniff_format(spool)
+        # SpooledTemporaryFile rolls over once more than max_size bytes are written
+        return Upload(file_name, spool, size, fmt, on_disk=size > UPLOAD_SPOOL_BYTES)
+    except BaseException:
+        spool.close()
+        raise
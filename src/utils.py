@@ -1,44 +1,25 @@
 import re
 import io
 from typing import Optional
-import PyPDF2
-from docx import Document
+
+from src.uploads import open_upload, UploadRejected
 
 def extract_text_from_file(file_obj: io.BytesIO, file_name: str) -> str:
     """
-    Extracts text from PDF, DOCX, or TXT files.
+    Extracts text from PDF, DOCX, ODT, RTF, HTML or TXT files.
     file_obj: The file-like object (BytesIO) from streamlit uploader.
-    file_name: Original filename to determine extension.
+    file_name: Original filename (the format itself is sniffed from the content).
+    Returns an "Error: ..." string for rejected or unreadable files; pages that
+    need to tell these apart use src.uploads.open_upload directly.
     """
-    text = ""
-    file_lower = file_name.lower()
-
     try:
-        if file_lower.endswith('.pdf'):
-            reader = PyPDF2.PdfReader(file_obj)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        
-        elif file_lower.endswith('.docx'):
-            doc = Document(file_obj)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-        
-        elif file_lower.endswith('.txt'):
-            text = file_obj.getvalue().decode("utf-8")
-            
-        else:
-            # Fallback for other text-based formats or error
-            try:
-                text = file_obj.getvalue().decode("utf-8")
-            except:
-                return f"Error: Unsupported file format for {file_name}"
-                
+        with open_upload(file_obj, file_name) as upload:
+            return upload.text()
+    except UploadRejected as e:
+        return f"Error: {e}"
     except Exception as e:
         return f"Error extracting text: {str(e)}"
 
-    return text.strip()
-
 def redact_pii(text: str) -> str:
     """
     Simple regex-based PII redaction for emails and phone numbers.